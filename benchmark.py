@@ -0,0 +1,422 @@
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from database import Database
+from initialize_db import upgrade_database
+from search import has_product_index
+from services import forecast, inventory, ledger, products, reorder, reports, supplies
+from services.inventory import adjust_stock, move_stock
+from services.supplies import STATUS_DELIVERED, STATUS_PENDING, create_supply_order, receive_supply
+
+# Словари для правдоподобных названий товаров
+ADJECTIVES = ["Свежий", "Домашний", "Отборный", "Классический", "Фермерский", "Новый", "Легкий", "Особый"]
+NOUNS = ["хлеб", "сыр", "кефир", "молоко", "чай", "кофе", "сок", "йогурт", "творог", "шоколад", "рис", "макароны"]
+MANUFACTURERS = ["Простоквашино", "Вимм-Билль-Данн", "Северное сияние", "Дары Кубани", "Агрокомплекс", "Союзпищепром"]
+STATUSES = [STATUS_PENDING, "В пути", STATUS_DELIVERED, "Отменено"]
+REASONS = ["Продажа", "Списание", "Инвентаризация", "Возврат", "Поступление"]
+
+
+def generate_database(path, products=10000, categories=50, suppliers=100, supplies=2000,
+                      items_per_supply=10, history=100000, seed=42):
+    """Создание базы inventory_system.db со случайными, но правдоподобными данными."""
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    db = Database(path)
+    upgrade_database(db.connect())
+    today = date.today()
+
+    def random_day():
+        return (today - timedelta(days=rng.randrange(365))).isoformat()
+
+    with db.transaction() as cursor:
+        cursor.executemany(
+            "INSERT INTO categories (name, description) VALUES (?, ?)",
+            ((f"Категория {i}", f"Описание категории {i}") for i in range(1, categories + 1)),
+        )
+        cursor.executemany(
+            "INSERT INTO suppliers (name, contact_person, phone, email, address) VALUES (?, ?, ?, ?, ?)",
+            ((f"Поставщик {i}", f"Менеджер {i}", f"+7 900 {i:07d}", f"supplier{i}@example.com", f"Город, улица {i}")
+             for i in range(1, suppliers + 1)),
+        )
+        cursor.executemany('''
+            INSERT INTO products (name, description, category_id, sku, manufacturer, purchase_price,
+                                  retail_price, min_stock, supplier_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            (f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}", f"Товар номер {i}",
+             rng.randint(1, categories), f"SKU{i:07d}", rng.choice(MANUFACTURERS),
+             round(rng.uniform(10, 1000), 2), round(rng.uniform(20, 2000), 2),
+             rng.randint(0, 50), rng.randint(1, suppliers))
+            for i in range(1, products + 1)
+        ))
+        cursor.executemany(
+            "INSERT INTO supplies (supplier_id, date, status) VALUES (?, ?, ?)",
+            ((rng.randint(1, suppliers), random_day(), rng.choice(STATUSES)) for _ in range(supplies)),
+        )
+        cursor.executemany(
+            "INSERT INTO supply_items (supply_id, product_id, quantity) VALUES (?, ?, ?)",
+            ((supply_id, rng.randint(1, products), rng.randint(1, 100))
+             for supply_id in range(1, supplies + 1)
+             for _ in range(rng.randint(1, items_per_supply * 2 - 1))),
+        )
+        # Доставленные поставки приняты полностью, по документу приемки на поставку
+        cursor.execute("UPDATE supply_items SET received = quantity WHERE supply_id IN "
+                       "(SELECT id FROM supplies WHERE status = ?)", (STATUS_DELIVERED,))
+        cursor.execute("INSERT INTO supply_receipts (supply_id, date) SELECT id, date FROM supplies WHERE status = ?",
+                       (STATUS_DELIVERED,))
+        cursor.execute('''
+            INSERT INTO supply_receipt_items (receipt_id, product_id, quantity)
+            SELECT r.id, si.product_id, SUM(si.received)
+            FROM supply_receipts r
+            JOIN supply_items si ON si.supply_id = r.supply_id
+            GROUP BY r.id, si.product_id
+        ''')
+        # Журнал движения: начальный остаток год назад и случайные движения до вчерашнего дня
+        opening = (today - timedelta(days=365)).isoformat()
+        cursor.executemany(
+            "INSERT INTO stock_history (product_id, change_reason, quantity_change, date) VALUES (?, ?, ?, ?)",
+            ((i, "Начальный остаток", rng.randint(0, 500), f"{opening} 00:00:00") for i in range(1, products + 1)),
+        )
+        cursor.executemany(
+            "INSERT INTO stock_history (product_id, change_reason, quantity_change, date) VALUES (?, ?, ?, ?)",
+            ((rng.randint(1, products), rng.choice(REASONS), rng.randint(-50, 100),
+              f"{today - timedelta(days=rng.randrange(1, 365))} {rng.randrange(24):02d}:{rng.randrange(60):02d}:00")
+             for _ in range(history)),
+        )
+
+        # Остатки до/после по порядку журнала и текущие остатки - его итог
+        cursor.execute('''
+            UPDATE stock_history
+            SET quantity_before = running.quantity - stock_history.quantity_change, quantity_after = running.quantity
+            FROM (
+                SELECT id, SUM(quantity_change) OVER (PARTITION BY product_id ORDER BY date, id) AS quantity
+                FROM stock_history
+            ) running
+            WHERE running.id = stock_history.id
+        ''')
+        cursor.execute('''
+            INSERT INTO inventory (product_id, quantity, last_updated)
+            SELECT product_id, SUM(quantity_change), datetime('now') FROM stock_history GROUP BY product_id
+        ''')
+    ledger.rebuild_stock_snapshots(db)
+    db.execute("ANALYZE")
+    db.close()
+
+
+def measure(func, repeat):
+    """Время выполнения func (мс) по repeat запускам."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "repeat": repeat,
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.mean(timings), 3),
+        "max_ms": round(max(timings), 3),
+    }
+
+
+def product_page(db, filters, sort_column=None, use_index=True, page_size=200):
+    """Запрос первой страницы таблицы товаров, как при открытии экрана."""
+    return products.list_products(db, *filters, sort_column=sort_column, limit=page_size, use_index=use_index)
+
+
+def run_benchmarks(db, repeat=5, seed=42):
+    """Замеры запросов, которые выполняются за экранами приложения."""
+    rng = random.Random(seed)
+    use_index = has_product_index(db)
+    results = {}
+
+    # Товары: все сочетания фильтров и сортировка по остатку
+    filter_cases = {
+        "none": ("", "", ""),
+        "name": ("молоко", "", ""),
+        "category": ("", "Категория 1", ""),
+        "keywords": ("", "", "свеж мол"),
+        "name+category": ("молоко", "Категория 1", ""),
+        "name+category+keywords": ("молоко", "Категория 1", "свеж"),
+    }
+    for case, filters in filter_cases.items():
+        results[f"load_products[{case}]"] = measure(lambda: product_page(db, filters, None, use_index), repeat)
+        results[f"load_products[{case}, sort=Остаток]"] = measure(
+            lambda: product_page(db, filters, "Остаток", use_index), repeat)
+    if use_index:
+        results["load_products[keywords, LIKE]"] = measure(
+            lambda: product_page(db, filter_cases["keywords"], None, False), repeat)
+
+    # Остатки и поставки: первая страница, как при открытии экрана, и сортировка по колонке
+    results["load_inventory"] = measure(lambda: inventory.list_inventory_page(db), repeat)
+    results["load_inventory[sort=Остаток]"] = measure(
+        lambda: inventory.list_inventory_page(db, "Остаток", True), repeat)
+    results["load_supplies[sort=Дата]"] = measure(lambda: supplies.list_supply_page(db, sort_column="Дата"), repeat)
+
+    # Журнал движения: первая страница без фильтров, по товару и за месяц
+    product_ids = [row[0] for row in db.fetchall("SELECT id FROM products")]
+    results["view_stock_history"] = measure(lambda: inventory.list_stock_history(db), repeat)
+    results["view_stock_history[product]"] = measure(
+        lambda: inventory.list_stock_history(db, rng.choice(product_ids)), repeat)
+    results["view_stock_history[date range]"] = measure(
+        lambda: inventory.list_stock_history(db, date_from=date.today().replace(day=1).isoformat()), repeat)
+
+    # Справочники для выпадающих списков, поиск id по названию и выбор товара по началу названия (кэш справочников)
+    product_names = products.product_names(db)
+    results["product_names"] = measure(lambda: products.product_names(db), repeat)
+    results["find_product_id"] = measure(lambda: products.find_product_id(db, rng.choice(product_names)), repeat)
+    results["search_products"] = measure(lambda: products.search_products(db, rng.choice(product_names)[:3]), repeat)
+    results["find_product_by_sku"] = measure(
+        lambda: products.find_product_by_sku(db, f"SKU{rng.choice(product_ids):07d}"), repeat)
+
+    # Остатки на дату: один товар, первая страница окна и весь каталог; сверка остатков с журналом
+    def random_day():
+        return (date.today() - timedelta(days=rng.randrange(365))).isoformat()
+
+    results["stock_at[product]"] = measure(lambda: ledger.stock_at(db, random_day(), rng.choice(product_ids)), repeat)
+    results["stock_at[page]"] = measure(lambda: ledger.stock_at_page(db, random_day(), "Название"), repeat)
+    results["stock_at[catalog]"] = measure(lambda: ledger.stock_at(db, random_day()), repeat)
+    results["check_ledger"] = measure(lambda: ledger.check_ledger(db), repeat)
+
+    results["forecast_catalog"] = measure(lambda: forecast.forecast_catalog(db), repeat)
+
+    # Отчеты целиком (как при экспорте в файл)
+    results["generate_stock_report"] = measure(lambda: reports.build_stock_report(db, io.StringIO()), repeat)
+    results["generate_supply_report"] = measure(lambda: reports.build_supply_report(db, out=io.StringIO()), repeat)
+    results["generate_stock_movement_report"] = measure(
+        lambda: reports.build_stock_movement_report(db, io.StringIO()), repeat)
+
+    # Запись: оформление заказа и оприходование поставки
+    supplier_ids = [row[0] for row in db.fetchall("SELECT id FROM suppliers")]
+
+    def random_order(size=20):
+        items = [(rng.choice(product_ids), rng.randint(1, 100)) for _ in range(size)]
+        return create_supply_order(db, rng.choice(supplier_ids), items)
+
+    results["save_order[20 items]"] = measure(random_order, repeat)
+    pending = iter([random_order() for _ in range(repeat)])
+    results["register_supply_receipt[20 items]"] = measure(lambda: receive_supply(db, next(pending)), repeat)
+    pending = iter([random_order(1000) for _ in range(repeat)])
+    results["register_supply_receipt[1000 items]"] = measure(lambda: receive_supply(db, next(pending)), repeat)
+
+    # Сканирование: пачка отсканированных товаров и частичная приемка половины заказа (документ приемки)
+    results["scan_counts[200 products]"] = measure(
+        lambda: inventory.apply_stock_counts(db, {rng.choice(product_ids): rng.randint(1, 5) for _ in range(200)},
+                                             "Сканирование"), repeat)
+    pending = iter([random_order() for _ in range(repeat)])
+
+    def scan_receipt():
+        supply_id = next(pending)
+        lines = supplies.supply_lines(db, supply_id)
+        return supplies.receive_supply_counts(db, supply_id, {line[0]: line[3] // 2 + 1 for line in lines})
+
+    results["scan_supply_receipt[20 items]"] = measure(scan_receipt, repeat)
+
+    # Автозаказ: предложение по всем товарам с нехваткой и черновики заказов
+    results["reorder_proposals"] = measure(lambda: reorder.reorder_proposals(db), repeat)
+    # Черновики - один запуск: при повторном нехватка уже покрыта заказами
+    results["create_reorder_drafts"] = measure(lambda: reorder.create_reorder_drafts(db), 1)
+    return results
+
+
+def run_stress(path, writers=8, operations=200, hot_products=20, seed=42):
+    """Одновременная запись из нескольких сеансов: оприходование, движения и корректировки.
+
+    Каждый писатель - отдельный объект Database в своем потоке, как отдельный
+    экземпляр приложения. Все пишут в небольшой набор товаров, а каждую
+    поставку пытаются оприходовать несколько писателей. После прогона
+    проверяется, что изменения не потеряны: остаток каждого товара равен
+    начальному плюс сумма новых записей истории, остатки до/после в истории
+    образуют непрерывную цепочку, и каждая поставка оприходована не более
+    одного раза.
+    """
+    rng = random.Random(seed)
+    setup = Database(path)
+    try:
+        upgrade_database(setup.connect())
+        product_ids = [row[0] for row in setup.fetchall(
+            "SELECT product_id FROM inventory ORDER BY product_id LIMIT ?", (hot_products,))]
+        supplier_id = setup.fetchone("SELECT id FROM suppliers ORDER BY id LIMIT 1")[0]
+        supply_ids = [
+            create_supply_order(setup, supplier_id,
+                                [(product_id, rng.randint(1, 20)) for product_id in rng.sample(product_ids, 5)])
+            for _ in range(max(1, writers * operations // 4))
+        ]
+        marks = ",".join("?" * len(product_ids))
+        before = dict(setup.fetchall(f"SELECT product_id, quantity FROM inventory WHERE product_id IN ({marks})",
+                                     product_ids))
+        last_history_id = setup.fetchone("SELECT COALESCE(MAX(id), 0) FROM stock_history")[0]
+    finally:
+        setup.close()
+
+    errors = []
+    retries = []
+
+    def writer(index):
+        db = Database(path)
+        writer_rng = random.Random(seed + index)
+        try:
+            for _ in range(operations):
+                choice = writer_rng.random()
+                if choice < 0.4:
+                    receive_supply(db, writer_rng.choice(supply_ids))
+                elif choice < 0.8:
+                    move_stock(db, writer_rng.choice(product_ids), writer_rng.randint(-20, 20), "Стресс-тест")
+                else:
+                    adjust_stock(db, writer_rng.choice(product_ids), writer_rng.randint(0, 500), "Стресс-тест")
+        except sqlite3.Error as e:
+            errors.append(f"писатель {index}: {e}")
+        finally:
+            retries.append(db.busy_retries)
+            db.close()
+
+    threads = [threading.Thread(target=writer, args=(index,)) for index in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    # Проверка: остаток = начальный + изменения из истории; поставки - не более одного раза
+    db = Database(path)
+    try:
+        after = dict(db.fetchall(f"SELECT product_id, quantity FROM inventory WHERE product_id IN ({marks})",
+                                 product_ids))
+        changes = dict(db.fetchall(f'''
+            SELECT product_id, SUM(quantity_change) FROM stock_history
+            WHERE id > ? AND product_id IN ({marks})
+            GROUP BY product_id
+        ''', [last_history_id] + product_ids))
+        broken_history = [row[0] for row in db.fetchall(f'''
+            SELECT id FROM (
+                SELECT id, quantity_change, quantity_before, quantity_after,
+                       LAG(quantity_after) OVER (PARTITION BY product_id ORDER BY id) AS previous_after
+                FROM stock_history
+                WHERE id > ? AND product_id IN ({marks})
+            )
+            WHERE quantity_after - quantity_before != quantity_change OR quantity_before != previous_after
+        ''', [last_history_id] + product_ids)]
+        receipts = dict(db.fetchall('''
+            SELECT change_reason, COUNT(*) FROM stock_history
+            WHERE id > ? AND change_reason LIKE 'Поступление по поставке #%'
+            GROUP BY change_reason
+        ''', (last_history_id,)))
+        supply_marks = ",".join("?" * len(supply_ids))
+        item_counts = dict(db.fetchall(f'''
+            SELECT supply_id, COUNT(DISTINCT product_id) FROM supply_items
+            WHERE supply_id IN ({supply_marks}) GROUP BY supply_id
+        ''', supply_ids))
+        delivered = {row[0] for row in db.fetchall(
+            f"SELECT id FROM supplies WHERE id IN ({supply_marks}) AND status = ?", supply_ids + [STATUS_DELIVERED])}
+    finally:
+        db.close()
+
+    lost_updates = [product_id for product_id in product_ids
+                    if after[product_id] != before[product_id] + changes.get(product_id, 0)]
+    double_receipts = [supply_id for supply_id in supply_ids
+                       if receipts.get(f"Поступление по поставке #{supply_id}", 0)
+                       != (item_counts[supply_id] if supply_id in delivered else 0)]
+    total = writers * operations
+    return {
+        "writers": writers,
+        "operations": total,
+        "elapsed_s": round(elapsed, 3),
+        "operations_per_second": round(total / elapsed, 1) if elapsed else 0.0,
+        "busy_retries": sum(retries),
+        "errors": errors,
+        "lost_updates": lost_updates,
+        "broken_history": broken_history,
+        "double_receipts": double_receipts,
+        "supplies_delivered": len(delivered),
+    }
+
+
+def table_counts(db):
+    """Число строк в таблицах базы."""
+    tables = ["products", "categories", "suppliers", "inventory", "supplies", "supply_items", "stock_history"]
+    return {table: db.fetchone(f"SELECT COUNT(*) FROM {table}")[0] for table in tables}
+
+
+def main():
+    """Генерация тестовой базы и замеры производительности без графического интерфейса."""
+    parser = argparse.ArgumentParser(description="Нагрузочные замеры системы управления запасами.")
+    parser.add_argument("--db", default="benchmark.db", help="путь к тестовой базе данных")
+    parser.add_argument("--reuse", action="store_true", help="не пересоздавать существующую базу")
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--suppliers", type=int, default=100)
+    parser.add_argument("--supplies", type=int, default=2000)
+    parser.add_argument("--items-per-supply", type=int, default=10)
+    parser.add_argument("--history", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5, help="число повторов каждого замера")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_results.json", help="файл с результатами (JSON)")
+    parser.add_argument("--stress", action="store_true",
+                        help="вместо замеров - одновременная запись из нескольких сеансов с проверкой потерь")
+    parser.add_argument("--writers", type=int, default=8, help="число одновременных писателей (--stress)")
+    parser.add_argument("--operations", type=int, default=200, help="операций на писателя (--stress)")
+    args = parser.parse_args()
+
+    if not (args.reuse and os.path.exists(args.db)):
+        started = time.perf_counter()
+        generate_database(args.db, args.products, args.categories, args.suppliers, args.supplies,
+                          args.items_per_supply, args.history, args.seed)
+        print(f"База {args.db} создана за {time.perf_counter() - started:.1f} с")
+
+    if args.stress:
+        stress = run_stress(args.db, args.writers, args.operations, seed=args.seed)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"timestamp": datetime.now().isoformat(timespec="seconds"),
+                       "sqlite": sqlite3.sqlite_version, "database": args.db, "stress": stress},
+                      f, ensure_ascii=False, indent=2)
+        print(f"Писателей: {stress['writers']}, операций: {stress['operations']}, "
+              f"{stress['operations_per_second']} оп/с, повторов при занятой базе: {stress['busy_retries']}")
+        print(f"Ошибок: {len(stress['errors'])}, потерянных изменений: {len(stress['lost_updates'])}, "
+              f"разрывов в истории: {len(stress['broken_history'])}, "
+              f"повторных оприходований: {len(stress['double_receipts'])}")
+        for error in stress["errors"]:
+            print(f"  {error}")
+        if stress["errors"] or stress["lost_updates"] or stress["broken_history"] or stress["double_receipts"]:
+            sys.exit(1)
+        return
+
+    db = Database(args.db)
+    try:
+        upgrade_database(db.connect())
+        counts = table_counts(db)
+        results = run_benchmarks(db, args.repeat, args.seed)
+    finally:
+        db.close()
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "numpy": forecast.np.__version__ if forecast.VECTORIZED else None,
+        "platform": platform.platform(),
+        "database": args.db,
+        "counts": counts,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    for name, timing in results.items():
+        print(f"{name:<45} {timing['median_ms']:>10.2f} мс")
+    print(f"Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
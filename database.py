@@ -0,0 +1,151 @@
+import functools
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DB_PATH = "inventory_system.db"
+
+# Повторы записи, если база занята другим сеансом: число попыток и паузы (с)
+RETRY_ATTEMPTS = 6
+RETRY_DELAY = 0.05
+RETRY_MAX_DELAY = 1.0
+
+
+class Database:
+    """Единый слой доступа к базе данных системы управления запасами.
+
+    Соединение открывается один раз на поток и живет до вызова close(),
+    поэтому файл базы и схема не разбираются заново в каждом обработчике.
+    Фоновые потоки получают свои соединения из того же пула.
+
+    База работает в режиме WAL: читатели не блокируют писателя и наоборот,
+    поэтому несколько сеансов могут работать с одним файлом одновременно.
+    timeout - сколько секунд ждать освобождения блокировки записи (busy timeout).
+    WAL требует локального диска; для сетевых папок используйте server.py.
+    """
+
+    def __init__(self, path=DB_PATH, timeout=5.0, cached_statements=256, journal_mode="WAL",
+                 synchronous="NORMAL"):
+        self.path = path
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.connections_opened = 0
+        self.busy_retries = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def connect(self):
+        """Получение соединения текущего потока (открывается при первом обращении)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: транзакции открываются только явно через transaction()
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.timeout,
+                cached_statements=self.cached_statements,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            # WAL сохраняется в файле базы; synchronous=NORMAL в WAL не теряет
+            # целостность при сбое, но не делает fsync на каждой фиксации
+            conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+            conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+                self.connections_opened += 1
+        return conn
+
+    def cursor(self):
+        """Новый курсор на соединении текущего потока."""
+        return self.connect().cursor()
+
+    def execute(self, query, params=()):
+        """Выполнение одиночного запроса, возвращает курсор."""
+        return self.connect().execute(query, params)
+
+    def fetchall(self, query, params=()):
+        """Выполнение запроса и получение всех строк."""
+        return self.execute(query, params).fetchall()
+
+    def fetchone(self, query, params=()):
+        """Выполнение запроса и получение первой строки."""
+        return self.execute(query, params).fetchone()
+
+    @contextmanager
+    def transaction(self, mode="IMMEDIATE"):
+        """Транзакция: COMMIT при успехе, ROLLBACK при любом исключении.
+
+        По умолчанию IMMEDIATE: блокировка записи берется сразу (с ожиданием
+        по busy timeout), а не при первой записи, когда ждать уже нельзя.
+        Вложенный вызов присоединяется к уже открытой транзакции.
+        """
+        conn = self.connect()
+        if conn.in_transaction:
+            yield conn.cursor()
+            return
+        conn.execute(f"BEGIN {mode}")
+        try:
+            yield conn.cursor()
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+
+    def in_transaction(self):
+        """Открыта ли транзакция на соединении текущего потока."""
+        return self.connect().in_transaction
+
+    def checkpoint(self, mode="PASSIVE"):
+        """Перенос изменений из WAL-журнала в файл базы.
+
+        PASSIVE не ждет читателей и писателей. Возвращает (busy, log, checkpointed).
+        """
+        return self.connect().execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+
+    def count_retry(self):
+        """Учет повтора записи после занятой базы (для статистики нагрузочных тестов)."""
+        with self._lock:
+            self.busy_retries += 1
+
+    def close(self):
+        """Закрытие всех открытых соединений."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+def is_busy_error(error):
+    """Ошибка занятой базы (другой сеанс держит блокировку записи)."""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+def retry_on_busy(func):
+    """Повтор операции записи func(db, ...), если база занята другим сеансом.
+
+    Между попытками - экспоненциально растущая пауза со случайным разбросом,
+    чтобы конкурирующие сеансы не повторяли запись одновременно. Операция
+    внутри чужой открытой транзакции не повторяется: откатить ее частично нельзя.
+    """
+    @functools.wraps(func)
+    def wrapper(db, *args, **kwargs):
+        delay = RETRY_DELAY
+        for attempt in range(RETRY_ATTEMPTS):
+            try:
+                return func(db, *args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt == RETRY_ATTEMPTS - 1 or db.in_transaction():
+                    raise
+            db.count_retry()
+            time.sleep(delay * random.uniform(0.5, 1.5))
+            delay = min(delay * 2, RETRY_MAX_DELAY)
+    return wrapper
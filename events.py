@@ -0,0 +1,46 @@
+import threading
+import traceback
+
+# Виды событий
+STOCK_CHANGED = "stock_changed"
+LOW_STOCK = "low_stock"
+SUPPLY_ORDERED = "supply_ordered"
+SUPPLY_RECEIVED = "supply_received"
+
+
+class EventBus:
+    """Шина событий внутри процесса.
+
+    Сервисы публикуют события после фиксации транзакции, подписчики
+    (всплывающие уведомления, запись в таблицу notifications) получают их
+    синхронно в потоке публикации. Ошибка подписчика не прерывает операцию,
+    которая уже записана в базу, и не мешает остальным подписчикам.
+    """
+
+    def __init__(self):
+        self._handlers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, handler, *kinds):
+        """Подписка handler(kind, data) на события kinds (без kinds - на все)."""
+        with self._lock:
+            self._handlers.append((handler, set(kinds)))
+
+    def unsubscribe(self, handler):
+        """Отмена всех подписок handler."""
+        with self._lock:
+            self._handlers = [(h, kinds) for h, kinds in self._handlers if h != handler]
+
+    def publish(self, kind, **data):
+        """Рассылка события kind с данными data подписчикам."""
+        with self._lock:
+            handlers = [h for h, kinds in self._handlers if not kinds or kind in kinds]
+        for handler in handlers:
+            try:
+                handler(kind, data)
+            except Exception:
+                traceback.print_exc()
+
+
+# Общая шина процесса
+bus = EventBus()
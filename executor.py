@@ -0,0 +1,82 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueryExecutor:
+    """Выполнение запросов к базе в фоновых потоках.
+
+    Результаты возвращаются в главный цикл Tk через after(), поэтому колбэки
+    on_done/on_error могут безопасно работать с виджетами. Запросы с одинаковым
+    ключом вытесняют друг друга: результат устаревшего запроса отбрасывается,
+    а еще не начатый запрос отменяется.
+    """
+
+    def __init__(self, root, workers=2, poll_interval=30, on_busy=None):
+        self.root = root
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db-worker")
+        self.results = queue.Queue()
+        self.generations = {}
+        self.futures = {}
+        self.pending = 0
+        self.poll_interval = poll_interval
+        self.on_busy = on_busy
+        self.root.after(self.poll_interval, self.poll)
+
+    def submit(self, key, func, *args, on_done=None, on_error=None):
+        """Запуск func(*args) в фоновом потоке.
+
+        on_done(result) или on_error(exception) вызываются в потоке Tk, если к
+        этому моменту не был отправлен более новый запрос с тем же key.
+        """
+        generation = self.generations.get(key, 0) + 1
+        self.generations[key] = generation
+
+        # Еще не начатый предыдущий запрос больше не нужен
+        previous = self.futures.get(key)
+        if previous is not None:
+            previous.cancel()
+
+        future = self.pool.submit(func, *args)
+        self.futures[key] = future
+        self.set_pending(self.pending + 1)
+        future.add_done_callback(
+            lambda f: self.results.put((key, generation, f, on_done, on_error))
+        )
+        return future
+
+    def poll(self):
+        """Доставка готовых результатов в потоке Tk."""
+        try:
+            while True:
+                try:
+                    key, generation, future, on_done, on_error = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                self.set_pending(self.pending - 1)
+                if self.futures.get(key) is future:
+                    del self.futures[key]
+
+                # Отмененные и вытесненные запросы не доставляются
+                if future.cancelled() or generation != self.generations.get(key):
+                    continue
+                error = future.exception()
+                if error is not None:
+                    if on_error is not None:
+                        on_error(error)
+                    else:
+                        self.root.report_callback_exception(type(error), error, error.__traceback__)
+                elif on_done is not None:
+                    on_done(future.result())
+        finally:
+            self.root.after(self.poll_interval, self.poll)
+
+    def set_pending(self, count):
+        """Учет выполняющихся запросов и переключение индикатора занятости."""
+        was_busy = self.pending > 0
+        self.pending = count
+        if self.on_busy is not None and was_busy != (count > 0):
+            self.on_busy(count > 0)
+
+    def shutdown(self):
+        """Остановка фоновых потоков без ожидания незавершенных запросов."""
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,38 @@
+import csv
+import json
+
+# Сколько строк читать из курсора за один раз при выгрузке
+FETCH_SIZE = 1000
+
+
+def export_format(path):
+    """Формат выгрузки по расширению файла: jsonl или csv."""
+    return "jsonl" if path.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def export_query(db, query, params, columns, path, fmt=None):
+    """Потоковая выгрузка результата запроса в CSV или JSON Lines.
+
+    Строки читаются из курсора пачками по FETCH_SIZE и сразу пишутся в файл,
+    поэтому расход памяти не зависит от числа строк. Возвращает число строк.
+    """
+    fmt = fmt or export_format(path)
+    cursor = db.execute(query, params)
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if fmt == "jsonl":
+            def write_row(row):
+                f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n")
+        else:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            write_row = writer.writerow
+
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                write_row(row)
+            count += len(rows)
+    return count
@@ -1,8 +1,433 @@
+import logging
 import sqlite3
 
-def initialize_database():
-    """Создание и инициализация базы данных для системы управления запасами."""
-    conn = sqlite3.connect("inventory_system.db")
+from database import DB_PATH
+
+log = logging.getLogger(__name__)
+
+
+def merge_inventory_duplicates(conn):
+    """Объединение дублирующихся строк остатков перед уникальным индексом.
+
+    Прежние версии меняли остаток запросом UPDATE ... WHERE product_id, то есть
+    одинаково во всех строках товара, поэтому дубликаты с равным количеством
+    сводятся к последней строке (с самой поздней датой изменения). Если
+    количества расходятся, верное выбрать нельзя: миграция прерывается со
+    списком товаров, строки которых нужно исправить вручную.
+    Число удаленных строк пишется в журнал (logging) и возвращается.
+    """
+    conflicts = [row[0] for row in conn.execute('''
+        SELECT product_id FROM inventory
+        GROUP BY product_id
+        HAVING COUNT(*) > 1 AND MIN(quantity) != MAX(quantity)
+        ORDER BY product_id
+    ''')]
+    if conflicts:
+        listed = ", ".join(map(str, conflicts[:10]))
+        if len(conflicts) > 10:
+            listed += f" и еще {len(conflicts) - 10}"
+        raise sqlite3.IntegrityError(
+            f"В таблице остатков несколько строк с разным количеством для товаров (id): {listed}. "
+            "Оставьте по одной строке на товар и повторите обновление.")
+
+    conn.execute('''
+        UPDATE inventory SET last_updated = d.last_updated
+        FROM (
+            SELECT MAX(id) AS id, MAX(last_updated) AS last_updated FROM inventory
+            GROUP BY product_id HAVING COUNT(*) > 1
+        ) d
+        WHERE inventory.id = d.id
+    ''')
+    removed = conn.execute(
+        "DELETE FROM inventory WHERE id NOT IN (SELECT MAX(id) FROM inventory GROUP BY product_id)").rowcount
+    if removed:
+        log.info("Объединены дублирующиеся строки остатков, удалено строк: %d.", removed)
+    return removed
+
+
+def create_indexes(conn):
+    """Индексы по внешним ключам и полям поиска; остатки - одна строка на товар."""
+    merge_inventory_duplicates(conn)
+    for statement in (
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_inventory_product ON inventory(product_id)",
+        "CREATE INDEX IF NOT EXISTS idx_supply_items_supply ON supply_items(supply_id)",
+        "CREATE INDEX IF NOT EXISTS idx_supply_items_product ON supply_items(product_id)",
+        "CREATE INDEX IF NOT EXISTS idx_stock_history_product_date ON stock_history(product_id, date)",
+        "CREATE INDEX IF NOT EXISTS idx_supplies_supplier_date_status ON supplies(supplier_id, date, status)",
+        "CREATE INDEX IF NOT EXISTS idx_products_name ON products(name)",
+        "CREATE INDEX IF NOT EXISTS idx_products_category ON products(category_id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_supplier ON products(supplier_id)",
+    ):
+        conn.execute(statement)
+
+
+def fts5_available(conn):
+    """Проверка поддержки FTS5 в текущей сборке SQLite."""
+    try:
+        return bool(conn.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0])
+    except sqlite3.Error:
+        return False
+
+
+def create_product_search_index(conn):
+    """Создание FTS5-индекса по товарам и триггеров его синхронизации.
+
+    Без FTS5 индекс не создается, и поиск по ключевым словам работает через LIKE.
+    """
+    if not fts5_available(conn):
+        return
+
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+            name, sku, manufacturer, description, category,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO products_fts (rowid, name, sku, manufacturer, description, category)
+        SELECT p.id, p.name, p.sku, p.manufacturer, p.description, c.name
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+    ''')
+
+    # Синхронизация с таблицей товаров
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts (rowid, name, sku, manufacturer, description, category)
+            VALUES (new.id, new.name, new.sku, new.manufacturer, new.description,
+                    (SELECT name FROM categories WHERE id = new.category_id));
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE ON products BEGIN
+            DELETE FROM products_fts WHERE rowid = old.id;
+            INSERT INTO products_fts (rowid, name, sku, manufacturer, description, category)
+            VALUES (new.id, new.name, new.sku, new.manufacturer, new.description,
+                    (SELECT name FROM categories WHERE id = new.category_id));
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+            DELETE FROM products_fts WHERE rowid = old.id;
+        END
+    ''')
+
+    # Синхронизация названий категорий
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS categories_fts_update AFTER UPDATE OF name ON categories BEGIN
+            UPDATE products_fts SET category = new.name
+            WHERE rowid IN (SELECT id FROM products WHERE category_id = new.id);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS categories_fts_delete AFTER DELETE ON categories BEGIN
+            UPDATE products_fts SET category = NULL
+            WHERE rowid IN (SELECT id FROM products WHERE category_id = old.id);
+        END
+    ''')
+
+
+# Товар с остатком ниже минимального (товар без строки остатков считается с нулем)
+LOW_STOCK_SELECT = '''
+    SELECT p.id, COALESCE(i.quantity, 0), p.min_stock, p.min_stock - COALESCE(i.quantity, 0), datetime('now')
+    FROM products p
+    LEFT JOIN inventory i ON i.product_id = p.id
+    WHERE COALESCE(i.quantity, 0) < p.min_stock
+'''
+
+
+def create_low_stock_watchlist(conn):
+    """Создание списка товаров с низким остатком и триггеров его обновления.
+
+    Таблица low_stock содержит только товары ниже минимального остатка, поэтому
+    экран и счетчик читают ее за время, пропорциональное числу таких товаров.
+    Триггеры пересчитывают строку одного товара при изменении его остатка или
+    минимального остатка; since - когда товар попал в список.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS low_stock (
+            product_id INTEGER PRIMARY KEY,
+            quantity INTEGER NOT NULL,
+            min_stock INTEGER NOT NULL,
+            shortfall INTEGER NOT NULL,
+            since TEXT NOT NULL,
+            FOREIGN KEY (product_id) REFERENCES products(id)
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_low_stock_shortfall ON low_stock(shortfall)")
+    conn.execute(f"INSERT OR REPLACE INTO low_stock (product_id, quantity, min_stock, shortfall, since) {LOW_STOCK_SELECT}")
+
+    # Пересчет строки товара: добавление или обновление, если остаток ниже
+    # минимального, иначе удаление из списка
+    refresh = '''
+        INSERT INTO low_stock (product_id, quantity, min_stock, shortfall, since)
+        {select} AND p.id = {product}
+        ON CONFLICT (product_id) DO UPDATE
+        SET quantity = excluded.quantity, min_stock = excluded.min_stock, shortfall = excluded.shortfall;
+        DELETE FROM low_stock
+        WHERE product_id = {product}
+          AND NOT EXISTS (
+              SELECT 1 FROM products p LEFT JOIN inventory i ON i.product_id = p.id
+              WHERE p.id = {product} AND COALESCE(i.quantity, 0) < p.min_stock
+          );
+    '''
+    triggers = [
+        ("low_stock_inventory_insert", "AFTER INSERT ON inventory", "new.product_id"),
+        ("low_stock_inventory_update", "AFTER UPDATE OF quantity ON inventory", "new.product_id"),
+        ("low_stock_inventory_delete", "AFTER DELETE ON inventory", "old.product_id"),
+        ("low_stock_products_insert", "AFTER INSERT ON products", "new.id"),
+        ("low_stock_products_update", "AFTER UPDATE OF min_stock ON products", "new.id"),
+    ]
+    for name, event, product in triggers:
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN
+                {refresh.format(select=LOW_STOCK_SELECT, product=product)}
+            END
+        ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS low_stock_products_delete AFTER DELETE ON products BEGIN
+            DELETE FROM low_stock WHERE product_id = old.id;
+        END
+    ''')
+
+
+# Снимок остатка товара пишется через каждые SNAPSHOT_EVERY записей журнала
+# движения, поэтому остаток на дату восстанавливается не более чем по стольким
+# записям после ближайшего снимка
+SNAPSHOT_EVERY = 100
+
+
+def create_stock_ledger(conn):
+    """Создание снимков остатков для журнала движения (stock_history).
+
+    Снимок - остаток товара после записи журнала history_id с датой date.
+    Журнал упорядочен по (date, id). Начальные снимки берутся из текущих
+    остатков: история до миграции могла быть неполной, и от этой точки
+    остаток сверяется с журналом. Дальше снимки пишет триггер: для товара
+    без снимка - сразу, иначе через каждые SNAPSHOT_EVERY записей.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS stock_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER NOT NULL,
+            history_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            FOREIGN KEY (product_id) REFERENCES products(id)
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_stock_snapshots_product_date "
+                 "ON stock_snapshots(product_id, date, history_id)")
+
+    # Начальные снимки: текущий остаток после последней записи журнала товара
+    conn.execute('''
+        INSERT INTO stock_snapshots (product_id, history_id, date, quantity)
+        SELECT i.product_id, COALESCE(h.id, 0), COALESCE(h.date, datetime('now')), i.quantity
+        FROM inventory i
+        LEFT JOIN stock_history h ON h.id = (
+            SELECT id FROM stock_history WHERE product_id = i.product_id ORDER BY date DESC, id DESC LIMIT 1
+        )
+    ''')
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS stock_snapshots_history_insert AFTER INSERT ON stock_history
+        WHEN new.quantity_after IS NOT NULL AND (
+            NOT EXISTS (SELECT 1 FROM stock_snapshots WHERE product_id = new.product_id)
+            OR (
+                SELECT COUNT(*) FROM stock_history h, (
+                    SELECT date, history_id FROM stock_snapshots WHERE product_id = new.product_id
+                    ORDER BY date DESC, history_id DESC LIMIT 1
+                ) s
+                WHERE h.product_id = new.product_id AND (h.date, h.id) > (s.date, s.history_id)
+            ) >= {SNAPSHOT_EVERY}
+        ) BEGIN
+            INSERT INTO stock_snapshots (product_id, history_id, date, quantity)
+            VALUES (new.product_id, new.id, new.date, new.quantity_after);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS stock_snapshots_products_delete AFTER DELETE ON products BEGIN
+            DELETE FROM stock_snapshots WHERE product_id = old.id;
+        END
+    ''')
+
+
+# Справочники, изменения которых отслеживаются счетчиком версий
+REFERENCE_TABLES = ("categories", "suppliers", "products")
+
+
+def create_reference_versions(conn):
+    """Счетчики изменений справочников для кэша названий (services.reference).
+
+    Триггеры увеличивают версию таблицы при добавлении, удалении записи или
+    изменении названия, поэтому кэш перечитывает только изменившиеся
+    справочники, а изменения остатков его не сбрасывают.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS reference_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.executemany("INSERT OR IGNORE INTO reference_versions (name) VALUES (?)",
+                     [(table,) for table in REFERENCE_TABLES])
+    for table in REFERENCE_TABLES:
+        for suffix, event in (("insert", "INSERT"), ("update", "UPDATE OF name"), ("delete", "DELETE")):
+            create_version_trigger(conn, table, suffix, event)
+
+
+def create_version_trigger(conn, table, suffix, event):
+    """Триггер, увеличивающий версию справочника table при событии event."""
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix} AFTER {event} ON {table} BEGIN
+            UPDATE reference_versions SET version = version + 1 WHERE name = '{table}';
+        END
+    ''')
+
+
+def version_product_codes(conn):
+    """Версия товаров растет и при смене артикула: по нему ищет выбор товара."""
+    conn.execute("DROP TRIGGER IF EXISTS products_version_update")
+    create_version_trigger(conn, "products", "update", "UPDATE OF name, sku")
+
+
+def create_supply_receipts(conn):
+    """Документы приемки поставок: одна поставка может приниматься частями.
+
+    Уже принятое количество позиций переносится в один документ на поставку
+    (датой поставки); поставки, принятые не полностью, получают статус
+    "Частично доставлено".
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS supply_receipts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            supply_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            FOREIGN KEY (supply_id) REFERENCES supplies(id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS supply_receipt_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            receipt_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            FOREIGN KEY (receipt_id) REFERENCES supply_receipts(id),
+            FOREIGN KEY (product_id) REFERENCES products(id)
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_supply_receipts_supply ON supply_receipts(supply_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_supply_receipt_items_receipt ON supply_receipt_items(receipt_id)")
+
+    conn.execute('''
+        INSERT INTO supply_receipts (supply_id, date)
+        SELECT s.id, s.date FROM supplies s
+        WHERE EXISTS (SELECT 1 FROM supply_items WHERE supply_id = s.id AND received > 0)
+        ORDER BY s.id
+    ''')
+    conn.execute('''
+        INSERT INTO supply_receipt_items (receipt_id, product_id, quantity)
+        SELECT r.id, si.product_id, SUM(si.received)
+        FROM supply_receipts r
+        JOIN supply_items si ON si.supply_id = r.supply_id
+        WHERE si.received > 0
+        GROUP BY r.id, si.product_id
+        ORDER BY r.id, MIN(si.id)
+    ''')
+    conn.execute('''
+        UPDATE supplies SET status = 'Частично доставлено'
+        WHERE status NOT IN ('Доставлено', 'Отменено')
+          AND id IN (SELECT supply_id FROM supply_items GROUP BY supply_id HAVING SUM(received) > 0)
+    ''')
+
+
+# Миграции схемы по порядку; номер версии = индекс + 1, хранится в PRAGMA user_version
+MIGRATIONS = [
+    # 1: индексы по внешним ключам и полям поиска
+    create_indexes,
+    # 2: полнотекстовый индекс товаров (если сборка SQLite поддерживает FTS5)
+    create_product_search_index,
+    # 3: версия строки остатков для оптимистичной проверки и остаток до/после в истории
+    [
+        "ALTER TABLE inventory ADD COLUMN version INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE stock_history ADD COLUMN quantity_before INTEGER",
+        "ALTER TABLE stock_history ADD COLUMN quantity_after INTEGER",
+    ],
+    # 4: список товаров с низким остатком, обновляемый триггерами
+    create_low_stock_watchlist,
+    # 5: журнал уведомлений
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            message TEXT NOT NULL,
+            data TEXT,
+            created TEXT NOT NULL
+        )
+        ''',
+    ],
+    # 6: журнал движения по дате для постраничного просмотра (ключ страниц - дата и id)
+    [
+        "CREATE INDEX IF NOT EXISTS idx_stock_history_date ON stock_history(date, id)",
+    ],
+    # 7: снимки остатков для восстановления остатка на дату по журналу движения
+    create_stock_ledger,
+    # 8: индексы для сортировки таблиц остатков и поставок в SQL (названия
+    # категорий и поставщиков уже проиндексированы ограничением UNIQUE)
+    [
+        "CREATE INDEX IF NOT EXISTS idx_products_min_stock ON products(min_stock)",
+        "CREATE INDEX IF NOT EXISTS idx_supplies_date ON supplies(date)",
+        "CREATE INDEX IF NOT EXISTS idx_supplies_status ON supplies(status)",
+    ],
+    # 9: счетчики изменений справочников для кэша названий
+    create_reference_versions,
+    # 10: кэш товаров хранит и артикулы для поиска по началу названия или артикула
+    version_product_codes,
+    # 11: принятое количество по позициям поставки для частичной приемки;
+    # позиции уже доставленных поставок считаются принятыми полностью
+    [
+        "ALTER TABLE supply_items ADD COLUMN received INTEGER NOT NULL DEFAULT 0",
+        "UPDATE supply_items SET received = quantity WHERE supply_id IN (SELECT id FROM supplies WHERE status = 'Доставлено')",
+    ],
+    # 12: документы приемки и статус частичной доставки
+    create_supply_receipts,
+    # 13: признак корректировки в журнале движения (установка остатка, пересчет) -
+    # такие записи не считаются расходом в прогнозе и заказе
+    [
+        "ALTER TABLE stock_history ADD COLUMN correction INTEGER NOT NULL DEFAULT 0",
+    ],
+]
+
+
+def migrate_database(conn):
+    """Применение недостающих миграций к существующей базе.
+
+    Миграция - список SQL-команд или функция, принимающая соединение.
+    Каждая миграция выполняется в отдельной транзакции вместе с обновлением
+    PRAGMA user_version, поэтому прерванное обновление можно просто повторить.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number in range(version + 1, len(MIGRATIONS) + 1):
+        migration = MIGRATIONS[number - 1]
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if callable(migration):
+                migration(conn)
+            else:
+                for statement in migration:
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {number}")
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        conn.commit()
+    return len(MIGRATIONS)
+
+
+def create_tables(conn):
+    """Создание таблиц, если они еще не существуют."""
     cursor = conn.cursor()
 
     # Таблица товаров
@@ -91,8 +516,24 @@ def initialize_database():
     ''')
 
     conn.commit()
+
+
+def upgrade_database(conn):
+    """Приведение базы к актуальной схеме: таблицы и все миграции."""
+    create_tables(conn)
+    return migrate_database(conn)
+
+
+def initialize_database(path=DB_PATH):
+    """Создание и инициализация базы данных для системы управления запасами.
+
+    Сообщения миграций (например, об объединенных дубликатах) выводятся в консоль.
+    """
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    conn = sqlite3.connect(path)
+    version = upgrade_database(conn)
     conn.close()
-    print("База данных успешно инициализирована!")
+    print(f"База данных успешно инициализирована! Версия схемы: {version}")
 
 if __name__ == "__main__":
     initialize_database()
\ No newline at end of file
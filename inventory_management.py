@@ -1,25 +1,116 @@
 from tkinter import *
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import argparse
+import queue
 import sqlite3
+from datetime import datetime, timezone
+
+from database import Database
+from events import bus
+from executor import QueryExecutor
+from export import export_query
+from initialize_db import upgrade_database
+from paged_table import PagedTable
+from product_picker import ProductPicker
+from product_import import import_products
+from remote.client import ApiClient
+from search import has_product_index, product_filter
+from services.notifications import NOTIFICATION_KINDS, NOTIFY_DELAY, NotificationRecorder
+import remote
+import services
+
+# Сколько строк отчета показывать на экране; полный отчет - через экспорт в файл
+PREVIEW_ROWS = 1000
+
+# Период переноса WAL-журнала в файл базы (мс)
+CHECKPOINT_INTERVAL = 5 * 60 * 1000
+
+# Период обновления счетчика товаров с низким остатком в меню (мс)
+LOW_STOCK_INTERVAL = 30 * 1000
+
+# Проверка событий шины и (в режиме клиента) новых уведомлений сервера (мс)
+EVENT_POLL_INTERVAL = 200
+NOTIFICATION_POLL_INTERVAL = 5 * 1000
+
+# Сколько показывается всплывающее уведомление (мс) и сколько строк в нем
+TOAST_DURATION = 6 * 1000
+TOAST_LINES = 5
 
 
 class InventoryManagementApp:
-    def __init__(self, root):
+    def __init__(self, root, db=None, server_url=None):
         self.root = root
+
+        # Режим клиента: данные через HTTP API сервера (server.py), а не из файла базы
+        self.client_mode = server_url is not None
+        if self.client_mode:
+            self.db = ApiClient(server_url)
+            self.services = remote
+            self.product_search = True
+        else:
+            self.db = db if db is not None else Database()
+            self.services = services
+
+            # Обновление схемы существующей базы (индексы и прочие миграции). Без
+            # недостающих таблиц экраны не работают, поэтому при ошибке - выход
+            try:
+                upgrade_database(self.db.connect())
+            except sqlite3.Error as e:
+                messagebox.showerror("Ошибка", f"Ошибка обновления базы данных: {e}\n\nПрограмма будет закрыта.")
+                self.db.close()
+                self.root.destroy()
+                raise SystemExit(1)
+
+            # Полнотекстовый поиск товаров доступен, только если сборка SQLite поддерживает FTS5
+            self.product_search = has_product_index(self.db)
         self.root.title("Система управления запасами")
         self.root.geometry("1000x600")
 
         # Главное меню
-        menu = Menu(self.root)
-        self.root.config(menu=menu)
+        self.menu = Menu(self.root)
+        self.root.config(menu=self.menu)
 
         # Добавление пунктов меню
-        menu.add_command(label="Товары", command=self.show_products)
-        menu.add_command(label="Категории", command=self.show_categories)
-        menu.add_command(label="Остатки", command=self.show_inventory)
-        menu.add_command(label="Поставки", command=self.show_supplies)
-        menu.add_command(label="Отчеты", command=self.show_reports)
-        
+        self.menu.add_command(label="Товары", command=self.show_products)
+        self.menu.add_command(label="Категории", command=self.show_categories)
+        self.menu.add_command(label="Остатки", command=self.show_inventory)
+        self.menu.add_command(label="Низкий остаток", command=self.show_low_stock)
+        self.low_stock_menu_index = self.menu.index(END)
+        self.menu.add_command(label="Прогноз", command=self.show_forecast)
+        self.menu.add_command(label="Поставки", command=self.show_supplies)
+        self.menu.add_command(label="Отчеты", command=self.show_reports)
+        self.menu.add_command(label="Уведомления", command=self.show_notifications)
+
+
+        # Строка состояния со счетчиком соединений с базой и индикатором загрузки
+        status_frame = Frame(self.root)
+        status_frame.pack(side=BOTTOM, fill=X)
+        self.status_label = Label(status_frame, anchor="w")
+        self.status_label.pack(side=LEFT, fill=X, expand=True)
+        self.busy_bar = ttk.Progressbar(status_frame, mode="indeterminate", length=120)
+        self.update_status()
+
+        # Фоновое выполнение запросов, чтобы окно не зависало на долгих выборках
+        self.executor = QueryExecutor(self.root, on_busy=self.set_busy)
+        if not self.client_mode:
+            self.root.after(CHECKPOINT_INTERVAL, self.checkpoint)
+        self.refresh_low_stock_badge()
+
+        # Уведомления: события своих операций приходят через шину и записываются
+        # в журнал; в режиме клиента журнал ведет сервер, и новые записи
+        # периодически запрашиваются у него
+        self.toast = None
+        self.pending_events = []
+        self.notify_job = None
+        if self.client_mode:
+            self.recorder = None
+            self.last_notification_id = None
+            self.poll_notifications()
+        else:
+            self.recorder = NotificationRecorder(self.db)
+            self.event_queue = queue.Queue()
+            bus.subscribe(self.queue_event, *NOTIFICATION_KINDS)
+            self.process_events()
 
         # Основное содержимое
         self.main_frame = Frame(self.root)
@@ -28,6 +119,123 @@ class InventoryManagementApp:
         # Вкладка по умолчанию
         self.show_products()
 
+    def update_status(self):
+        """Обновление строки состояния (соединений с базой или сервером за сеанс)."""
+        target = f"сервером {self.db.base_url}" if self.client_mode else "БД"
+        self.status_label.config(text=f"Соединений с {target} за сеанс: {self.db.connections_opened}")
+        self.root.after(1000, self.update_status)
+
+    def set_busy(self, busy):
+        """Показ индикатора загрузки, пока выполняются фоновые запросы."""
+        if busy:
+            self.busy_bar.pack(side=RIGHT, padx=5)
+            self.busy_bar.start(10)
+        else:
+            self.busy_bar.stop()
+            self.busy_bar.pack_forget()
+
+    def checkpoint(self):
+        """Периодический перенос WAL-журнала в файл базы (в фоновом потоке).
+
+        Ошибки не показываются: занятая база просто откладывает перенос до
+        следующего раза.
+        """
+        self.executor.submit("checkpoint", self.db.checkpoint, on_error=lambda error: None)
+        self.root.after(CHECKPOINT_INTERVAL, self.checkpoint)
+
+    def refresh_low_stock_badge(self):
+        """Периодическое обновление счетчика товаров с низким остатком в меню."""
+        self.load_low_stock_count()
+        self.root.after(LOW_STOCK_INTERVAL, self.refresh_low_stock_badge)
+
+    def load_low_stock_count(self):
+        """Загрузка числа товаров с низким остатком (в фоновом потоке)."""
+        self.executor.submit("low_stock_count", self.services.inventory.low_stock_count, self.db,
+                             on_done=self.update_low_stock_badge, on_error=lambda error: None)
+
+    def update_low_stock_badge(self, count):
+        """Вывод числа товаров с низким остатком в пункте меню."""
+        label = f"Низкий остаток ({count})" if count else "Низкий остаток"
+        self.menu.entryconfig(self.low_stock_menu_index, label=label)
+
+    def queue_event(self, kind, data):
+        """Подписчик шины: событие передается в поток Tk (публиковать могут фоновые потоки)."""
+        self.event_queue.put((kind, data))
+
+    def process_events(self):
+        """Прием событий шины; события за NOTIFY_DELAY сворачиваются в одно уведомление."""
+        while True:
+            try:
+                self.pending_events.append(self.event_queue.get_nowait())
+            except queue.Empty:
+                break
+        if self.pending_events and self.notify_job is None:
+            self.notify_job = self.root.after(int(NOTIFY_DELAY * 1000), self.flush_events)
+        self.root.after(EVENT_POLL_INTERVAL, self.process_events)
+
+    def flush_events(self):
+        """Показ сводки накопленных событий."""
+        self.notify_job = None
+        events, self.pending_events = self.pending_events, []
+        messages = [message for kind, message, items in self.services.notifications.summarize(events)]
+        if messages:
+            self.show_toast(messages)
+            self.load_low_stock_count()
+
+    def poll_notifications(self):
+        """Запрос новых уведомлений у сервера (режим клиента, в фоновом потоке).
+
+        Первый запрос только запоминает последнее уведомление, чтобы при
+        запуске не показывать накопленный журнал.
+        """
+        if self.last_notification_id is None:
+            self.executor.submit("notifications", self.services.notifications.last_notification_id, self.db,
+                                 on_done=self.set_last_notification_id, on_error=lambda error: None)
+        else:
+            self.executor.submit("notifications", self.services.notifications.new_notifications, self.db,
+                                 self.last_notification_id,
+                                 on_done=self.show_new_notifications, on_error=lambda error: None)
+        self.root.after(NOTIFICATION_POLL_INTERVAL, self.poll_notifications)
+
+    def set_last_notification_id(self, notification_id):
+        """Запоминание последнего уведомления сервера."""
+        self.last_notification_id = notification_id
+
+    def show_new_notifications(self, rows):
+        """Показ уведомлений, полученных от сервера."""
+        if not rows:
+            return
+        self.last_notification_id = rows[-1][0]
+        self.show_toast([row[2] for row in rows])
+        self.load_low_stock_count()
+
+    def show_toast(self, messages):
+        """Всплывающее уведомление в правом нижнем углу окна; новое заменяет предыдущее."""
+        if self.toast is not None and self.toast.winfo_exists():
+            self.toast.destroy()
+        lines = messages[:TOAST_LINES]
+        if len(messages) > TOAST_LINES:
+            lines.append(f"... и еще уведомлений: {len(messages) - TOAST_LINES}")
+
+        self.toast = Toplevel(self.root)
+        self.toast.overrideredirect(True)
+        self.toast.attributes("-topmost", True)
+        frame = Frame(self.toast, bg="#fff8dc", bd=1, relief=SOLID)
+        frame.pack(fill=BOTH, expand=True)
+        for line in lines:
+            Label(frame, text=line, bg="#fff8dc", anchor="w", justify=LEFT, wraplength=360).pack(fill=X, padx=10, pady=2)
+        Button(frame, text="Все уведомления", command=self.show_notifications).pack(pady=5)
+
+        self.toast.update_idletasks()
+        x = self.root.winfo_rootx() + self.root.winfo_width() - self.toast.winfo_reqwidth() - 20
+        y = self.root.winfo_rooty() + self.root.winfo_height() - self.toast.winfo_reqheight() - 40
+        self.toast.geometry(f"+{x}+{y}")
+        self.toast.after(TOAST_DURATION, self.toast.destroy)
+
+    def show_db_error(self, error):
+        """Сообщение об ошибке фонового запроса."""
+        messagebox.showerror("Ошибка", f"Ошибка базы данных: {error}")
+
     def clear_main_frame(self):
         """Очистка основного содержимого окна."""
         for widget in self.main_frame.winfo_children():
@@ -59,102 +267,54 @@ class InventoryManagementApp:
         Button(button_frame, text="Добавить товар", command=self.add_product).pack(side=LEFT, padx=5)
         Button(button_frame, text="Редактировать товар", command=self.edit_product).pack(side=LEFT, padx=5)
         Button(button_frame, text="Удалить товар", command=self.delete_product).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Импорт из CSV", command=self.import_products_csv).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Экспорт", command=self.export_products).pack(side=LEFT, padx=5)
 
-        # Таблица товаров
-        self.product_tree = ttk.Treeview(
+        # Таблица товаров (страницы подгружаются при прокрутке)
+        self.product_table = PagedTable(
             self.main_frame,
-            columns=("ID", "Название", "Категория", "Артикул", "Производитель", "Остаток", "Закупочная цена", "Розничная цена"),
-            show="headings",
-            height=15
+            self.db,
+            columns=self.services.products.PRODUCT_COLUMNS,
+            select=self.services.products.PRODUCT_SELECT,
+            from_clause=self.services.products.PRODUCT_FROM,
+            key="p.id",
+            sort_columns=self.services.products.PRODUCT_SORT_COLUMNS,
+            row_tags=self.product_row_tags,
+            executor=self.executor,
         )
-        for col in self.product_tree["columns"]:
-            self.product_tree.heading(col, text=col, command=lambda c=col: self.sort_products(c))
-            self.product_tree.column(col, anchor="center", width=120)
-        self.product_tree.pack(fill=BOTH, expand=True)
+        self.product_tree = self.product_table.tree
+        self.product_tree.tag_configure("highlight", background="yellow")
+        self.product_table.pack(fill=BOTH, expand=True)
 
         # Загрузка данных
         self.load_products()
 
+    def product_row_tags(self, row):
+        """Подсветка товаров, найденных по фильтру названия."""
+        name_filter = self.filter_name.get().strip().lower()
+        return ("highlight",) if name_filter and name_filter in row[1].lower() else ()
+
     def load_products(self):
         """Загрузка списка товаров из базы данных с учетом фильтров и подсветкой найденных."""
-        try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-
-            # Очистка таблицы
-            for row in self.product_tree.get_children():
-                self.product_tree.delete(row)
-
-            # Подготовка фильтров
-            name_filter = self.filter_name.get().strip()
-            category_filter = self.filter_category.get().strip()
-            keywords_filter = self.filter_keywords.get().strip()
-            query = '''
-                SELECT p.id, p.name, c.name AS category, p.sku, p.manufacturer, i.quantity, 
-                       p.purchase_price, p.retail_price
-                FROM products p
-                LEFT JOIN categories c ON p.category_id = c.id
-                LEFT JOIN inventory i ON p.id = i.product_id
-                WHERE 1=1
-            '''
-            params = []
-            if name_filter:
-                query += " AND p.name LIKE ?"
-                params.append(f"%{name_filter}%")
-            if category_filter:
-                query += " AND c.name LIKE ?"
-                params.append(f"%{category_filter}%")
-            if keywords_filter:
-                query += " AND (p.name LIKE ? OR p.sku LIKE ? OR c.name LIKE ? OR p.manufacturer LIKE ?)"
-                params.extend([f"%{keywords_filter}%"] * 4)
-
-            # Выполнение запроса
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-
-            # Загрузка данных и подсветка
-            for row in rows:
-                tags = ("highlight",) if name_filter.lower() in row[1].lower() else ()
-                self.product_tree.insert("", "end", values=row, tags=tags)
-
-            # Настройка подсветки
-            self.product_tree.tag_configure("highlight", background="yellow")
-            
-            conn.close()
-        except sqlite3.Error as e:
-            messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+        name_filter = self.filter_name.get().strip()
+        category_filter = self.filter_category.get().strip()
+        keywords_filter = self.filter_keywords.get().strip()
+
+        # В режиме клиента страницы с теми же фильтрами отдает сервер
+        if self.client_mode:
+            self.product_table.load_source(
+                lambda sort_column, descending, last_key, limit: self.services.products.list_products(
+                    self.db, name_filter, category_filter, keywords_filter,
+                    sort_column, descending, last_key, limit,
+                )
+            )
+            return
 
-    def sort_products(self, column):
-        """Сортировка таблицы товаров по указанной колонке с визуальной индикацией."""
-        # Проверка текущего порядка сортировки
-        order = self.product_tree.heading(column, 'text')
-        if "↑" in order:
-            reverse = True
-            new_order = order.replace("↑", "↓")
-        elif "↓" in order:
-            reverse = False
-            new_order = order.replace("↓", "↑")
-        else:
-            reverse = False
-            new_order = f"{order} ↑"
-        
-        # Сброс стрелок для всех колонок
-        for col in self.product_tree["columns"]:
-            col_text = self.product_tree.heading(col, 'text').replace("↑", "").replace("↓", "")
-            self.product_tree.heading(col, text=col_text)
-        
-        # Установка стрелки для текущей колонки
-        self.product_tree.heading(column, text=new_order)
+        # Подготовка фильтров
+        filters = product_filter(name_filter, category_filter, keywords_filter, self.product_search)
 
-        # Сортировка данных
-        data = [(self.product_tree.set(k, column), k) for k in self.product_tree.get_children("")]
-        try:
-            data.sort(key=lambda t: float(t[0]) if t[0].replace('.', '', 1).isdigit() else t[0], reverse=reverse)
-        except ValueError:
-            data.sort(reverse=reverse)
-        
-        for index, (val, k) in enumerate(data):
-            self.product_tree.move(k, "", index)
+        # Первая страница; остальные подгружаются при прокрутке
+        self.product_table.load(*filters)
 
     def add_product(self):
         """Окно добавления нового товара."""
@@ -169,39 +329,17 @@ class InventoryManagementApp:
             min_stock = min_stock_entry.get().strip()
             supplier = supplier_var.get()
 
-            if not all([name, category, sku, manufacturer, purchase_price, retail_price, min_stock, supplier]):
-                messagebox.showerror("Ошибка", "Все поля обязательны для заполнения.")
-                return
-
             try:
-                conn = sqlite3.connect("inventory_system.db")
-                cursor = conn.cursor()
-
-                # Получение ID категории
-                cursor.execute("SELECT id FROM categories WHERE name = ?", (category,))
-                category_id = cursor.fetchone()
-                if category_id is None:
-                    messagebox.showerror("Ошибка", "Указанная категория не существует.")
-                    return
-
-                # Получение ID поставщика
-                cursor.execute("SELECT id FROM suppliers WHERE name = ?", (supplier,))
-                supplier_id = cursor.fetchone()
-                if supplier_id is None:
-                    messagebox.showerror("Ошибка", "Указанный поставщик не существует.")
-                    return
-
-                # Вставка данных
-                cursor.execute('''
-                    INSERT INTO products (name, description, category_id, sku, manufacturer, purchase_price, retail_price, min_stock, supplier_id)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (name, description, category_id[0], sku, manufacturer, float(purchase_price), float(retail_price), int(min_stock), supplier_id[0]))
-                conn.commit()
-                conn.close()
+                self.services.products.add_product(
+                    self.db, name, description, category, sku, manufacturer,
+                    purchase_price, retail_price, min_stock, supplier,
+                )
 
                 messagebox.showinfo("Успех", "Товар успешно добавлен.")
                 self.load_products()
                 add_window.destroy()
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e))
             except sqlite3.Error as e:
                 messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
@@ -249,16 +387,8 @@ class InventoryManagementApp:
 
         # Загрузка категорий и поставщиков
         try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM categories")
-            categories = [row[0] for row in cursor.fetchall()]
-            category_dropdown["values"] = categories
-
-            cursor.execute("SELECT name FROM suppliers")
-            suppliers = [row[0] for row in cursor.fetchall()]
-            supplier_dropdown["values"] = suppliers
-            conn.close()
+            category_dropdown["values"] = self.services.categories.category_names(self.db)
+            supplier_dropdown["values"] = self.services.suppliers.supplier_names(self.db)
         except sqlite3.Error as e:
             messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
@@ -286,42 +416,17 @@ class InventoryManagementApp:
             min_stock = min_stock_entry.get().strip()
             supplier = supplier_var.get()
 
-            if not all([name, category, sku, manufacturer, purchase_price, retail_price, min_stock, supplier]):
-                messagebox.showerror("Ошибка", "Все поля обязательны для заполнения.")
-                return
-
             try:
-                conn = sqlite3.connect("inventory_system.db")
-                cursor = conn.cursor()
-
-                # Получение ID категории
-                cursor.execute("SELECT id FROM categories WHERE name = ?", (category,))
-                category_id = cursor.fetchone()
-                if category_id is None:
-                    messagebox.showerror("Ошибка", "Указанная категория не существует.")
-                    return
-
-                # Получение ID поставщика
-                cursor.execute("SELECT id FROM suppliers WHERE name = ?", (supplier,))
-                supplier_id = cursor.fetchone()
-                if supplier_id is None:
-                    messagebox.showerror("Ошибка", "Указанный поставщик не существует.")
-                    return
-
-                # Обновление данных
-                cursor.execute('''
-                    UPDATE products
-                    SET name = ?, description = ?, category_id = ?, sku = ?, manufacturer = ?, 
-                        purchase_price = ?, retail_price = ?, min_stock = ?, supplier_id = ?
-                    WHERE id = ?
-                ''', (name, description, category_id[0], sku, manufacturer, float(purchase_price), 
-                      float(retail_price), int(min_stock), supplier_id[0], product_id))
-                conn.commit()
-                conn.close()
+                self.services.products.update_product(
+                    self.db, product_id, name, description, category, sku, manufacturer,
+                    purchase_price, retail_price, min_stock, supplier,
+                )
 
                 messagebox.showinfo("Успех", "Товар успешно обновлен.")
                 self.load_products()
                 edit_window.destroy()
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e))
             except sqlite3.Error as e:
                 messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
@@ -378,16 +483,8 @@ class InventoryManagementApp:
 
         # Загрузка категорий и поставщиков
         try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM categories")
-            categories = [row[0] for row in cursor.fetchall()]
-            category_dropdown["values"] = categories
-
-            cursor.execute("SELECT name FROM suppliers")
-            suppliers = [row[0] for row in cursor.fetchall()]
-            supplier_dropdown["values"] = suppliers
-            conn.close()
+            category_dropdown["values"] = self.services.categories.category_names(self.db)
+            supplier_dropdown["values"] = self.services.suppliers.supplier_names(self.db)
         except sqlite3.Error as e:
             messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
@@ -409,19 +506,48 @@ class InventoryManagementApp:
             return
 
         try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-
-            # Удаление товара
-            cursor.execute("DELETE FROM products WHERE id = ?", (product_id,))
-            conn.commit()
-            conn.close()
+            self.services.products.delete_product(self.db, product_id)
 
             messagebox.showinfo("Успех", "Товар успешно удален.")
             self.load_products()
         except sqlite3.Error as e:
             messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
+    def export_products(self):
+        """Выгрузка товаров с текущими фильтрами и сортировкой."""
+        if self.client_mode:
+            self.show_client_mode_note()
+            return
+        query, params = self.product_table.export_query()
+        self.export_to_file(query, params, self.product_tree["columns"])
+
+    def import_products_csv(self):
+        """Импорт каталога товаров из CSV-файла (в фоновом потоке)."""
+        path = filedialog.askopenfilename(
+            title="Импорт товаров",
+            filetypes=[("CSV", "*.csv"), ("Все файлы", "*.*")],
+        )
+        if not path:
+            return
+
+        def show_result(result):
+            messagebox.showinfo("Импорт завершен", result.summary())
+            if self.product_tree.winfo_exists():
+                self.load_products()
+
+        def show_error(error):
+            if isinstance(error, (OSError, UnicodeDecodeError)):
+                messagebox.showerror("Ошибка", f"Не удалось прочитать файл: {error}")
+            else:
+                self.show_db_error(error)
+
+        self.executor.submit("import", self.import_function(), self.db, path,
+                             on_done=show_result, on_error=show_error)
+
+    def import_function(self):
+        """Импорт в базу напрямую или через сервер в режиме клиента."""
+        return self.services.products.import_products if self.client_mode else import_products
+
     def filter_by_selected_category(self):
         """Фильтровать товары по выбранной категории."""
         selected_item = self.category_tree.selection()
@@ -452,47 +578,43 @@ class InventoryManagementApp:
         Button(button_frame, text="Редактировать категорию", command=self.edit_category).pack(side=LEFT, padx=5)
         Button(button_frame, text="Удалить категорию", command=self.delete_category).pack(side=LEFT, padx=5)
         Button(button_frame, text="Фильтровать товары", command=self.filter_by_selected_category).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Экспорт", command=self.export_categories).pack(side=LEFT, padx=5)
 
-        # Таблица категорий
-        self.category_tree = ttk.Treeview(
+        # Таблица категорий (сортировка по заголовкам выполняется в базе)
+        self.category_table = PagedTable(
             self.main_frame,
-            columns=("ID", "Название", "Описание"),
-            show="headings",
-            height=15
+            self.db,
+            columns=self.services.categories.CATEGORY_COLUMNS,
+            select=self.services.categories.CATEGORY_SELECT,
+            from_clause=self.services.categories.CATEGORY_FROM,
+            key="id",
+            sort_columns=self.services.categories.CATEGORY_SORT_COLUMNS,
+            width=200,
+            executor=self.executor,
         )
-        for col in self.category_tree["columns"]:
-            self.category_tree.heading(col, text=col, command=lambda c=col: self.sort_categories(c))
-            self.category_tree.column(col, anchor="center", width=200)
-        self.category_tree.pack(fill=BOTH, expand=True)
+        self.category_tree = self.category_table.tree
+        self.category_table.pack(fill=BOTH, expand=True)
 
         # Загрузка данных
         self.load_categories()
 
     def load_categories(self):
-        """Загрузка списка категорий из базы данных."""
-        try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-
-            # Очистка таблицы
-            for row in self.category_tree.get_children():
-                self.category_tree.delete(row)
-
-            # Загрузка данных
-            cursor.execute("SELECT id, name, description FROM categories")
-            for row in cursor.fetchall():
-                self.category_tree.insert("", "end", values=row)
-
-            conn.close()
-        except sqlite3.Error as e:
-            messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+        """Загрузка списка категорий (сортировка и страницы - в SQL)."""
+        if self.client_mode:
+            self.category_table.load_source(
+                lambda sort_column, descending, last_key, limit: self.services.categories.list_category_page(
+                    self.db, sort_column, descending, last_key, limit)
+            )
+            return
+        self.category_table.load()
 
-    def sort_categories(self, column):
-        """Сортировка таблицы категорий по указанной колонке."""
-        data = [(self.category_tree.set(k, column), k) for k in self.category_tree.get_children("")]
-        data.sort(key=lambda t: t[0])
-        for index, (val, k) in enumerate(data):
-            self.category_tree.move(k, "", index)
+    def export_categories(self):
+        """Выгрузка категорий в текущей сортировке."""
+        if self.client_mode:
+            self.show_client_mode_note()
+            return
+        query, params = self.category_table.export_query()
+        self.export_to_file(query, params, self.category_tree["columns"])
 
     def add_category(self):
         """Окно добавления новой категории."""
@@ -500,25 +622,14 @@ class InventoryManagementApp:
             name = name_entry.get().strip()
             description = description_entry.get().strip()
 
-            if not name:
-                messagebox.showerror("Ошибка", "Название категории обязательно для заполнения.")
-                return
-
             try:
-                conn = sqlite3.connect("inventory_system.db")
-                cursor = conn.cursor()
-
-                # Вставка данных
-                cursor.execute('''
-                    INSERT INTO categories (name, description)
-                    VALUES (?, ?)
-                ''', (name, description))
-                conn.commit()
-                conn.close()
+                self.services.categories.add_category(self.db, name, description)
 
                 messagebox.showinfo("Успех", "Категория успешно добавлена.")
                 self.load_categories()
                 add_window.destroy()
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e))
             except sqlite3.Error as e:
                 messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
@@ -550,26 +661,14 @@ class InventoryManagementApp:
             name = name_entry.get().strip()
             description = description_entry.get().strip()
 
-            if not name:
-                messagebox.showerror("Ошибка", "Название категории обязательно для заполнения.")
-                return
-
             try:
-                conn = sqlite3.connect("inventory_system.db")
-                cursor = conn.cursor()
-
-                # Обновление данных
-                cursor.execute('''
-                    UPDATE categories
-                    SET name = ?, description = ?
-                    WHERE id = ?
-                ''', (name, description, category_id))
-                conn.commit()
-                conn.close()
+                self.services.categories.update_category(self.db, category_id, name, description)
 
                 messagebox.showinfo("Успех", "Категория успешно обновлена.")
                 self.load_categories()
                 edit_window.destroy()
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e))
             except sqlite3.Error as e:
                 messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
@@ -600,30 +699,24 @@ class InventoryManagementApp:
         category_id = item["values"][0]
 
         try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-
             # Проверка связанных товаров
-            cursor.execute("SELECT COUNT(*) FROM products WHERE category_id = ?", (category_id,))
-            product_count = cursor.fetchone()[0]
+            product_count = self.services.categories.product_count(self.db, category_id)
             if product_count > 0:
                 messagebox.showerror("Ошибка", f"Категория содержит {product_count} связанных товаров. Удаление невозможно.")
-                conn.close()
                 return
 
-            # Подтверждение удаления
+            # Подтверждение удаления (вне транзакции, чтобы не держать блокировку во время диалога)
             confirm = messagebox.askyesno("Подтверждение", f"Вы уверены, что хотите удалить категорию '{item['values'][1]}'?")
             if not confirm:
-                conn.close()
                 return
 
-            # Удаление категории
-            cursor.execute("DELETE FROM categories WHERE id = ?", (category_id,))
-            conn.commit()
-            conn.close()
+            # Удаление категории (повторная проверка товаров - в той же транзакции)
+            self.services.categories.delete_category(self.db, category_id)
 
             messagebox.showinfo("Успех", "Категория успешно удалена.")
             self.load_categories()
+        except ValueError as e:
+            messagebox.showerror("Ошибка", str(e))
         except sqlite3.Error as e:
             messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
@@ -637,52 +730,50 @@ class InventoryManagementApp:
         button_frame = Frame(self.main_frame)
         button_frame.pack(pady=10)
         Button(button_frame, text="Корректировать остаток", command=self.adjust_stock).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Сканирование", command=self.open_scan_window).pack(side=LEFT, padx=5)
         Button(button_frame, text="Просмотреть историю", command=self.view_stock_history).pack(side=LEFT, padx=5)
+        Button(button_frame, text="История товара", command=self.view_product_history).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Остатки на дату", command=self.view_stock_at).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Сверка с журналом", command=self.check_ledger).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Экспорт", command=self.export_inventory).pack(side=LEFT, padx=5)
 
-        # Таблица остатков
-        self.inventory_tree = ttk.Treeview(
+        # Таблица остатков (сортировка по заголовкам выполняется в базе, версия строки скрыта)
+        self.inventory_table = PagedTable(
             self.main_frame,
-            columns=("ID", "Название", "Артикул", "Остаток", "Минимальный остаток"),
-            show="headings",
-            height=15
+            self.db,
+            columns=self.services.inventory.INVENTORY_COLUMNS,
+            select=self.services.inventory.INVENTORY_SELECT,
+            from_clause=self.services.inventory.INVENTORY_FROM,
+            key="p.id",
+            sort_columns=self.services.inventory.INVENTORY_SORT_COLUMNS,
+            width=150,
+            executor=self.executor,
+            displaycolumns=self.services.inventory.INVENTORY_COLUMNS[:-1],
         )
-        for col in self.inventory_tree["columns"]:
-            self.inventory_tree.heading(col, text=col, command=lambda c=col: self.sort_inventory(c))
-            self.inventory_tree.column(col, anchor="center", width=150)
-        self.inventory_tree.pack(fill=BOTH, expand=True)
+        self.inventory_tree = self.inventory_table.tree
+        self.inventory_tree.bind("<Double-1>", self.view_product_history)
+        self.inventory_table.pack(fill=BOTH, expand=True)
 
         # Загрузка данных
         self.load_inventory()
 
     def load_inventory(self):
-        """Загрузка текущих остатков из базы данных."""
-        try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-
-            # Очистка таблицы
-            for row in self.inventory_tree.get_children():
-                self.inventory_tree.delete(row)
-
-            # Загрузка данных
-            cursor.execute('''
-                SELECT p.id, p.name, p.sku, i.quantity, p.min_stock
-                FROM products p
-                LEFT JOIN inventory i ON p.id = i.product_id
-            ''')
-            for row in cursor.fetchall():
-                self.inventory_tree.insert("", "end", values=row)
-
-            conn.close()
-        except sqlite3.Error as e:
-            messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+        """Загрузка текущих остатков (сортировка и страницы - в SQL, в фоновом потоке)."""
+        if self.client_mode:
+            self.inventory_table.load_source(
+                lambda sort_column, descending, last_key, limit: self.services.inventory.list_inventory_page(
+                    self.db, sort_column, descending, last_key, limit)
+            )
+            return
+        self.inventory_table.load()
 
-    def sort_inventory(self, column):
-        """Сортировка таблицы остатков по указанной колонке."""
-        data = [(self.inventory_tree.set(k, column), k) for k in self.inventory_tree.get_children("")]
-        data.sort(key=lambda t: t[0])
-        for index, (val, k) in enumerate(data):
-            self.inventory_tree.move(k, "", index)
+    def export_inventory(self):
+        """Выгрузка остатков в текущей сортировке."""
+        if self.client_mode:
+            self.show_client_mode_note()
+            return
+        query, params = self.inventory_table.export_query()
+        self.export_to_file(query, params, self.inventory_tree["columns"])
 
     def adjust_stock(self):
         """Окно корректировки остатка."""
@@ -695,43 +786,25 @@ class InventoryManagementApp:
         item = self.inventory_tree.item(selected_item)
         product_id = item["values"][0]
         current_quantity = item["values"][3]
+        # Версия строки остатков (скрытая колонка): если остаток успел измениться
+        # в другом сеансе, корректировка будет отклонена
+        version = str(item["values"][5])
+        expected_version = int(version) if version.isdigit() else None
 
         def save_stock_adjustment():
             new_quantity = new_quantity_entry.get().strip()
             change_reason = reason_entry.get().strip()
 
-            if not new_quantity or not change_reason:
-                messagebox.showerror("Ошибка", "Все поля обязательны для заполнения.")
-                return
-
-            try:
-                new_quantity = int(new_quantity)
-            except ValueError:
-                messagebox.showerror("Ошибка", "Введите корректное количество.")
-                return
-
             try:
-                conn = sqlite3.connect("inventory_system.db")
-                cursor = conn.cursor()
-
-                # Обновление остатков
-                cursor.execute('''
-                    UPDATE inventory
-                    SET quantity = ?, last_updated = datetime('now')
-                    WHERE product_id = ?
-                ''', (new_quantity, product_id))
-
-                # Запись в историю изменений
-                cursor.execute('''
-                    INSERT INTO stock_history (product_id, change_reason, quantity_change, date)
-                    VALUES (?, ?, ?, datetime('now'))
-                ''', (product_id, change_reason, new_quantity - current_quantity))
-                conn.commit()
-                conn.close()
+                self.services.inventory.adjust_stock(self.db, product_id, new_quantity, change_reason,
+                                                     expected_version)
 
                 messagebox.showinfo("Успех", "Остаток успешно обновлен.")
                 self.load_inventory()
+                self.load_low_stock_count()
                 adjust_window.destroy()
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e))
             except sqlite3.Error as e:
                 messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
@@ -754,277 +827,407 @@ class InventoryManagementApp:
 
         Button(adjust_window, text="Сохранить", command=save_stock_adjustment).grid(row=4, column=0, columnspan=2, pady=10)
 
-    def view_stock_history(self):
-        """Окно просмотра истории изменений остатков."""
+    def view_stock_history(self, product_id=None, product_name=""):
+        """Окно журнала движения с фильтрами и подгрузкой страниц при прокрутке.
+
+        product_id открывает историю одного товара (из экрана остатков).
+        """
         def load_history():
-            """Загрузка истории изменений."""
-            try:
-                conn = sqlite3.connect("inventory_system.db")
-                cursor = conn.cursor()
+            """Перезагрузка журнала с текущими фильтрами."""
+            filters = (product_id, product_entry.get().strip(), date_from_entry.get().strip(),
+                       date_to_entry.get().strip(), reason_entry.get().strip())
+
+            # В режиме клиента страницы с теми же фильтрами отдает сервер
+            if self.client_mode:
+                history_table.load_source(
+                    lambda sort_column, descending, last_key, limit: self.services.inventory.list_stock_history(
+                        self.db, *filters, last_key, limit)
+                )
+                return
+            where, params = self.services.inventory.history_filter(*filters)
+            history_table.load(where, params, default_sort="sh.date")
 
-                # Очистка таблицы
-                for row in history_tree.get_children():
-                    history_tree.delete(row)
-
-                # Загрузка данных
-                cursor.execute('''
-                    SELECT sh.date, p.name, sh.quantity_change, sh.change_reason
-                    FROM stock_history sh
-                    JOIN products p ON sh.product_id = p.id
-                    ORDER BY sh.date DESC
-                ''')
-                for row in cursor.fetchall():
-                    history_tree.insert("", "end", values=row)
-
-                conn.close()
-            except sqlite3.Error as e:
-                messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+        def export_history():
+            """Выгрузка журнала с текущими фильтрами."""
+            query, params = history_table.export_query()
+            self.export_to_file(query, params, self.services.inventory.STOCK_MOVEMENT_COLUMNS)
 
         # Создание окна
         history_window = Toplevel(self.root)
-        history_window.title("История изменений остатков")
-
-        # Таблица истории
-        history_tree = ttk.Treeview(
+        title = f"История изменений остатков: {product_name}" if product_id is not None else "История изменений остатков"
+        history_window.title(title)
+
+        # Фильтры (товар при просмотре истории одного товара задан заранее)
+        filter_frame = Frame(history_window)
+        filter_frame.pack(pady=5, fill=X)
+        Label(filter_frame, text="Товар:").pack(side=LEFT, padx=5)
+        product_entry = Entry(filter_frame, width=20)
+        product_entry.pack(side=LEFT, padx=5)
+        if product_id is not None:
+            product_entry.insert(0, product_name)
+            product_entry.config(state="disabled")
+        Label(filter_frame, text="С (YYYY-MM-DD):").pack(side=LEFT, padx=5)
+        date_from_entry = Entry(filter_frame, width=12)
+        date_from_entry.pack(side=LEFT, padx=5)
+        Label(filter_frame, text="по:").pack(side=LEFT, padx=5)
+        date_to_entry = Entry(filter_frame, width=12)
+        date_to_entry.pack(side=LEFT, padx=5)
+        Label(filter_frame, text="Причина:").pack(side=LEFT, padx=5)
+        reason_entry = Entry(filter_frame, width=15)
+        reason_entry.pack(side=LEFT, padx=5)
+        Button(filter_frame, text="Применить фильтр", command=load_history).pack(side=LEFT, padx=5)
+        Button(filter_frame, text="Экспорт",
+               command=self.show_client_mode_note if self.client_mode else export_history).pack(side=LEFT, padx=5)
+
+        # Таблица журнала (новые записи первыми, страницы подгружаются при прокрутке)
+        history_table = PagedTable(
             history_window,
-            columns=("Дата", "Название", "Изменение", "Причина"),
-            show="headings",
-            height=15
+            self.db,
+            columns=self.services.inventory.STOCK_MOVEMENT_COLUMNS,
+            select=self.services.inventory.HISTORY_SELECT,
+            from_clause=self.services.inventory.HISTORY_FROM,
+            key="sh.id",
+            sort_columns={},
+            width=150,
+            executor=self.executor,
+            descending=True,
         )
-        for col in history_tree["columns"]:
-            history_tree.heading(col, text=col)
-            history_tree.column(col, anchor="center", width=200)
-        history_tree.pack(fill=BOTH, expand=True)
+        history_table.pack(fill=BOTH, expand=True)
 
         # Загрузка данных
         load_history()
 
-    # === Управление поставками ===
-    def show_supplies(self):
-        """Отображение окна управления поставками с сортировкой."""
+    def view_product_history(self, event=None):
+        """История движения товара, выбранного в таблице остатков."""
+        selected_item = self.inventory_tree.selection()
+        if not selected_item:
+            messagebox.showerror("Ошибка", "Выберите товар для просмотра истории.")
+            return
+        values = self.inventory_tree.item(selected_item)["values"]
+        self.view_stock_history(values[0], values[1])
+
+    def view_stock_at(self):
+        """Окно остатков на дату, восстановленных по журналу движения.
+
+        Остатки считаются в SQL страницами по мере прокрутки, как в таблице остатков.
+        """
+        def load_stock_at():
+            """Перезагрузка таблицы остатков на введенную дату (в фоновом потоке)."""
+            try:
+                moment = self.services.ledger.parse_moment(date_entry.get())
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e))
+                return
+            if self.client_mode:
+                stock_table.load_source(
+                    lambda sort_column, descending, last_key, limit: self.services.ledger.stock_at_page(
+                        self.db, moment, sort_column, descending, last_key, limit)
+                )
+                return
+            stock_table.load(join_params=[moment])
+
+        # Создание окна
+        stock_window = Toplevel(self.root)
+        stock_window.title("Остатки на дату")
+
+        # Дата (по умолчанию - сегодня). Даты журнала пишутся в UTC (datetime('now')),
+        # поэтому и дата, и конец дня считаются по UTC, как в прогнозе
+        date_frame = Frame(stock_window)
+        date_frame.pack(pady=5)
+        Label(date_frame, text="Дата по UTC (YYYY-MM-DD или YYYY-MM-DD HH:MM:SS):").pack(side=LEFT, padx=5)
+        date_entry = Entry(date_frame, width=20)
+        date_entry.insert(0, datetime.now(timezone.utc).date().isoformat())
+        date_entry.pack(side=LEFT, padx=5)
+        Button(date_frame, text="Показать", command=load_stock_at).pack(side=LEFT, padx=5)
+
+        # Таблица остатков на дату (момент - параметр FROM, см. STOCK_AT_FROM)
+        stock_table = PagedTable(
+            stock_window,
+            self.db,
+            columns=self.services.ledger.STOCK_AT_COLUMNS,
+            select=self.services.ledger.STOCK_AT_SELECT,
+            from_clause=self.services.ledger.STOCK_AT_FROM,
+            key="p.id",
+            sort_columns=self.services.ledger.STOCK_AT_SORT_COLUMNS,
+            width=150,
+            executor=self.executor,
+        )
+        stock_table.pack(fill=BOTH, expand=True)
+
+        # Загрузка данных
+        load_stock_at()
+
+    def check_ledger(self):
+        """Сверка остатков с журналом движения (в фоновом потоке)."""
+        self.executor.submit("check_ledger", self.services.ledger.check_ledger, self.db,
+                             on_done=self.show_ledger_check, on_error=self.show_db_error)
+
+    def show_ledger_check(self, rows):
+        """Окно с товарами, у которых остаток расходится с журналом."""
+        if not rows:
+            messagebox.showinfo("Сверка с журналом", "Остатки совпадают с журналом движения.")
+            return
+
+        check_window = Toplevel(self.root)
+        check_window.title("Сверка с журналом")
+        Label(check_window, text=f"Расхождений: {len(rows)}").pack(pady=5)
+        check_tree = ttk.Treeview(check_window, columns=self.services.ledger.LEDGER_CHECK_COLUMNS,
+                                  show="headings", height=15)
+        for col in check_tree["columns"]:
+            check_tree.heading(col, text=col)
+            check_tree.column(col, anchor="center", width=120)
+        check_tree.pack(fill=BOTH, expand=True)
+        for row in rows:
+            check_tree.insert("", "end", values=row)
+
+    # === Низкий остаток ===
+    def show_low_stock(self):
+        """Отображение списка товаров с остатком ниже минимального."""
         self.clear_main_frame()
-        Label(self.main_frame, text="Управление поставками", font=("Arial", 20)).pack(pady=10)
+        Label(self.main_frame, text="Низкий остаток", font=("Arial", 20)).pack(pady=10)
 
         # Кнопки действий
         button_frame = Frame(self.main_frame)
         button_frame.pack(pady=10)
-        Button(button_frame, text="Оформить заказ поставщику", command=self.create_supplier_order).pack(side=LEFT, padx=5)
-        Button(button_frame, text="Регистрация поступления товара", command=self.register_supply_receipt).pack(side=LEFT, padx=5)
-        Button(button_frame, text="Просмотр истории поставок", command=self.view_supply_history).pack(side=LEFT, padx=5)
-        Button(button_frame, text="Управление поставщиками", command=self.manage_suppliers).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Обновить", command=self.load_low_stock).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Экспорт",
+               command=lambda: self.export_to_file(self.services.inventory.LOW_STOCK_QUERY, (),
+                                                   self.services.inventory.LOW_STOCK_COLUMNS)).pack(side=LEFT, padx=5)
 
-        # Таблица поставок
-        self.supply_tree = ttk.Treeview(
+        # Таблица товаров с низким остатком
+        self.low_stock_tree = ttk.Treeview(
             self.main_frame,
-            columns=("ID", "Поставщик", "Дата", "Статус"),
+            columns=self.services.inventory.LOW_STOCK_COLUMNS,
             show="headings",
             height=15
         )
+        for col in self.low_stock_tree["columns"]:
+            self.low_stock_tree.heading(col, text=col)
+            self.low_stock_tree.column(col, anchor="center", width=130)
+        self.low_stock_tree.pack(fill=BOTH, expand=True)
 
-        # Правильное добавление сортировки по колонкам
-        for col in self.supply_tree["columns"]:
-            self.supply_tree.heading(col, text=col, command=lambda _col=col: self.sort_supplies(_col))
-            self.supply_tree.column(col, anchor="center", width=150)
+        # Загрузка данных
+        self.load_low_stock()
+
+    def load_low_stock(self):
+        """Загрузка товаров с низким остатком (в фоновом потоке)."""
+        self.executor.submit("low_stock", self.services.inventory.list_low_stock, self.db,
+                             on_done=self.fill_low_stock, on_error=self.show_db_error)
 
-        self.supply_tree.pack(fill=BOTH, expand=True)
+    def fill_low_stock(self, rows):
+        """Заполнение таблицы товаров с низким остатком и счетчика в меню."""
+        if not self.low_stock_tree.winfo_exists():
+            return
+        self.low_stock_tree.delete(*self.low_stock_tree.get_children())
+        for row in rows:
+            self.low_stock_tree.insert("", "end", values=row)
+        self.update_low_stock_badge(len(rows))
+
+    # === Прогноз расхода ===
+    def show_forecast(self):
+        """Отображение прогноза расхода и даты достижения минимального остатка."""
+        self.clear_main_frame()
+        Label(self.main_frame, text="Прогноз расхода", font=("Arial", 20)).pack(pady=10)
+
+        # Параметры моделей
+        param_frame = Frame(self.main_frame)
+        param_frame.pack(pady=5)
+        Label(param_frame, text="История (дней):").pack(side=LEFT, padx=5)
+        self.forecast_history = Entry(param_frame, width=6)
+        self.forecast_history.insert(0, self.services.forecast.HISTORY_DAYS)
+        self.forecast_history.pack(side=LEFT, padx=5)
+        Label(param_frame, text="Окно среднего (дней):").pack(side=LEFT, padx=5)
+        self.forecast_average = Entry(param_frame, width=6)
+        self.forecast_average.insert(0, self.services.forecast.AVERAGE_DAYS)
+        self.forecast_average.pack(side=LEFT, padx=5)
+        Label(param_frame, text="Сглаживание (0-1):").pack(side=LEFT, padx=5)
+        self.forecast_smoothing = Entry(param_frame, width=6)
+        self.forecast_smoothing.insert(0, self.services.forecast.SMOOTHING)
+        self.forecast_smoothing.pack(side=LEFT, padx=5)
+        Button(param_frame, text="Рассчитать", command=self.load_forecast).pack(side=LEFT, padx=5)
+
+        # Без NumPy прогноз считается, но медленнее - пользователь об этом предупреждается
+        note = f"Показаны первые {PREVIEW_ROWS} товаров, которые раньше всех дойдут до минимального остатка."
+        if not self.client_mode and not self.services.forecast.VECTORIZED:
+            note += " NumPy не установлен: расчет выполняется без векторизации и на большом каталоге займет больше времени."
+        Label(self.main_frame, text=note, wraplength=900).pack(pady=5)
+
+        # Таблица прогноза
+        self.forecast_tree = ttk.Treeview(
+            self.main_frame,
+            columns=self.services.forecast.FORECAST_COLUMNS,
+            show="headings",
+            height=15
+        )
+        for col in self.forecast_tree["columns"]:
+            self.forecast_tree.heading(col, text=col)
+            self.forecast_tree.column(col, anchor="center", width=100)
+        self.forecast_tree.pack(fill=BOTH, expand=True)
 
         # Загрузка данных
-        self.load_supplies()
+        self.load_forecast()
+
+    def load_forecast(self):
+        """Расчет прогноза по всему каталогу (в фоновом потоке)."""
+        def show_error(error):
+            if isinstance(error, ValueError):
+                messagebox.showerror("Ошибка", str(error))
+            else:
+                self.show_db_error(error)
+
+        self.executor.submit(
+            "forecast", self.services.forecast.forecast_catalog, self.db,
+            self.forecast_history.get().strip(), self.forecast_average.get().strip(),
+            self.forecast_smoothing.get().strip(), PREVIEW_ROWS,
+            on_done=self.fill_forecast, on_error=show_error,
+        )
 
-    def load_supplies(self, sort_column=None, sort_order="ASC"):
-        """Загрузка списка поставок из базы данных с возможностью сортировки."""
-        try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-
-            # Очистка таблицы
-            for row in self.supply_tree.get_children():
-                self.supply_tree.delete(row)
-
-            # Базовый запрос
-            query = '''
-                SELECT s.id, sp.name AS supplier_name, s.date, s.status
-                FROM supplies s
-                LEFT JOIN suppliers sp ON s.supplier_id = sp.id
-            '''
-
-            # Добавление сортировки
-            if sort_column:
-                query += f" ORDER BY {sort_column} {sort_order}"
-
-            # Выполнение запроса
-            cursor.execute(query)
-            for row in cursor.fetchall():
-                self.supply_tree.insert("", "end", values=row)
-
-            conn.close()
-        except sqlite3.Error as e:
-            messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+    def fill_forecast(self, rows):
+        """Заполнение таблицы прогноза."""
+        if not self.forecast_tree.winfo_exists():
+            return
+        self.forecast_tree.delete(*self.forecast_tree.get_children())
+        for row in rows:
+            self.forecast_tree.insert("", "end", values=["" if value is None else value for value in row])
 
-    def sort_supplies(self, column):
-        """Сортировка таблицы поставок по указанному столбцу."""
-        # Определяем порядок сортировки
-        current_order = self.supply_tree.heading(column, "text")
-        if "↑" in current_order:
-            new_order = "DESC"
-            self.supply_tree.heading(column, text=current_order.replace("↑", "↓"))
-        elif "↓" in current_order:
-            new_order = "ASC"
-            self.supply_tree.heading(column, text=current_order.replace("↓", "↑"))
-        else:
-            new_order = "ASC"
-            self.supply_tree.heading(column, text=f"{current_order} ↑")
-
-        # Сбрасываем стрелки для других колонок
-        for col in self.supply_tree["columns"]:
-            if col != column:
-                col_text = self.supply_tree.heading(col, "text").replace("↑", "").replace("↓", "")
-                self.supply_tree.heading(col, text=col_text)
-
-        # Перезагружаем данные с сортировкой
-        db_column_map = {
-            "ID": "s.id",
-            "Поставщик": "supplier_name",
-            "Дата": "s.date",
-            "Статус": "s.status"
-        }
-        sort_column = db_column_map.get(column, "s.id")  # По умолчанию сортируем по ID
-        self.load_supplies(sort_column=sort_column, sort_order=new_order)
-
-        # Добавляем возможность сортировки по заголовкам колонок
-        for col in self.supply_tree["columns"]:
-            self.supply_tree.heading(col, text=col, command=lambda _col=col: self.sort_supplies(_col))
-            self.supply_tree.column(col, anchor="center", width=150)
-        self.supply_tree.pack(fill=BOTH, expand=True)
+    # === Уведомления ===
+    def show_notifications(self):
+        """Отображение журнала уведомлений."""
+        self.clear_main_frame()
+        Label(self.main_frame, text="Уведомления", font=("Arial", 20)).pack(pady=10)
+        Button(self.main_frame, text="Обновить", command=self.load_notifications).pack(pady=5)
+
+        # Таблица уведомлений
+        self.notification_tree = ttk.Treeview(
+            self.main_frame,
+            columns=self.services.notifications.NOTIFICATION_COLUMNS,
+            show="headings",
+            height=15
+        )
+        for col in self.notification_tree["columns"]:
+            self.notification_tree.heading(col, text=col)
+            self.notification_tree.column(col, anchor="w", width=150)
+        self.notification_tree.column("Сообщение", width=650)
+        self.notification_tree.pack(fill=BOTH, expand=True)
 
         # Загрузка данных
-        self.load_supplies()
+        self.load_notifications()
 
-    def load_supplies(self, sort_column=None, sort_order="ASC"):
-        """Загрузка списка поставок из базы данных с возможностью сортировки."""
-        try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-
-            # Очистка таблицы
-            for row in self.supply_tree.get_children():
-                self.supply_tree.delete(row)
-
-            # Базовый запрос
-            query = '''
-                SELECT s.id, sp.name AS supplier_name, s.date, s.status
-                FROM supplies s
-                LEFT JOIN suppliers sp ON s.supplier_id = sp.id
-            '''
-
-            # Добавление сортировки
-            if sort_column:
-                query += f" ORDER BY {sort_column} {sort_order}"
-
-            # Выполнение запроса
-            cursor.execute(query)
-            for row in cursor.fetchall():
-                self.supply_tree.insert("", "end", values=row)
-
-            conn.close()
-        except sqlite3.Error as e:
-            messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+    def load_notifications(self):
+        """Загрузка последних уведомлений (в фоновом потоке)."""
+        self.executor.submit("notification_list", self.services.notifications.latest_notifications, self.db,
+                             on_done=self.fill_notifications, on_error=self.show_db_error)
 
-    def sort_supplies(self, column):
-        """Сортировка таблицы поставок по указанному столбцу."""
-        # Определяем порядок сортировки
-        current_order = self.supply_tree.heading(column, "text")
-        if "↑" in current_order:
-            new_order = "DESC"
-            self.supply_tree.heading(column, text=current_order.replace("↑", "↓"))
-        elif "↓" in current_order:
-            new_order = "ASC"
-            self.supply_tree.heading(column, text=current_order.replace("↓", "↑"))
-        else:
-            new_order = "ASC"
-            self.supply_tree.heading(column, text=f"{current_order} ↑")
+    def fill_notifications(self, rows):
+        """Заполнение таблицы уведомлений."""
+        if not self.notification_tree.winfo_exists():
+            return
+        self.notification_tree.delete(*self.notification_tree.get_children())
+        for row in rows:
+            self.notification_tree.insert("", "end", values=row)
 
-        # Сбрасываем стрелки для других колонок
-        for col in self.supply_tree["columns"]:
-            if col != column:
-                col_text = self.supply_tree.heading(col, "text").replace("↑", "").replace("↓", "")
-                self.supply_tree.heading(col, text=col_text)
+    # === Управление поставками ===
+    def show_supplies(self):
+        """Отображение окна управления поставками с сортировкой."""
+        self.clear_main_frame()
+        Label(self.main_frame, text="Управление поставками", font=("Arial", 20)).pack(pady=10)
 
-        # Перезагружаем данные с сортировкой
-        self.load_supplies(sort_column=column, sort_order=new_order)
+        # Фильтры
+        filter_frame = Frame(self.main_frame)
+        filter_frame.pack(pady=10, fill=X)
+        Label(filter_frame, text="Поставщик:").pack(side=LEFT, padx=5)
+        self.supplier_filter_var = StringVar()
+        Entry(filter_frame, textvariable=self.supplier_filter_var, width=15).pack(side=LEFT, padx=5)
+        Label(filter_frame, text="Дата (YYYY-MM-DD):").pack(side=LEFT, padx=5)
+        self.date_filter_var = StringVar()
+        Entry(filter_frame, textvariable=self.date_filter_var, width=12).pack(side=LEFT, padx=5)
+        Label(filter_frame, text="Статус:").pack(side=LEFT, padx=5)
+        self.status_filter_var = StringVar()
+        Entry(filter_frame, textvariable=self.status_filter_var, width=15).pack(side=LEFT, padx=5)
+        Button(filter_frame, text="Применить фильтр", command=self.load_supplies).pack(side=LEFT, padx=5)
 
-    def filter_supplies(self):
-        """Фильтрация поставок по поставщику, дате и статусу."""
-        try:
-            supplier_filter = self.supplier_filter_var.get().strip()
-            date_filter = self.date_filter_var.get().strip()
-            status_filter = self.status_filter_var.get().strip()
-
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-
-            # Базовый запрос
-            query = '''
-                SELECT s.id, sp.name AS supplier_name, s.date, s.status
-                FROM supplies s
-                LEFT JOIN suppliers sp ON s.supplier_id = sp.id
-                WHERE 1=1
-            '''
-            params = []
-            if supplier_filter:
-                query += " AND sp.name LIKE ?"
-                params.append(f"%{supplier_filter}%")
-            if date_filter:
-                query += " AND s.date = ?"
-                params.append(date_filter)
-            if status_filter:
-                query += " AND s.status LIKE ?"
-                params.append(f"%{status_filter}%")
-
-            # Выполнение запроса
-            cursor.execute(query, params)
-
-            # Очистка таблицы
-            for row in self.supply_tree.get_children():
-                self.supply_tree.delete(row)
-
-            # Загрузка данных
-            for row in cursor.fetchall():
-                self.supply_tree.insert("", "end", values=row)
-
-            conn.close()
-        except sqlite3.Error as e:
-            messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+        # Кнопки действий
+        button_frame = Frame(self.main_frame)
+        button_frame.pack(pady=10)
+        Button(button_frame, text="Оформить заказ поставщику", command=self.create_supplier_order).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Автозаказ", command=self.auto_order).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Подтвердить черновик", command=self.confirm_supply_order).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Регистрация поступления товара", command=self.register_supply_receipt).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Приемка сканером", command=self.scan_supply_receipt).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Просмотр истории поставок", command=self.view_supply_history).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Управление поставщиками", command=self.manage_suppliers).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Экспорт", command=self.export_supplies).pack(side=LEFT, padx=5)
+
+        # Таблица поставок (сортировка по заголовкам выполняется в базе)
+        self.supply_table = PagedTable(
+            self.main_frame,
+            self.db,
+            columns=self.services.supplies.SUPPLY_COLUMNS,
+            select=self.services.supplies.SUPPLY_SELECT,
+            from_clause=self.services.supplies.SUPPLY_FROM,
+            key="s.id",
+            sort_columns=self.services.supplies.SUPPLY_SORT_COLUMNS,
+            width=150,
+            executor=self.executor,
+        )
+        self.supply_tree = self.supply_table.tree
+        self.supply_table.pack(fill=BOTH, expand=True)
+
+        # Загрузка данных
+        self.load_supplies()
+
+    def load_supplies(self):
+        """Загрузка списка поставок с учетом фильтров (сортировка и страницы - в SQL)."""
+        supplier_filter = self.supplier_filter_var.get().strip()
+        date_filter = self.date_filter_var.get().strip()
+        status_filter = self.status_filter_var.get().strip()
+
+        # В режиме клиента страницы с теми же фильтрами отдает сервер
+        if self.client_mode:
+            self.supply_table.load_source(
+                lambda sort_column, descending, last_key, limit: self.services.supplies.list_supply_page(
+                    self.db, supplier_filter, date_filter, status_filter, sort_column, descending, last_key, limit,
+                )
+            )
+            return
+        self.supply_table.load(*self.services.supplies.supply_filter(supplier_filter, date_filter, status_filter))
+
+    def export_supplies(self):
+        """Выгрузка поставок с текущими фильтрами и сортировкой."""
+        if self.client_mode:
+            self.show_client_mode_note()
+            return
+        query, params = self.supply_table.export_query()
+        self.export_to_file(query, params, self.supply_tree["columns"])
+
+    def search_products(self, prefix):
+        """Варианты для выбора товара: товары по началу названия или артикула."""
+        return self.services.products.search_products(self.db, prefix)
 
     def create_supplier_order(self):
         """Окно оформления заказа поставщику."""
         def add_item_to_order():
             """Добавить товар в заказ."""
-            product = product_var.get()
+            product_id = product_picker.get()
             quantity = quantity_entry.get().strip()
 
-            if not all([product, quantity]):
+            if product_id is None:
+                messagebox.showerror("Ошибка", "Выберите товар из списка.")
+                return
+            if not quantity:
                 messagebox.showerror("Ошибка", "Все поля обязательны для заполнения.")
                 return
 
             try:
-                conn = sqlite3.connect("inventory_system.db")
-                cursor = conn.cursor()
-
-                # Получение ID товара
-                cursor.execute("SELECT id FROM products WHERE name = ?", (product,))
-                product_id = cursor.fetchone()
-                if product_id is None:
-                    messagebox.showerror("Ошибка", "Указанный товар не существует.")
-                    return
+                quantity = self.services.supplies.parse_quantity(quantity)
 
                 # Добавление товара в список
-                order_items.append((product_id[0], product, int(quantity)))
+                product = product_picker.display_name()
+                order_items.append((product_id, product, quantity))
                 order_tree.insert("", "end", values=(product, quantity))
-
-                conn.close()
-            except sqlite3.Error as e:
-                messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+                product_picker.clear()
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e))
 
         def save_order():
             """Сохранить заказ."""
@@ -1034,36 +1237,17 @@ class InventoryManagementApp:
                 return
 
             try:
-                conn = sqlite3.connect("inventory_system.db")
-                cursor = conn.cursor()
-
-                # Получение ID поставщика
-                cursor.execute("SELECT id FROM suppliers WHERE name = ?", (supplier,))
-                supplier_id = cursor.fetchone()
-                if supplier_id is None:
-                    messagebox.showerror("Ошибка", "Указанный поставщик не существует.")
-                    return
-
-                # Создание заказа
-                cursor.execute('''
-                    INSERT INTO supplies (supplier_id, date, status)
-                    VALUES (?, date('now'), 'Ожидается')
-                ''', (supplier_id[0],))
-                supply_id = cursor.lastrowid
-
-                # Добавление товаров в заказ
-                for product_id, _, quantity in order_items:
-                    cursor.execute('''
-                        INSERT INTO supply_items (supply_id, product_id, quantity)
-                        VALUES (?, ?, ?)
-                    ''', (supply_id, product_id, quantity))
-
-                conn.commit()
-                conn.close()
+                # Создание заказа вместе с позициями
+                supplier_id = self.services.suppliers.find_supplier_id(self.db, supplier)
+                self.services.supplies.create_supply_order(
+                    self.db, supplier_id, [(product_id, quantity) for product_id, _, quantity in order_items],
+                )
 
                 messagebox.showinfo("Успех", "Заказ успешно оформлен.")
                 self.load_supplies()
                 order_window.destroy()
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e))
             except sqlite3.Error as e:
                 messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
@@ -1078,30 +1262,15 @@ class InventoryManagementApp:
 
         # Загрузка списка поставщиков
         try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM suppliers")
-            suppliers = [row[0] for row in cursor.fetchall()]
-            supplier_dropdown["values"] = suppliers
-            conn.close()
+            supplier_dropdown["values"] = self.services.suppliers.supplier_names(self.db)
         except sqlite3.Error as e:
             messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
-        Label(order_window, text="Товар:").grid(row=1, column=0, padx=10, pady=5)
-        product_var = StringVar()
-        product_dropdown = ttk.Combobox(order_window, textvariable=product_var, state="readonly")
-        product_dropdown.grid(row=1, column=1, padx=10, pady=5)
-
-        # Загрузка списка товаров
-        try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM products")
-            products = [row[0] for row in cursor.fetchall()]
-            product_dropdown["values"] = products
-            conn.close()
-        except sqlite3.Error as e:
-            messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+        # Товар ищется по началу названия или артикула
+        Label(order_window, text="Товар:").grid(row=1, column=0, padx=10, pady=5, sticky=N)
+        product_picker = ProductPicker(order_window, self.search_products, self.executor,
+                                       on_select=lambda product_id: quantity_entry.focus_set())
+        product_picker.grid(row=1, column=1, padx=10, pady=5)
 
         Label(order_window, text="Количество:").grid(row=2, column=0, padx=10, pady=5)
         quantity_entry = Entry(order_window, width=15)
@@ -1125,8 +1294,115 @@ class InventoryManagementApp:
 
         Button(order_window, text="Сохранить заказ", command=save_order).grid(row=5, column=0, columnspan=2, pady=10)
 
+    def auto_order(self):
+        """Окно автозаказа: предложение по товарам с низким остатком и черновики заказов."""
+        def load_proposals():
+            """Расчет предложения (в фоновом потоке)."""
+            self.executor.submit("reorder", self.services.reorder.reorder_proposals, self.db,
+                                 velocity_entry.get().strip(), cover_entry.get().strip(),
+                                 on_done=fill_proposals, on_error=show_error)
+
+        def fill_proposals(rows):
+            """Заполнение таблицы предложения."""
+            if not proposal_tree.winfo_exists():
+                return
+            proposal_tree.delete(*proposal_tree.get_children())
+            for row in rows:
+                tags = ("no_supplier",) if row[0] is None else ()
+                proposal_tree.insert("", "end", values=["" if value is None else value for value in row], tags=tags)
+            suppliers = len({row[0] for row in rows if row[0] is not None})
+            summary = f"Товаров к заказу: {len(rows)}, поставщиков: {suppliers}"
+            without_supplier = sum(1 for row in rows if row[0] is None)
+            if without_supplier:
+                summary += (f"\nБез поставщика: {without_supplier} - назначьте поставщика в карточке товара, "
+                            "черновики для них не создаются")
+            summary_label.config(text=summary, fg="red" if without_supplier else "black")
+
+        def create_drafts():
+            """Создание черновиков заказов (в фоновом потоке)."""
+            self.executor.submit("reorder", self.services.reorder.create_reorder_drafts, self.db,
+                                 velocity_entry.get().strip(), cover_entry.get().strip(),
+                                 on_done=show_drafts, on_error=show_error)
+
+        def show_drafts(drafts):
+            if not drafts:
+                messagebox.showinfo("Информация", "Нечего заказывать: нехватка уже покрыта заказами.")
+                return
+            items = sum(row[2] for row in drafts)
+            messagebox.showinfo("Успех", f"Создано черновиков заказов: {len(drafts)}, позиций: {items}.\n"
+                                         "Проверьте их и подтвердите кнопкой \"Подтвердить черновик\".")
+            if order_window.winfo_exists():
+                order_window.destroy()
+            if self.supply_tree.winfo_exists():
+                self.load_supplies()
+
+        def show_error(error):
+            if isinstance(error, ValueError):
+                messagebox.showerror("Ошибка", str(error))
+            else:
+                self.show_db_error(error)
+
+        # Создание окна
+        order_window = Toplevel(self.root)
+        order_window.title("Автозаказ")
+
+        param_frame = Frame(order_window)
+        param_frame.pack(pady=5)
+        Label(param_frame, text="Расход за (дней):").pack(side=LEFT, padx=5)
+        velocity_entry = Entry(param_frame, width=6)
+        velocity_entry.insert(0, self.services.reorder.VELOCITY_DAYS)
+        velocity_entry.pack(side=LEFT, padx=5)
+        Label(param_frame, text="Запас на (дней):").pack(side=LEFT, padx=5)
+        cover_entry = Entry(param_frame, width=6)
+        cover_entry.insert(0, self.services.reorder.COVER_DAYS)
+        cover_entry.pack(side=LEFT, padx=5)
+        Button(param_frame, text="Рассчитать", command=load_proposals).pack(side=LEFT, padx=5)
+
+        # Таблица предложения (колонки ID скрыты)
+        columns = self.services.reorder.REORDER_COLUMNS
+        proposal_tree = ttk.Treeview(
+            order_window,
+            columns=columns,
+            displaycolumns=[col for col in columns if not col.startswith("ID")],
+            show="headings",
+            height=15
+        )
+        for col in columns:
+            proposal_tree.heading(col, text=col)
+            proposal_tree.column(col, anchor="center", width=110)
+        proposal_tree.tag_configure("no_supplier", foreground="red")
+        proposal_tree.pack(fill=BOTH, expand=True)
+
+        summary_label = Label(order_window, text="")
+        summary_label.pack(pady=5)
+        Button(order_window, text="Создать черновики заказов", command=create_drafts).pack(pady=5)
+
+        # Загрузка данных
+        load_proposals()
+
+    def confirm_supply_order(self):
+        """Подтверждение выбранного черновика заказа."""
+        selected_item = self.supply_tree.selection()
+        if not selected_item:
+            messagebox.showerror("Ошибка", "Выберите черновик заказа.")
+            return
+        supply_id = self.supply_tree.item(selected_item)["values"][0]
+
+        try:
+            if not self.services.supplies.confirm_supply_order(self.db, supply_id):
+                messagebox.showinfo("Информация", "Выбранная поставка не является черновиком.")
+                return
+            messagebox.showinfo("Успех", "Заказ подтвержден.")
+            self.load_supplies()
+        except sqlite3.Error as e:
+            messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+
     def register_supply_receipt(self):
-        """Регистрация поступления товара."""
+        """Регистрация поступления товара документом приемки.
+
+        К приемке предлагается все, что еще не принято; количество по товару
+        можно изменить или обнулить, чтобы принять поставку частично.
+        """
         selected_item = self.supply_tree.selection()
         if not selected_item:
             messagebox.showerror("Ошибка", "Выберите поставку для регистрации поступления.")
@@ -1135,38 +1411,333 @@ class InventoryManagementApp:
         # Получение данных выбранной поставки
         item = self.supply_tree.item(selected_item)
         supply_id = item["values"][0]
+        if item["values"][3] == self.services.supplies.STATUS_DELIVERED:
+            messagebox.showinfo("Информация", "Эта поставка уже завершена.")
+            return
+        to_receive = {}
 
-        try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-
-            # Обновление остатков товаров
-            cursor.execute('''
-                SELECT product_id, quantity
-                FROM supply_items
-                WHERE supply_id = ?
-            ''', (supply_id,))
-            items = cursor.fetchall()
-            for product_id, quantity in items:
-                cursor.execute('''
-                    UPDATE inventory
-                    SET quantity = quantity + ?
-                    WHERE product_id = ?
-                ''', (quantity, product_id))
-
-            # Обновление статуса поставки
-            cursor.execute('''
-                UPDATE supplies
-                SET status = "Доставлено"
-                WHERE id = ?
-            ''', (supply_id,))
-            conn.commit()
-            conn.close()
-
-            messagebox.showinfo("Успех", "Поставка успешно зарегистрирована и остатки обновлены.")
+        def load_receipt():
+            """Позиции поставки с количеством к приемке и документы прежних приемок."""
+            try:
+                lines = self.services.supplies.supply_lines(self.db, supply_id)
+                receipts = self.services.supplies.supply_receipts(self.db, supply_id)
+            except sqlite3.Error as e:
+                messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+                return
+            to_receive.clear()
+            receipt_tree.delete(*receipt_tree.get_children())
+            for product_id, name, sku, ordered, received in lines:
+                to_receive[product_id] = max(ordered - received, 0)
+                receipt_tree.insert("", "end", iid=str(product_id),
+                                    values=(product_id, name, sku, ordered, received, to_receive[product_id]))
+            documents_tree.delete(*documents_tree.get_children())
+            for row in receipts:
+                documents_tree.insert("", "end", values=row)
+
+        def select_line(event=None):
+            """Количество выбранной позиции - в поле для изменения."""
+            selection = receipt_tree.selection()
+            if selection:
+                quantity_entry.delete(0, END)
+                quantity_entry.insert(0, to_receive[int(selection[0])])
+
+        def set_quantity():
+            """Изменение количества к приемке у выбранных позиций (0 - не принимать)."""
+            selection = receipt_tree.selection()
+            if not selection:
+                messagebox.showerror("Ошибка", "Выберите товар.")
+                return
+            try:
+                quantity = int(quantity_entry.get().strip())
+            except ValueError:
+                messagebox.showerror("Ошибка", "Введите корректное количество.")
+                return
+            if quantity < 0:
+                messagebox.showerror("Ошибка", "Количество не может быть отрицательным.")
+                return
+            for iid in selection:
+                to_receive[int(iid)] = quantity
+                receipt_tree.set(iid, "К приемке", quantity)
+
+        def save_receipt():
+            """Проведение документа приемки."""
+            counts = {product_id: quantity for product_id, quantity in to_receive.items() if quantity > 0}
+            if not counts:
+                messagebox.showerror("Ошибка", "Нет товаров к приемке.")
+                return
+            try:
+                result = self.services.supplies.receive_supply_counts(self.db, supply_id, counts)
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e))
+                return
+            except sqlite3.Error as e:
+                messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+                return
+
+            if result is None:
+                messagebox.showinfo("Информация", "Эта поставка уже завершена.")
+            elif result[2] == self.services.supplies.STATUS_DELIVERED:
+                messagebox.showinfo("Успех", "Поставка успешно зарегистрирована и остатки обновлены.")
+            else:
+                messagebox.showinfo("Успех", f"Документ приемки #{result[0]}: принято товаров {result[1]}. "
+                                             "Поставка принята частично.")
             self.load_supplies()
-        except sqlite3.Error as e:
-            messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+            self.load_low_stock_count()
+            receipt_window.destroy()
+
+        # Создание окна
+        receipt_window = Toplevel(self.root)
+        receipt_window.title(f"Приемка поставки #{supply_id}")
+
+        columns = ("ID", "Товар", "Артикул", "Заказано", "Принято", "К приемке")
+        receipt_tree = ttk.Treeview(receipt_window, columns=columns, show="headings", height=12)
+        for col in columns:
+            receipt_tree.heading(col, text=col)
+            receipt_tree.column(col, anchor="center", width=120)
+        receipt_tree.pack(fill=BOTH, expand=True, padx=10, pady=5)
+        receipt_tree.bind("<<TreeviewSelect>>", select_line)
+
+        edit_frame = Frame(receipt_window)
+        edit_frame.pack(pady=5)
+        Label(edit_frame, text="К приемке:").pack(side=LEFT)
+        quantity_entry = Entry(edit_frame, width=10)
+        quantity_entry.pack(side=LEFT, padx=5)
+        Button(edit_frame, text="Изменить", command=set_quantity).pack(side=LEFT, padx=5)
+        Button(edit_frame, text="Провести приемку", command=save_receipt).pack(side=LEFT, padx=5)
+
+        # Документы прежних приемок поставки
+        Label(receipt_window, text="Документы приемки").pack()
+        documents_tree = ttk.Treeview(receipt_window, columns=self.services.supplies.RECEIPT_COLUMNS,
+                                      show="headings", height=5)
+        for col in documents_tree["columns"]:
+            documents_tree.heading(col, text=col)
+            documents_tree.column(col, anchor="center", width=150)
+        documents_tree.pack(fill=BOTH, padx=10, pady=5)
+
+        load_receipt()
+
+    def scan_supply_receipt(self):
+        """Приемка выбранной поставки сканером штрихкодов."""
+        selected_item = self.supply_tree.selection()
+        if not selected_item:
+            messagebox.showerror("Ошибка", "Выберите поставку для приемки.")
+            return
+        item = self.supply_tree.item(selected_item)
+        if item["values"][3] == self.services.supplies.STATUS_DELIVERED:
+            messagebox.showinfo("Информация", "Эта поставка уже завершена.")
+            return
+        self.open_scan_window(item["values"][0])
+
+    def open_scan_window(self, supply_id=None):
+        """Окно сканирования: приемка поставки supply_id или приход/пересчет остатков.
+
+        Поле ввода принимает сканы сканера-клавиатуры (артикул и Enter). Артикулы
+        ищутся в кэше справочников в фоновом потоке (кэш загружается при открытии
+        окна), количества копятся по товарам в памяти и проводятся одной
+        транзакцией по кнопке "Провести".
+        """
+        counts = {}
+        lines = {}
+        # Сканы ждут поиска по артикулу в фоновом потоке; одновременно ищется одна пачка
+        queued = []
+        resolving = []
+
+        def scan(event=None):
+            """Обработка одного скана: количество проверяется сразу, товар ищется в фоне."""
+            code = code_entry.get().strip()
+            code_entry.delete(0, END)
+            if not code:
+                return
+            try:
+                # При пересчете количество 0 отмечает, что товара нет в наличии
+                if supply_id is None and mode_var.get() == "Пересчет остатков":
+                    quantity = self.services.inventory.parse_count(quantity_entry.get().strip())
+                else:
+                    quantity = self.services.supplies.parse_quantity(quantity_entry.get().strip())
+            except ValueError as e:
+                reject(str(e))
+                return
+            queued.append((code, quantity))
+            if not resolving:
+                resolve_queued()
+
+        def resolve_queued():
+            """Поиск товаров по артикулам накопившихся сканов одной пачкой."""
+            resolving[:] = queued
+            queued.clear()
+            if resolving:
+                self.executor.submit(f"scan:{scan_window}", self.services.products.find_products_by_sku, self.db,
+                                     [code for code, _ in resolving], on_done=count_scans, on_error=scan_error)
+
+        def count_scans(rows):
+            """Учет найденных товаров в порядке сканирования."""
+            if not scan_window.winfo_exists():
+                return
+            for (code, quantity), row in zip(resolving, rows):
+                if row is None:
+                    reject(f"Товар с артикулом '{code}' не найден.")
+                else:
+                    count_scan(code, quantity, *row)
+            resolve_queued()
+
+        def scan_error(error):
+            if not scan_window.winfo_exists():
+                return
+            reject(f"Ошибка базы данных: {error}")
+            resolve_queued()
+
+        def count_scan(code, quantity, product_id, name):
+            """Учет количества одного скана найденного товара."""
+            if supply_id is not None and product_id not in lines:
+                reject(f"Товар с артикулом '{code}' не входит в поставку #{supply_id}.")
+                return
+
+            if product_id not in lines:
+                lines[product_id] = (name, code, None, None)
+            counts[product_id] = counts.get(product_id, 0) + quantity
+            show_line(product_id)
+            scan_tree.selection_set(str(product_id))
+            scan_tree.see(str(product_id))
+            status_label.config(text=f"{lines[product_id][0]}: {counts[product_id]}", fg="black")
+
+        def reject(message):
+            """Скан не учтен: звуковой сигнал и сообщение без модального окна."""
+            self.root.bell()
+            status_label.config(text=message, fg="red")
+
+        def show_line(product_id):
+            """Строка товара в таблице сканирования."""
+            name, sku, ordered, received = lines[product_id]
+            scanned = counts.get(product_id, 0)
+            values = (product_id, name, sku, scanned) if supply_id is None else \
+                (product_id, name, sku, ordered, received, scanned)
+            iid = str(product_id)
+            if scan_tree.exists(iid):
+                scan_tree.item(iid, values=values)
+            elif product_id in counts or supply_id is not None:
+                scan_tree.insert("", "end", iid=iid, values=values)
+
+        def remove_line():
+            """Сброс отсканированного количества выбранного товара."""
+            for iid in scan_tree.selection():
+                product_id = int(iid)
+                counts.pop(product_id, None)
+                if supply_id is None:
+                    scan_tree.delete(iid)
+                else:
+                    show_line(product_id)
+            code_entry.focus_set()
+
+        def load_lines():
+            """Позиции поставки: заказано и уже принято."""
+            lines.clear()
+            scan_tree.delete(*scan_tree.get_children())
+            for product_id, name, sku, ordered, received in self.services.supplies.supply_lines(self.db, supply_id):
+                lines[product_id] = (name, sku, ordered, received)
+                show_line(product_id)
+
+        def commit():
+            """Проведение накопленных количеств одной транзакцией."""
+            if queued or resolving:
+                reject("Дождитесь обработки всех сканов.")
+                return
+            if not counts:
+                messagebox.showerror("Ошибка", "Нет отсканированных товаров.")
+                return
+            try:
+                if supply_id is None:
+                    recount = mode_var.get() == "Пересчет остатков"
+                    result = self.services.inventory.apply_stock_counts(self.db, counts, reason_entry.get().strip(),
+                                                                        recount)
+                else:
+                    result = self.services.supplies.receive_supply_counts(self.db, supply_id, counts)
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e))
+                return
+            except sqlite3.Error as e:
+                messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+                return
+
+            # Обновление экрана, с которого открыто окно, если он еще показан
+            counts.clear()
+            self.load_low_stock_count()
+            if supply_id is None:
+                lines.clear()
+                scan_tree.delete(*scan_tree.get_children())
+                if self.inventory_tree.winfo_exists():
+                    self.load_inventory()
+                messagebox.showinfo("Успех", f"Остатки обновлены, товаров: {len(result)}.")
+                code_entry.focus_set()
+                return
+
+            if self.supply_tree.winfo_exists():
+                self.load_supplies()
+            if result is None:
+                messagebox.showinfo("Информация", "Эта поставка уже завершена.")
+            elif result[2] == self.services.supplies.STATUS_DELIVERED:
+                messagebox.showinfo("Успех", "Поставка принята полностью. Остатки обновлены.")
+            else:
+                messagebox.showinfo("Успех", f"Документ приемки #{result[0]}: принято товаров {result[1]}. "
+                                             "Поставка принята частично.")
+                load_lines()
+                code_entry.focus_set()
+                return
+            scan_window.destroy()
+
+        # Создание окна
+        scan_window = Toplevel(self.root)
+        scan_window.title(f"Приемка поставки #{supply_id}" if supply_id is not None else "Сканирование товаров")
+
+        input_frame = Frame(scan_window)
+        input_frame.pack(fill=X, padx=10, pady=5)
+        Label(input_frame, text="Артикул (скан):").pack(side=LEFT)
+        code_entry = Entry(input_frame, width=30)
+        code_entry.pack(side=LEFT, padx=5)
+        Label(input_frame, text="Кол-во за скан:").pack(side=LEFT)
+        quantity_entry = Entry(input_frame, width=6)
+        quantity_entry.insert(0, "1")
+        quantity_entry.pack(side=LEFT, padx=5)
+
+        if supply_id is None:
+            mode_frame = Frame(scan_window)
+            mode_frame.pack(fill=X, padx=10, pady=5)
+            Label(mode_frame, text="Режим:").pack(side=LEFT)
+            mode_var = StringVar(value="Приход")
+            ttk.Combobox(mode_frame, textvariable=mode_var, values=["Приход", "Пересчет остатков"],
+                         state="readonly", width=18).pack(side=LEFT, padx=5)
+            Label(mode_frame, text="Причина:").pack(side=LEFT)
+            reason_entry = Entry(mode_frame, width=30)
+            reason_entry.insert(0, "Сканирование")
+            reason_entry.pack(side=LEFT, padx=5)
+
+        status_label = Label(scan_window, text="Сканируйте товары", anchor="w")
+        status_label.pack(fill=X, padx=10)
+
+        columns = ("ID", "Товар", "Артикул", "Сканировано") if supply_id is None else \
+            ("ID", "Товар", "Артикул", "Заказано", "Принято", "Сканировано")
+        scan_tree = ttk.Treeview(scan_window, columns=columns, show="headings", height=15)
+        for col in columns:
+            scan_tree.heading(col, text=col)
+            scan_tree.column(col, anchor="center", width=120)
+        scan_tree.pack(fill=BOTH, expand=True, padx=10, pady=5)
+
+        button_frame = Frame(scan_window)
+        button_frame.pack(pady=5)
+        Button(button_frame, text="Провести", command=commit).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Сбросить строку", command=remove_line).pack(side=LEFT, padx=5)
+
+        code_entry.bind("<Return>", scan)
+        code_entry.focus_set()
+
+        # Товары загружаются в кэш справочников заранее, до первого скана
+        self.executor.submit(f"preload:{scan_window}", self.services.products.preload_products, self.db,
+                             on_error=self.show_db_error)
+
+        if supply_id is not None:
+            try:
+                load_lines()
+            except sqlite3.Error as e:
+                messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
     def view_supply_history(self):
         """Просмотр истории поставок."""
@@ -1177,7 +1748,7 @@ class InventoryManagementApp:
         # Таблица истории
         history_tree = ttk.Treeview(
             history_window,
-            columns=("ID", "Поставщик", "Дата", "Статус"),
+            columns=self.services.supplies.SUPPLY_COLUMNS,
             show="headings",
             height=15
         )
@@ -1189,17 +1760,8 @@ class InventoryManagementApp:
 
         # Загрузка данных
         try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT s.id, sp.name, s.date, s.status
-                FROM supplies s
-                LEFT JOIN suppliers sp ON s.supplier_id = sp.id
-                ORDER BY s.date DESC
-            ''')
-            for row in cursor.fetchall():
+            for row in self.services.supplies.supply_history(self.db):
                 history_tree.insert("", "end", values=row)
-            conn.close()
         except sqlite3.Error as e:
             messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
@@ -1214,40 +1776,43 @@ class InventoryManagementApp:
         Button(button_frame, text="Добавить поставщика", command=self.add_supplier).pack(side=LEFT, padx=5)
         Button(button_frame, text="Редактировать поставщика", command=self.edit_supplier).pack(side=LEFT, padx=5)
         Button(button_frame, text="Удалить поставщика", command=self.delete_supplier).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Экспорт", command=self.export_suppliers).pack(side=LEFT, padx=5)
 
-        # Таблица поставщиков
-        self.supplier_tree = ttk.Treeview(
+        # Таблица поставщиков (сортировка по заголовкам выполняется в базе)
+        self.supplier_table = PagedTable(
             self.main_frame,
-            columns=("ID", "Название", "Контактное лицо", "Телефон", "Email", "Адрес"),
-            show="headings",
-            height=15
+            self.db,
+            columns=self.services.suppliers.SUPPLIER_COLUMNS,
+            select=self.services.suppliers.SUPPLIER_SELECT,
+            from_clause=self.services.suppliers.SUPPLIER_FROM,
+            key="id",
+            sort_columns=self.services.suppliers.SUPPLIER_SORT_COLUMNS,
+            width=150,
+            executor=self.executor,
         )
-        for col in self.supplier_tree["columns"]:
-            self.supplier_tree.heading(col, text=col)
-            self.supplier_tree.column(col, anchor="center", width=150)
-        self.supplier_tree.pack(fill=BOTH, expand=True)
+        self.supplier_tree = self.supplier_table.tree
+        self.supplier_table.pack(fill=BOTH, expand=True)
 
         # Загрузка данных
         self.load_suppliers()
 
     def load_suppliers(self):
-        """Загрузка списка поставщиков из базы данных."""
-        try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-
-            # Очистка таблицы
-            for row in self.supplier_tree.get_children():
-                self.supplier_tree.delete(row)
-
-            # Загрузка данных
-            cursor.execute("SELECT id, name, contact_person, phone, email, address FROM suppliers")
-            for row in cursor.fetchall():
-                self.supplier_tree.insert("", "end", values=row)
+        """Загрузка списка поставщиков (сортировка и страницы - в SQL)."""
+        if self.client_mode:
+            self.supplier_table.load_source(
+                lambda sort_column, descending, last_key, limit: self.services.suppliers.list_supplier_page(
+                    self.db, sort_column, descending, last_key, limit)
+            )
+            return
+        self.supplier_table.load()
 
-            conn.close()
-        except sqlite3.Error as e:
-            messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+    def export_suppliers(self):
+        """Выгрузка поставщиков в текущей сортировке."""
+        if self.client_mode:
+            self.show_client_mode_note()
+            return
+        query, params = self.supplier_table.export_query()
+        self.export_to_file(query, params, self.supplier_tree["columns"])
 
     def add_supplier(self):
         """Добавление нового поставщика."""
@@ -1258,25 +1823,14 @@ class InventoryManagementApp:
             email = email_entry.get().strip()
             address = address_entry.get().strip()
 
-            if not name:
-                messagebox.showerror("Ошибка", "Название поставщика обязательно для заполнения.")
-                return
-
             try:
-                conn = sqlite3.connect("inventory_system.db")
-                cursor = conn.cursor()
-
-                # Вставка данных
-                cursor.execute('''
-                    INSERT INTO suppliers (name, contact_person, phone, email, address)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (name, contact_person, phone, email, address))
-                conn.commit()
-                conn.close()
+                self.services.suppliers.add_supplier(self.db, name, contact_person, phone, email, address)
 
                 messagebox.showinfo("Успех", "Поставщик успешно добавлен.")
                 self.load_suppliers()
                 add_window.destroy()
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e))
             except sqlite3.Error as e:
                 messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
@@ -1324,26 +1878,14 @@ class InventoryManagementApp:
             email = email_entry.get().strip()
             address = address_entry.get().strip()
 
-            if not name:
-                messagebox.showerror("Ошибка", "Название поставщика обязательно для заполнения.")
-                return
-
             try:
-                conn = sqlite3.connect("inventory_system.db")
-                cursor = conn.cursor()
-
-                # Обновление данных
-                cursor.execute('''
-                    UPDATE suppliers
-                    SET name = ?, contact_person = ?, phone = ?, email = ?, address = ?
-                    WHERE id = ?
-                ''', (name, contact_person, phone, email, address, supplier_id))
-                conn.commit()
-                conn.close()
+                self.services.suppliers.update_supplier(self.db, supplier_id, name, contact_person, phone, email, address)
 
                 messagebox.showinfo("Успех", "Информация о поставщике успешно обновлена.")
                 self.load_suppliers()
                 edit_window.destroy()
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e))
             except sqlite3.Error as e:
                 messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
@@ -1394,57 +1936,16 @@ class InventoryManagementApp:
             return
 
         try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-
-            # Проверка связанных поставок
-            cursor.execute("SELECT COUNT(*) FROM supplies WHERE supplier_id = ?", (supplier_id,))
-            supply_count = cursor.fetchone()[0]
-            if supply_count > 0:
-                messagebox.showerror("Ошибка", f"Поставщик связан с {supply_count} поставками. Удаление невозможно.")
-                conn.close()
-                return
-
-            # Удаление поставщика
-            cursor.execute("DELETE FROM suppliers WHERE id = ?", (supplier_id,))
-            conn.commit()
-            conn.close()
+            # Поставщика со связанными поставками удалить нельзя
+            self.services.suppliers.delete_supplier(self.db, supplier_id)
 
             messagebox.showinfo("Успех", "Поставщик успешно удален.")
             self.load_suppliers()
+        except ValueError as e:
+            messagebox.showerror("Ошибка", str(e))
         except sqlite3.Error as e:
             messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
-    def load_supplies(self):
-        """Загрузка списка поставок из базы данных."""
-        try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-
-            # Очистка таблицы
-            for row in self.supply_tree.get_children():
-                self.supply_tree.delete(row)
-
-            # Загрузка данных
-            cursor.execute('''
-                SELECT s.id, sp.name, s.date, s.status
-                FROM supplies s
-                LEFT JOIN suppliers sp ON s.supplier_id = sp.id
-            ''')
-            for row in cursor.fetchall():
-                self.supply_tree.insert("", "end", values=row)
-
-            conn.close()
-        except sqlite3.Error as e:
-            messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
-
-    def sort_supplies(self, column):
-        """Сортировка таблицы поставок по указанной колонке."""
-        data = [(self.supply_tree.set(k, column), k) for k in self.supply_tree.get_children("")]
-        data.sort(key=lambda t: t[0])
-        for index, (val, k) in enumerate(data):
-            self.supply_tree.move(k, "", index)
-
     def add_supply(self):
         """Окно добавления новой поставки."""
         def save_new_supply():
@@ -1452,32 +1953,14 @@ class InventoryManagementApp:
             date = date_entry.get().strip()
             status = status_var.get()
 
-            if not all([supplier, date, status]):
-                messagebox.showerror("Ошибка", "Все поля обязательны для заполнения.")
-                return
-
             try:
-                conn = sqlite3.connect("inventory_system.db")
-                cursor = conn.cursor()
-
-                # Получение ID поставщика
-                cursor.execute("SELECT id FROM suppliers WHERE name = ?", (supplier,))
-                supplier_id = cursor.fetchone()
-                if supplier_id is None:
-                    messagebox.showerror("Ошибка", "Указанный поставщик не существует.")
-                    return
-
-                # Вставка данных
-                cursor.execute('''
-                    INSERT INTO supplies (supplier_id, date, status)
-                    VALUES (?, ?, ?)
-                ''', (supplier_id[0], date, status))
-                conn.commit()
-                conn.close()
+                self.services.supplies.add_supply(self.db, supplier, date, status)
 
                 messagebox.showinfo("Успех", "Поставка успешно добавлена.")
                 self.load_supplies()
                 add_window.destroy()
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e))
             except sqlite3.Error as e:
                 messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
@@ -1491,12 +1974,7 @@ class InventoryManagementApp:
 
         # Загрузка поставщиков
         try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM suppliers")
-            suppliers = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            supplier_dropdown["values"] = suppliers
+            supplier_dropdown["values"] = self.services.suppliers.supplier_names(self.db)
         except sqlite3.Error as e:
             messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
@@ -1507,7 +1985,7 @@ class InventoryManagementApp:
         Label(add_window, text="Статус:").grid(row=2, column=0, padx=10, pady=5)
         status_var = StringVar()
         status_dropdown = ttk.Combobox(add_window, textvariable=status_var, state="readonly")
-        status_dropdown["values"] = ["Ожидается", "В пути", "Доставлено", "Отменено"]
+        status_dropdown["values"] = self.services.supplies.SUPPLY_STATUSES
         status_dropdown.grid(row=2, column=1, padx=10, pady=5)
 
         Button(add_window, text="Сохранить", command=save_new_supply).grid(row=3, column=0, columnspan=2, pady=10)
@@ -1526,24 +2004,15 @@ class InventoryManagementApp:
         def load_supply_items():
             """Загрузка товаров из выбранной поставки."""
             try:
-                conn = sqlite3.connect("inventory_system.db")
-                cursor = conn.cursor()
+                rows = self.services.supplies.supply_items(self.db, supply_id)
 
                 # Очистка таблицы
                 for row in item_tree.get_children():
                     item_tree.delete(row)
 
                 # Загрузка данных
-                cursor.execute('''
-                    SELECT p.name, i.quantity
-                    FROM supply_items i
-                    JOIN products p ON i.product_id = p.id
-                    WHERE i.supply_id = ?
-                ''', (supply_id,))
-                for row in cursor.fetchall():
+                for row in rows:
                     item_tree.insert("", "end", values=row)
-
-                conn.close()
             except sqlite3.Error as e:
                 messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
@@ -1554,7 +2023,7 @@ class InventoryManagementApp:
         # Таблица товаров
         item_tree = ttk.Treeview(
             details_window,
-            columns=("Название", "Количество"),
+            columns=("Название", "Количество", "Принято"),
             show="headings",
             height=15
         )
@@ -1578,58 +2047,36 @@ class InventoryManagementApp:
         supply_id = item["values"][0]
 
         def save_item_to_supply():
-            product = product_var.get()
+            product_id = product_picker.get()
             quantity = quantity_entry.get().strip()
 
-            if not all([product, quantity]):
-                messagebox.showerror("Ошибка", "Все поля обязательны для заполнения.")
+            if product_id is None:
+                messagebox.showerror("Ошибка", "Выберите товар из списка.")
                 return
 
             try:
-                conn = sqlite3.connect("inventory_system.db")
-                cursor = conn.cursor()
-
-                # Получение ID товара
-                cursor.execute("SELECT id FROM products WHERE name = ?", (product,))
-                product_id = cursor.fetchone()
-                if product_id is None:
-                    messagebox.showerror("Ошибка", "Указанный товар не существует.")
-                    return
-
-                # Вставка данных
-                cursor.execute('''
-                    INSERT INTO supply_items (supply_id, product_id, quantity)
-                    VALUES (?, ?, ?)
-                ''', (supply_id, product_id[0], int(quantity)))
-                conn.commit()
-                conn.close()
+                self.services.supplies.add_supply_item(self.db, supply_id, product_id, quantity)
+                product_picker.clear()
 
                 messagebox.showinfo("Успех", "Товар успешно добавлен в поставку.")
                 load_supply_items()
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e))
             except sqlite3.Error as e:
                 messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
         def load_supply_items():
             """Загрузка товаров из выбранной поставки."""
             try:
-                conn = sqlite3.connect("inventory_system.db")
-                cursor = conn.cursor()
+                rows = self.services.supplies.supply_items(self.db, supply_id)
 
                 # Очистка таблицы
                 for row in items_tree.get_children():
                     items_tree.delete(row)
 
                 # Загрузка данных
-                cursor.execute('''
-                    SELECT p.name, i.quantity
-                    FROM supply_items i
-                    JOIN products p ON i.product_id = p.id
-                    WHERE i.supply_id = ?
-                ''', (supply_id,))
-                for row in cursor.fetchall():
+                for row in rows:
                     items_tree.insert("", "end", values=row)
-
-                conn.close()
             except sqlite3.Error as e:
                 messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
@@ -1638,21 +2085,10 @@ class InventoryManagementApp:
         items_window.title("Добавление товаров в поставку")
 
         # Поля для добавления товаров
-        Label(items_window, text="Товар:").grid(row=0, column=0, padx=10, pady=5)
-        product_var = StringVar()
-        product_dropdown = ttk.Combobox(items_window, textvariable=product_var, state="readonly")
-        product_dropdown.grid(row=0, column=1, padx=10, pady=5)
-
-        # Загрузка товаров
-        try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM products")
-            products = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            product_dropdown["values"] = products
-        except sqlite3.Error as e:
-            messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+        Label(items_window, text="Товар:").grid(row=0, column=0, padx=10, pady=5, sticky=N)
+        product_picker = ProductPicker(items_window, self.search_products, self.executor,
+                                       on_select=lambda product_id: quantity_entry.focus_set())
+        product_picker.grid(row=0, column=1, padx=10, pady=5)
 
         Label(items_window, text="Количество:").grid(row=1, column=0, padx=10, pady=5)
         quantity_entry = Entry(items_window, width=30)
@@ -1663,7 +2099,7 @@ class InventoryManagementApp:
         # Таблица товаров в поставке
         items_tree = ttk.Treeview(
             items_window,
-            columns=("Название", "Количество"),
+            columns=("Название", "Количество", "Принято"),
             show="headings",
             height=15
         )
@@ -1688,7 +2124,7 @@ class InventoryManagementApp:
         supply_status = item["values"][3]
 
         # Проверка текущего статуса поставки
-        if supply_status == "Доставлено":
+        if supply_status == self.services.supplies.STATUS_DELIVERED:
             messagebox.showinfo("Информация", "Эта поставка уже завершена.")
             return
 
@@ -1697,34 +2133,16 @@ class InventoryManagementApp:
             return
 
         try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-
-            # Обновление остатков товаров
-            cursor.execute('''
-                SELECT product_id, quantity
-                FROM supply_items
-                WHERE supply_id = ?
-            ''', (supply_id,))
-            items = cursor.fetchall()
-            for product_id, quantity in items:
-                cursor.execute('''
-                    UPDATE inventory
-                    SET quantity = quantity + ?
-                    WHERE product_id = ?
-                ''', (quantity, product_id))
-
-            # Обновление статуса поставки
-            cursor.execute('''
-                UPDATE supplies
-                SET status = "Доставлено"
-                WHERE id = ?
-            ''', (supply_id,))
-            conn.commit()
-            conn.close()
+            received = self.services.supplies.receive_supply(self.db, supply_id)
+            if received is None:
+                messagebox.showinfo("Информация", "Эта поставка уже завершена.")
+                return
 
             messagebox.showinfo("Успех", "Поставка успешно завершена. Остатки обновлены.")
             self.load_supplies()
+            self.load_low_stock_count()
+        except ValueError as e:
+            messagebox.showerror("Ошибка", str(e))
         except sqlite3.Error as e:
             messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
 
@@ -1741,124 +2159,120 @@ class InventoryManagementApp:
         Button(report_frame, text="Отчет по поставкам", command=self.generate_supply_report).pack(side=LEFT, padx=5)
         Button(report_frame, text="Отчет по движению товаров", command=self.generate_stock_movement_report).pack(side=LEFT, padx=5)
 
-        # Поле для вывода отчета
+        # Параметры отчета по поставкам
+        supply_filter_frame = Frame(self.main_frame)
+        supply_filter_frame.pack(pady=5)
+        Label(supply_filter_frame, text="Поставки с (YYYY-MM-DD):").pack(side=LEFT, padx=5)
+        self.report_date_from = Entry(supply_filter_frame, width=12)
+        self.report_date_from.pack(side=LEFT, padx=5)
+        Label(supply_filter_frame, text="по:").pack(side=LEFT, padx=5)
+        self.report_date_to = Entry(supply_filter_frame, width=12)
+        self.report_date_to.pack(side=LEFT, padx=5)
+        Label(supply_filter_frame, text="Поставщик:").pack(side=LEFT, padx=5)
+        self.report_supplier = Entry(supply_filter_frame, width=15)
+        self.report_supplier.pack(side=LEFT, padx=5)
+        Label(supply_filter_frame, text="Статус:").pack(side=LEFT, padx=5)
+        self.report_status = Entry(supply_filter_frame, width=12)
+        self.report_status.pack(side=LEFT, padx=5)
+
+        # Выгрузка полного отчета в файл
+        export_frame = Frame(self.main_frame)
+        export_frame.pack(pady=5)
+        Label(export_frame, text="Экспорт отчета:").pack(side=LEFT, padx=5)
+        self.export_report_var = StringVar(value="Остатки")
+        ttk.Combobox(
+            export_frame, textvariable=self.export_report_var, state="readonly",
+            values=["Остатки", "Поставки", "Движение товаров"],
+        ).pack(side=LEFT, padx=5)
+        Button(export_frame, text="Экспорт в файл (CSV/JSONL)", command=self.export_report).pack(side=LEFT, padx=5)
+
+        # Поле для вывода отчета (на экране - только первые строки)
         self.report_text = Text(self.main_frame, wrap=WORD, width=100, height=30)
         self.report_text.pack(pady=10, fill=BOTH, expand=True)
 
     def display_report(self, content):
         """Вывод отчета в текстовом поле."""
+        if not self.report_text.winfo_exists():
+            return
         self.report_text.delete(1.0, END)
         self.report_text.insert(END, content)
 
-    def generate_stock_report(self):
-        """Генерация отчета по остаткам."""
-        try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-
-            # Получение данных об остатках
-            cursor.execute('''
-                SELECT p.name, p.sku, i.quantity, p.min_stock
-                FROM products p
-                LEFT JOIN inventory i ON p.id = i.product_id
-            ''')
-            rows = cursor.fetchall()
-            conn.close()
-
-            # Формирование отчета
-            report = "Отчет по остаткам товаров\n"
-            report += "-" * 50 + "\n"
-            report += f"{'Название':<20} {'Артикул':<10} {'Остаток':<10} {'Мин. остаток':<10}\n"
-            report += "-" * 50 + "\n"
-            for row in rows:
-                name, sku, quantity, min_stock = row
-                quantity = quantity if quantity is not None else 0
-                warning = " ⚠️" if quantity < min_stock else ""
-                report += f"{name:<20} {sku:<10} {quantity:<10} {min_stock:<10}{warning}\n"
-            report += "-" * 50 + "\n"
+    def export_report(self):
+        """Выгрузка выбранного отчета целиком в CSV или JSON Lines."""
+        report = self.export_report_var.get()
+        if report == "Поставки":
+            query, params = self.services.reports.supply_report_query(
+                self.report_date_from.get().strip(), self.report_date_to.get().strip(),
+                self.report_supplier.get().strip(), self.report_status.get().strip(),
+            )
+            self.export_to_file(query, params, self.services.reports.SUPPLY_REPORT_COLUMNS)
+        elif report == "Движение товаров":
+            self.export_to_file(self.services.inventory.STOCK_MOVEMENT_QUERY, (), self.services.inventory.STOCK_MOVEMENT_COLUMNS)
+        else:
+            self.export_to_file(self.services.reports.STOCK_REPORT_QUERY, (), self.services.reports.STOCK_REPORT_COLUMNS)
 
-            self.display_report(report)
-        except sqlite3.Error as e:
-            messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+    def generate_stock_report(self):
+        """Генерация отчета по остаткам (в фоновом потоке)."""
+        self.executor.submit("report", self.services.reports.build_stock_report, self.db, None, PREVIEW_ROWS,
+                             on_done=self.display_report, on_error=self.show_db_error)
 
     def generate_supply_report(self):
-        """Генерация отчета по поставкам."""
-        try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-
-            # Получение данных о поставках
-            cursor.execute('''
-                SELECT s.id, sp.name AS supplier, s.date, s.status
-                FROM supplies s
-                LEFT JOIN suppliers sp ON s.supplier_id = sp.id
-                ORDER BY s.date DESC
-            ''')
-            supplies = cursor.fetchall()
-
-            # Формирование отчета
-            report = "Отчет по поставкам\n"
-            report += "-" * 50 + "\n"
-            report += f"{'ID':<5} {'Поставщик':<20} {'Дата':<15} {'Статус':<10}\n"
-            report += "-" * 50 + "\n"
-            for supply in supplies:
-                supply_id, supplier, date, status = supply
-                report += f"{supply_id:<5} {supplier:<20} {date:<15} {status:<10}\n"
-
-                # Получение товаров в поставке
-                cursor.execute('''
-                    SELECT p.name, i.quantity
-                    FROM supply_items i
-                    JOIN products p ON i.product_id = p.id
-                    WHERE i.supply_id = ?
-                ''', (supply_id,))
-                items = cursor.fetchall()
-                for item in items:
-                    product_name, quantity = item
-                    report += f"    - {product_name} (Количество: {quantity})\n"
-
-            report += "-" * 50 + "\n"
-            conn.close()
-
-            self.display_report(report)
-        except sqlite3.Error as e:
-            messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+        """Генерация отчета по поставкам (в фоновом потоке)."""
+        self.executor.submit(
+            "report", self.services.reports.build_supply_report, self.db,
+            self.report_date_from.get().strip(), self.report_date_to.get().strip(),
+            self.report_supplier.get().strip(), self.report_status.get().strip(),
+            None, PREVIEW_ROWS,
+            on_done=self.display_report, on_error=self.show_db_error,
+        )
 
     def generate_stock_movement_report(self):
-        """Генерация отчета по движению товаров."""
-        try:
-            conn = sqlite3.connect("inventory_system.db")
-            cursor = conn.cursor()
-
-            # Получение данных о движении товаров
-            cursor.execute('''
-                SELECT sh.date, p.name, sh.quantity_change, sh.change_reason
-                FROM stock_history sh
-                JOIN products p ON sh.product_id = p.id
-                ORDER BY sh.date DESC
-            ''')
-            movements = cursor.fetchall()
-            conn.close()
-
-            # Формирование отчета
-            report = "Отчет по движению товаров\n"
-            report += "-" * 50 + "\n"
-            report += f"{'Дата':<20} {'Название':<20} {'Изменение':<10} {'Причина':<15}\n"
-            report += "-" * 50 + "\n"
-            for movement in movements:
-                date, product_name, quantity_change, reason = movement
-                report += f"{date:<20} {product_name:<20} {quantity_change:<10} {reason:<15}\n"
-            report += "-" * 50 + "\n"
-
-            self.display_report(report)
-        except sqlite3.Error as e:
-            messagebox.showerror("Ошибка", f"Ошибка базы данных: {e}")
+        """Генерация отчета по движению товаров (в фоновом потоке)."""
+        self.executor.submit("report", self.services.reports.build_stock_movement_report, self.db, None, PREVIEW_ROWS,
+                             on_done=self.display_report, on_error=self.show_db_error)
+
+    # === Выгрузка в файлы ===
+    def show_client_mode_note(self):
+        """Сообщение о недоступной в режиме клиента выгрузке."""
+        messagebox.showinfo("Информация", "Выгрузка в файл выполняется на компьютере с базой данных.")
+
+    def export_to_file(self, query, params, columns):
+        """Потоковая выгрузка результата запроса в CSV или JSON Lines (в фоновом потоке)."""
+        if self.client_mode:
+            self.show_client_mode_note()
+            return
+        path = filedialog.asksaveasfilename(
+            title="Экспорт",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")],
+        )
+        if not path:
+            return
 
+        def show_result(count):
+            messagebox.showinfo("Экспорт завершен", f"Выгружено строк: {count}\n{path}")
 
+        def show_error(error):
+            if isinstance(error, OSError):
+                messagebox.showerror("Ошибка", f"Не удалось записать файл: {error}")
+            else:
+                self.show_db_error(error)
+
+        self.executor.submit("export", export_query, self.db, query, params, list(columns),
+                             path, on_done=show_result, on_error=show_error)
 
 
 # Запуск приложения
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Система управления запасами.")
+    parser.add_argument("--db", help="путь к базе данных")
+    parser.add_argument("--server", help="адрес HTTP API (режим клиента), например http://127.0.0.1:8765")
+    args = parser.parse_args()
+
     root = Tk()
-    app = InventoryManagementApp(root)
-    root.mainloop()
\ No newline at end of file
+    app = InventoryManagementApp(root, Database(args.db) if args.db else None, args.server)
+    root.mainloop()
+    app.executor.shutdown()
+    if app.recorder is not None:
+        app.recorder.close()
+    app.db.close()
\ No newline at end of file
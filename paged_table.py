@@ -0,0 +1,171 @@
+from tkinter import *
+from tkinter import ttk, messagebox
+import sqlite3
+
+from services.paging import page_query
+
+
+class PagedTable:
+    """Постраничная таблица поверх ttk.Treeview.
+
+    Строки подгружаются из базы страницами по мере прокрутки (keyset-пагинация
+    по паре «значение сортировки, ключ»), сортировка и фильтры выполняются в SQL.
+    В виджет попадают только просмотренные страницы, а не вся выборка.
+    Если передан executor, страницы запрашиваются в фоновом потоке.
+    Вместо SQL страницы может поставлять функция (см. load_source), например
+    клиент HTTP API.
+    """
+
+    def __init__(self, parent, db, columns, select, from_clause, key, sort_columns,
+                 page_size=200, row_tags=None, height=15, width=120, executor=None, descending=False,
+                 displaycolumns="#all"):
+        self.db = db
+        self.executor = executor
+        self.select = select
+        self.from_clause = from_clause
+        self.key = key
+        self.sort_columns = sort_columns
+        self.page_size = page_size
+        self.row_tags = row_tags
+
+        self.joins = ""
+        self.join_params = []
+        self.where = []
+        self.params = []
+        self.default_sort = None
+        self.source = None
+        self.sort_column = None
+        self.descending = descending
+        self.last_key = None
+        self.exhausted = True
+        self.loading = False
+
+        # Таблица и полоса прокрутки
+        self.frame = Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=columns, displaycolumns=displaycolumns, show="headings",
+                                 height=height)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.on_scroll)
+        self.scrollbar.pack(side=RIGHT, fill=Y)
+        self.tree.pack(side=LEFT, fill=BOTH, expand=True)
+
+        for col in columns:
+            command = (lambda c=col: self.sort(c)) if col in sort_columns else ""
+            self.tree.heading(col, text=col, command=command)
+            self.tree.column(col, anchor="center", width=width)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def load(self, where=(), params=(), joins="", join_params=(), default_sort=None):
+        """Перезагрузка таблицы с новыми условиями WHERE.
+
+        joins - дополнительные JOIN к from_clause (например, результат поиска),
+        default_sort - выражение сортировки, пока пользователь не выбрал колонку.
+        """
+        self.where = list(where)
+        self.params = list(params)
+        self.joins = joins
+        self.join_params = list(join_params)
+        self.default_sort = default_sort
+        self.source = None
+        self.reload()
+
+    def load_source(self, source):
+        """Перезагрузка таблицы со страницами из source.
+
+        source(sort_column, descending, last_key, limit) возвращает строки в
+        том же виде, что и SQL-запрос страницы: две последние колонки -
+        значения сортировки и ключа.
+        """
+        self.source = source
+        self.reload()
+
+    def reload(self):
+        """Сброс загруженных страниц и загрузка первой страницы."""
+        self.tree.delete(*self.tree.get_children())
+        self.last_key = None
+        self.exhausted = False
+        # Незавершенный запрос прежней выборки будет вытеснен новым
+        self.loading = False
+        self.fetch_page()
+
+    def build_query(self):
+        """SQL-запрос следующей страницы и его параметры."""
+        return page_query(
+            self.select, self.from_clause, self.key, self.sort_expression(), self.descending,
+            self.where, self.params, self.joins, self.join_params, self.last_key, self.page_size,
+        )
+
+    def export_query(self):
+        """Запрос всей текущей выборки (без разбиения на страницы) для выгрузки."""
+        return page_query(
+            self.select, self.from_clause, self.key, self.sort_expression(), self.descending,
+            self.where, self.params, self.joins, self.join_params, with_keys=False,
+        )
+
+    def sort_expression(self):
+        """SQL-выражение текущей сортировки."""
+        return self.sort_columns.get(self.sort_column) or self.default_sort or self.key
+
+    def fetch_page(self):
+        """Загрузка следующей страницы в конец таблицы."""
+        if self.exhausted or self.loading:
+            return
+        self.loading = True
+        if self.source is not None:
+            func, args = self.source, (self.sort_column, self.descending, self.last_key, self.page_size)
+        else:
+            func, args = self.db.fetchall, self.build_query()
+        if self.executor is not None:
+            self.executor.submit(str(self.tree), func, *args,
+                                 on_done=self.show_page, on_error=self.show_error)
+            return
+        try:
+            rows = func(*args)
+        except sqlite3.Error as e:
+            self.show_error(e)
+            return
+        self.show_page(rows)
+
+    def show_page(self, rows):
+        """Добавление загруженной страницы в таблицу."""
+        self.loading = False
+        if not self.tree.winfo_exists():
+            return
+        for row in rows:
+            values = row[:-2]
+            tags = self.row_tags(values) if self.row_tags else ()
+            self.tree.insert("", "end", values=values, tags=tags)
+        if rows:
+            self.last_key = rows[-1][-2:]
+        if len(rows) < self.page_size:
+            self.exhausted = True
+
+    def show_error(self, error):
+        """Сообщение об ошибке загрузки страницы."""
+        self.loading = False
+        self.exhausted = True
+        messagebox.showerror("Ошибка", f"Ошибка базы данных: {error}")
+
+    def on_scroll(self, first, last):
+        """Догрузка страницы, когда прокрутка подходит к концу загруженных строк."""
+        self.scrollbar.set(first, last)
+        if not self.exhausted and float(last) >= 0.9:
+            self.tree.after_idle(self.fetch_page)
+
+    def sort(self, column):
+        """Сортировка по колонке в базе данных с визуальной индикацией."""
+        if self.sort_column == column:
+            self.descending = not self.descending
+        else:
+            self.sort_column = column
+            self.descending = False
+
+        # Сброс стрелок и установка стрелки для текущей колонки
+        for col in self.tree["columns"]:
+            self.tree.heading(col, text=col)
+        arrow = "↓" if self.descending else "↑"
+        self.tree.heading(column, text=f"{column} {arrow}")
+
+        self.reload()
@@ -0,0 +1,156 @@
+import argparse
+import csv
+import time
+
+from database import DB_PATH, Database, retry_on_busy
+from initialize_db import upgrade_database
+
+# Колонки CSV-файла; обязательные должны быть заполнены в каждой строке
+IMPORT_COLUMNS = ["name", "description", "category", "sku", "manufacturer",
+                  "purchase_price", "retail_price", "min_stock", "supplier"]
+REQUIRED_COLUMNS = ["name", "sku", "purchase_price", "retail_price", "min_stock"]
+
+
+class ImportResult:
+    """Итоги импорта: число загруженных строк, отклоненные строки и скорость."""
+
+    def __init__(self):
+        self.imported = 0
+        self.rejected = []
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.imported / self.elapsed if self.elapsed else 0.0
+
+    def summary(self, max_rejected=10):
+        """Текстовый отчет об импорте."""
+        lines = [
+            f"Загружено товаров: {self.imported}",
+            f"Отклонено строк: {len(self.rejected)}",
+            f"Время: {self.elapsed:.2f} с ({self.rows_per_second:.0f} строк/с)",
+        ]
+        for line_number, reason in self.rejected[:max_rejected]:
+            lines.append(f"  строка {line_number}: {reason}")
+        if len(self.rejected) > max_rejected:
+            lines.append(f"  ... и еще {len(self.rejected) - max_rejected}")
+        return "\n".join(lines)
+
+
+def load_name_map(db, table):
+    """Словарь название -> id для справочника (categories или suppliers)."""
+    return {name: id_ for id_, name in db.fetchall(f"SELECT id, name FROM {table}")}
+
+
+def parse_row(row, categories, suppliers):
+    """Проверка строки CSV и преобразование ее в параметры INSERT.
+
+    Возвращает кортеж значений для products или бросает ValueError с причиной.
+    """
+    values = {col: (row.get(col) or "").strip() for col in IMPORT_COLUMNS}
+    missing = [col for col in REQUIRED_COLUMNS if not values[col]]
+    if missing:
+        raise ValueError(f"не заполнены поля: {', '.join(missing)}")
+
+    category_id = None
+    if values["category"]:
+        category_id = categories.get(values["category"])
+        if category_id is None:
+            raise ValueError(f"категория '{values['category']}' не существует")
+    supplier_id = None
+    if values["supplier"]:
+        supplier_id = suppliers.get(values["supplier"])
+        if supplier_id is None:
+            raise ValueError(f"поставщик '{values['supplier']}' не существует")
+
+    try:
+        purchase_price = float(values["purchase_price"].replace(",", "."))
+        retail_price = float(values["retail_price"].replace(",", "."))
+        min_stock = int(values["min_stock"])
+    except ValueError:
+        raise ValueError("некорректная цена или минимальный остаток")
+
+    return (values["name"], values["description"], category_id, values["sku"], values["manufacturer"],
+            purchase_price, retail_price, min_stock, supplier_id)
+
+
+@retry_on_busy
+def write_chunk(db, chunk):
+    """Загрузка пачки товаров одной транзакцией (UPSERT по артикулу)."""
+    with db.transaction() as cursor:
+        cursor.executemany('''
+            INSERT INTO products (name, description, category_id, sku, manufacturer,
+                                  purchase_price, retail_price, min_stock, supplier_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (sku) DO UPDATE SET
+                name = excluded.name, description = excluded.description,
+                category_id = excluded.category_id, manufacturer = excluded.manufacturer,
+                purchase_price = excluded.purchase_price, retail_price = excluded.retail_price,
+                min_stock = excluded.min_stock, supplier_id = excluded.supplier_id
+        ''', chunk)
+
+        # Строки остатков для новых товаров
+        cursor.executemany('''
+            INSERT INTO inventory (product_id, quantity, last_updated)
+            SELECT id, 0, datetime('now') FROM products WHERE sku = ?
+            ON CONFLICT (product_id) DO NOTHING
+        ''', [(values[3],) for values in chunk])
+
+
+def import_products(db, csv_file, chunk_size=1000, delimiter=","):
+    """Потоковый импорт товаров из CSV-файла (путь или открытый файл).
+
+    Строки читаются по одной, проверяются и записываются пачками по chunk_size,
+    поэтому объем памяти не зависит от размера каталога.
+    """
+    result = ImportResult()
+    started = time.perf_counter()
+    categories = load_name_map(db, "categories")
+    suppliers = load_name_map(db, "suppliers")
+
+    close_file = isinstance(csv_file, str)
+    source = open(csv_file, newline="", encoding="utf-8-sig") if close_file else csv_file
+    try:
+        reader = csv.DictReader(source, delimiter=delimiter)
+        chunk = []
+        for row in reader:
+            try:
+                chunk.append(parse_row(row, categories, suppliers))
+            except ValueError as e:
+                result.rejected.append((reader.line_num, str(e)))
+                continue
+            if len(chunk) >= chunk_size:
+                write_chunk(db, chunk)
+                result.imported += len(chunk)
+                chunk = []
+        if chunk:
+            write_chunk(db, chunk)
+            result.imported += len(chunk)
+    finally:
+        if close_file:
+            source.close()
+
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def main():
+    """Импорт каталога товаров из командной строки."""
+    parser = argparse.ArgumentParser(description="Импорт товаров из CSV-файла.")
+    parser.add_argument("csv_file", help="путь к CSV-файлу с колонками: " + ", ".join(IMPORT_COLUMNS))
+    parser.add_argument("--db", default=DB_PATH, help="путь к базе данных")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="строк в одной транзакции")
+    parser.add_argument("--delimiter", default=",", help="разделитель полей")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    try:
+        upgrade_database(db.connect())
+        result = import_products(db, args.csv_file, args.chunk_size, args.delimiter)
+    finally:
+        db.close()
+    print(result.summary())
+
+
+if __name__ == "__main__":
+    main()
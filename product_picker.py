@@ -0,0 +1,156 @@
+from tkinter import *
+from tkinter import messagebox
+import sqlite3
+
+
+class ProductPicker:
+    """Выбор товара по началу названия или артикула (поле ввода со списком вариантов).
+
+    Варианты ищет функция search(prefix), возвращающая строки (id, название,
+    артикул), например services.products.search_products. Поиск запускается
+    после паузы в наборе; если передан executor - в фоновом потоке.
+    Выбранный товар определяется по id (product_id), а не по названию.
+    Enter выбирает первый вариант для текущего текста: если список еще
+    не найден для него, выбор выполняется после поиска.
+    """
+
+    # Клавиши, не меняющие текст поля
+    NAVIGATION_KEYS = ("Up", "Down", "Return", "Escape", "Tab", "Left", "Right", "Home", "End",
+                       "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R")
+
+    def __init__(self, parent, search, executor=None, width=30, height=6, delay=150, on_select=None):
+        self.search = search
+        self.executor = executor
+        self.delay = delay
+        self.on_select = on_select
+        self.product_id = None
+        self.matches = []
+        self.matches_prefix = None
+        self.pending = None
+        self.choose_first = False
+
+        self.frame = Frame(parent)
+        self.var = StringVar()
+        self.entry = Entry(self.frame, textvariable=self.var, width=width)
+        self.entry.pack(fill=X)
+        self.listbox = Listbox(self.frame, width=width, height=height, exportselection=False)
+
+        self.entry.bind("<KeyRelease>", self.on_key)
+        self.entry.bind("<Down>", self.focus_list)
+        self.entry.bind("<Return>", self.on_return)
+        self.entry.bind("<Escape>", lambda event: self.hide_list())
+        self.listbox.bind("<Return>", lambda event: self.choose_selected())
+        self.listbox.bind("<Double-1>", lambda event: self.choose_selected())
+        self.listbox.bind("<Escape>", lambda event: self.entry.focus_set())
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def get(self):
+        """ID выбранного товара или None."""
+        return self.product_id
+
+    def display_name(self):
+        """Название выбранного товара, как оно показано в поле."""
+        return self.var.get()
+
+    def clear(self):
+        """Сброс выбора и текста поля."""
+        self.product_id = None
+        self.var.set("")
+        self.hide_list()
+
+    def on_key(self, event):
+        """Отложенный поиск после изменения текста."""
+        if event.keysym in self.NAVIGATION_KEYS:
+            return
+        self.product_id = None
+        self.choose_first = False
+        if self.pending is not None:
+            self.entry.after_cancel(self.pending)
+        self.pending = self.entry.after(self.delay, self.run_search)
+
+    def on_return(self, event):
+        """Выбор первого варианта; устаревший список сначала ищется заново."""
+        if self.product_id is not None:
+            return
+        if self.pending is None and self.matches_prefix == self.var.get():
+            self.choose(0)
+            return
+        if self.pending is not None:
+            self.entry.after_cancel(self.pending)
+        self.choose_first = True
+        self.run_search()
+
+    def run_search(self):
+        """Поиск вариантов по текущему тексту поля."""
+        self.pending = None
+        prefix = self.var.get()
+        if not prefix.strip():
+            self.show_matches([], prefix)
+            return
+        if self.executor is not None:
+            self.executor.submit(str(self.entry), self.search, prefix,
+                                 on_done=lambda matches: self.show_matches(matches, prefix),
+                                 on_error=self.show_error)
+            return
+        try:
+            matches = self.search(prefix)
+        except sqlite3.Error as e:
+            self.show_error(e)
+            return
+        self.show_matches(matches, prefix)
+
+    def show_matches(self, matches, prefix):
+        """Заполнение списка вариантами, найденными для текста prefix."""
+        if not self.frame.winfo_exists() or self.product_id is not None or prefix != self.var.get():
+            return
+        self.matches = list(matches)
+        self.matches_prefix = prefix
+        self.listbox.delete(0, END)
+        for _, name, sku in self.matches:
+            self.listbox.insert(END, f"{name} ({sku})")
+        if self.matches:
+            self.listbox.pack(fill=X)
+        else:
+            self.hide_list()
+        if self.choose_first:
+            self.choose_first = False
+            self.choose(0)
+
+    def hide_list(self):
+        self.listbox.pack_forget()
+
+    def focus_list(self, event=None):
+        """Переход с поля ввода к списку вариантов."""
+        if self.matches:
+            self.listbox.focus_set()
+            self.listbox.selection_clear(0, END)
+            self.listbox.selection_set(0)
+            self.listbox.activate(0)
+
+    def choose_selected(self):
+        selection = self.listbox.curselection()
+        if selection:
+            self.product_id = None
+            self.choose(selection[0])
+
+    def choose(self, index):
+        """Выбор товара из списка вариантов по номеру строки."""
+        if self.product_id is not None or index >= len(self.matches):
+            return
+        self.product_id, name, sku = self.matches[index]
+        self.var.set(f"{name} ({sku})")
+        self.entry.icursor(END)
+        self.hide_list()
+        self.entry.focus_set()
+        if self.on_select is not None:
+            self.on_select(self.product_id)
+
+    def show_error(self, error):
+        """Сообщение об ошибке поиска."""
+        self.choose_first = False
+        messagebox.showerror("Ошибка", f"Ошибка базы данных: {error}")
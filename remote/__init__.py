@@ -0,0 +1,6 @@
+"""Режим клиента: функции services, выполняемые через HTTP API сервера.
+
+Функции модулей повторяют сигнатуры services, но первым аргументом
+принимают ApiClient вместо Database.
+"""
+from remote import categories, forecast, inventory, ledger, notifications, products, reorder, reports, suppliers, supplies
@@ -0,0 +1,37 @@
+import json
+
+from services.categories import CATEGORY_COLUMNS, CATEGORY_FROM, CATEGORY_QUERY, CATEGORY_SELECT, CATEGORY_SORT_COLUMNS
+
+
+def list_categories(client):
+    return [row[:-2] for row in client.get_all("/categories")]
+
+
+def list_category_page(client, sort_column=None, descending=False, last_key=None, limit=200):
+    params = {
+        "sort": sort_column,
+        "desc": "1" if descending else None,
+        "after": json.dumps(list(last_key)) if last_key is not None else None,
+        "limit": limit,
+    }
+    return client.get("/categories", params)["items"]
+
+
+def category_names(client):
+    return [row[1] for row in list_categories(client)]
+
+
+def add_category(client, name, description=""):
+    return client.post("/categories", {"name": name, "description": description})["id"]
+
+
+def update_category(client, category_id, name, description=""):
+    client.put(f"/categories/{category_id}", {"name": name, "description": description})
+
+
+def product_count(client, category_id):
+    return client.get(f"/categories/{category_id}/product-count")["count"]
+
+
+def delete_category(client, category_id):
+    client.delete(f"/categories/{category_id}")
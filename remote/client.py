@@ -0,0 +1,148 @@
+import http.client
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from urllib.parse import urlencode, urlsplit
+
+# Сколько ответов GET хранить для повторных запросов с If-None-Match
+CACHE_SIZE = 256
+
+# Размер страницы при чтении списков целиком
+PAGE_SIZE = 1000
+
+
+class ApiError(sqlite3.Error):
+    """Ошибка сервера или сети.
+
+    Наследует sqlite3.Error, чтобы окна приложения показывали ее так же,
+    как ошибку базы данных при прямой работе.
+    """
+
+
+class ApiClient:
+    """Клиент HTTP API (server.py) для работы терминала в режиме клиента.
+
+    У каждого потока свое постоянное соединение с сервером (keep-alive).
+    Ответы GET запоминаются вместе с ETag: повторный запрос уходит с
+    If-None-Match, и неизменившиеся данные сервер повторно не передает.
+    """
+
+    def __init__(self, base_url, timeout=10.0):
+        url = urlsplit(base_url)
+        self.base_url = base_url
+        self.host = url.hostname or "127.0.0.1"
+        self.port = url.port or 80
+        self.prefix = url.path.rstrip("/")
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._cache = OrderedDict()
+
+    def connection(self):
+        """Соединение текущего потока (открывается при первом обращении)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+                self.connections_opened += 1
+        return conn
+
+    def reset_connection(self):
+        """Закрытие соединения текущего потока после сетевой ошибки."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def send(self, method, url, data, headers):
+        """Отправка запроса; GET, PUT и DELETE повторяются один раз на новом
+        соединении, если сервер успел закрыть старое."""
+        attempts = 1 if method == "POST" else 2
+        for attempt in range(attempts):
+            try:
+                conn = self.connection()
+                conn.request(method, url, body=data, headers=headers)
+                response = conn.getresponse()
+                return response, response.read()
+            except (OSError, http.client.HTTPException) as e:
+                self.reset_connection()
+                if attempt == attempts - 1:
+                    raise ApiError(f"Сервер {self.base_url} недоступен: {e}")
+
+    def request(self, method, path, params=None, body=None):
+        """Запрос к API; возвращает разобранный JSON ответа.
+
+        Ошибки проверки данных (400, 404) поднимаются как ValueError с текстом
+        сервера, остальные ошибки - как ApiError.
+        """
+        url = self.prefix + path
+        if params:
+            params = {key: value for key, value in params.items() if value not in (None, "")}
+            if params:
+                url += "?" + urlencode(params)
+        headers = {"Accept": "application/json"}
+        cached = None
+        if method == "GET":
+            with self._lock:
+                cached = self._cache.get(url)
+            if cached is not None:
+                headers["If-None-Match"] = cached[0]
+        data = None
+        if body is not None:
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            headers["Content-Type"] = "application/json; charset=utf-8"
+
+        response, payload = self.send(method, url, data, headers)
+        if response.status == 304 and cached is not None:
+            return cached[1]
+        result = json.loads(payload) if payload else None
+        if response.status >= 400:
+            message = result.get("error") if isinstance(result, dict) else response.reason
+            if response.status in (400, 404):
+                raise ValueError(message)
+            raise ApiError(message)
+
+        etag = response.getheader("ETag")
+        if method == "GET" and etag:
+            with self._lock:
+                self._cache[url] = (etag, result)
+                self._cache.move_to_end(url)
+                if len(self._cache) > CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        return result
+
+    def get(self, path, params=None):
+        return self.request("GET", path, params)
+
+    def post(self, path, body=None):
+        return self.request("POST", path, body=body or {})
+
+    def put(self, path, body=None):
+        return self.request("PUT", path, body=body or {})
+
+    def delete(self, path):
+        return self.request("DELETE", path)
+
+    def get_all(self, path, params=None):
+        """Все строки постраничного списка (страницы читаются по next)."""
+        params = dict(params or {}, limit=PAGE_SIZE)
+        rows = []
+        while True:
+            page = self.get(path, params)
+            rows.extend(page["items"])
+            if page["next"] is None:
+                return rows
+            params["after"] = json.dumps(page["next"])
+
+    def close(self):
+        """Закрытие всех открытых соединений."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
@@ -0,0 +1,8 @@
+from services.forecast import AVERAGE_DAYS, FORECAST_COLUMNS, HISTORY_DAYS, SMOOTHING, VECTORIZED
+
+
+def forecast_catalog(client, history_days=HISTORY_DAYS, average_days=AVERAGE_DAYS, smoothing=SMOOTHING, limit=None):
+    params = {"history_days": history_days, "average_days": average_days, "smoothing": smoothing}
+    if limit:
+        params["limit"] = limit
+    return client.get("/forecast", params)["items"]
@@ -0,0 +1,58 @@
+import json
+
+from services.inventory import (HISTORY_FROM, HISTORY_SELECT, INVENTORY_COLUMNS, INVENTORY_FROM, INVENTORY_QUERY,
+                                INVENTORY_SELECT, INVENTORY_SORT_COLUMNS, LOW_STOCK_COLUMNS, LOW_STOCK_QUERY,
+                                STOCK_MOVEMENT_COLUMNS, STOCK_MOVEMENT_QUERY, history_filter, parse_count)
+
+
+def list_inventory(client):
+    return [row[:-2] for row in client.get_all("/inventory")]
+
+
+def list_inventory_page(client, sort_column=None, descending=False, last_key=None, limit=200):
+    params = {
+        "sort": sort_column,
+        "desc": "1" if descending else None,
+        "after": json.dumps(list(last_key)) if last_key is not None else None,
+        "limit": limit,
+    }
+    return client.get("/inventory", params)["items"]
+
+
+def list_stock_history(client, product_id=None, product="", date_from="", date_to="", reason="",
+                       last_key=None, limit=200):
+    params = {
+        "product_id": product_id,
+        "product": product,
+        "from": date_from,
+        "to": date_to,
+        "reason": reason,
+        "after": json.dumps(list(last_key)) if last_key is not None else None,
+        "limit": limit,
+    }
+    return client.get("/inventory/history", params)["items"]
+
+
+def move_stock(client, product_id, delta, reason, expected_version=None):
+    result = client.post(f"/inventory/{product_id}/move",
+                         {"delta": delta, "reason": reason, "version": expected_version})
+    return result["quantity"], result["version"]
+
+
+def adjust_stock(client, product_id, new_quantity, reason, expected_version=None):
+    result = client.post(f"/inventory/{product_id}/adjust",
+                         {"quantity": new_quantity, "reason": reason, "version": expected_version})
+    return result["quantity"], result["version"]
+
+
+def apply_stock_counts(client, counts, reason, recount=False):
+    result = client.post("/inventory/counts", {"counts": list(counts.items()), "reason": reason, "recount": recount})
+    return [tuple(row) for row in result["items"]]
+
+
+def list_low_stock(client):
+    return client.get("/inventory/low")["items"]
+
+
+def low_stock_count(client):
+    return client.get("/inventory/low/count")["count"]
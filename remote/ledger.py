@@ -0,0 +1,27 @@
+import json
+
+from services.ledger import (LEDGER_CHECK_COLUMNS, STOCK_AT_COLUMNS, STOCK_AT_FROM, STOCK_AT_SELECT,
+                             STOCK_AT_SORT_COLUMNS, parse_moment)
+
+
+def stock_at(client, moment, product_id=None):
+    params = {"date": parse_moment(moment)}
+    if product_id is None:
+        return [row[:-2] for row in client.get_all("/inventory/at", params)]
+    params["product_id"] = product_id
+    return client.get("/inventory/at", params)["items"]
+
+
+def stock_at_page(client, moment, sort_column=None, descending=False, last_key=None, limit=200):
+    params = {
+        "date": parse_moment(moment),
+        "sort": sort_column,
+        "desc": "1" if descending else None,
+        "after": json.dumps(list(last_key)) if last_key is not None else None,
+        "limit": limit,
+    }
+    return client.get("/inventory/at", params)["items"]
+
+
+def check_ledger(client):
+    return client.get("/inventory/check")["items"]
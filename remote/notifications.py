@@ -0,0 +1,13 @@
+from services.notifications import NOTIFICATION_COLUMNS, NOTIFICATION_KINDS, NOTIFICATION_QUERY, summarize
+
+
+def latest_notifications(client, limit=200):
+    return client.get("/notifications", {"limit": limit})["items"]
+
+
+def new_notifications(client, after, limit=100):
+    return client.get("/notifications", {"after": after, "limit": limit})["items"]
+
+
+def last_notification_id(client):
+    return client.get("/notifications/last")["id"]
@@ -0,0 +1,78 @@
+import json
+
+from product_import import ImportResult
+from services.products import PICKER_LIMIT, PRODUCT_COLUMNS, PRODUCT_FROM, PRODUCT_SELECT, PRODUCT_SORT_COLUMNS
+
+
+def list_products(client, name_filter="", category_filter="", keywords_filter="", sort_column=None,
+                  descending=False, last_key=None, limit=200, use_index=None):
+    params = {
+        "name": name_filter,
+        "category": category_filter,
+        "q": keywords_filter,
+        "sort": sort_column,
+        "desc": "1" if descending else None,
+        "after": json.dumps(list(last_key)) if last_key is not None else None,
+        "limit": limit,
+    }
+    return client.get("/products", params)["items"]
+
+
+def product_names(client):
+    return [row[1] for row in client.get_all("/products")]
+
+
+def find_product_id(client, name):
+    return client.get("/products/lookup", {"name": name})["id"]
+
+
+def find_product_by_sku(client, sku):
+    result = client.get("/products/lookup", {"sku": sku})
+    return result["id"], result["name"]
+
+
+def find_products_by_sku(client, codes):
+    """Пачка сканов одним запросом к серверу."""
+    items = client.post("/products/lookup", {"skus": list(codes)})["items"]
+    return [tuple(item) if item is not None else None for item in items]
+
+
+def preload_products(client):
+    """Кэш справочников ведет сервер; загружать заранее нечего."""
+
+
+def search_products(client, prefix, limit=PICKER_LIMIT):
+    if not prefix.strip():
+        return []
+    return [tuple(row) for row in client.get("/products/search", {"q": prefix, "limit": limit})["items"]]
+
+
+def product_body(name, description, category, sku, manufacturer, purchase_price, retail_price,
+                 min_stock, supplier):
+    return {"name": name, "description": description, "category": category, "sku": sku,
+            "manufacturer": manufacturer, "purchase_price": purchase_price, "retail_price": retail_price,
+            "min_stock": min_stock, "supplier": supplier}
+
+
+def add_product(client, *fields):
+    return client.post("/products", product_body(*fields))["id"]
+
+
+def update_product(client, product_id, *fields):
+    client.put(f"/products/{product_id}", product_body(*fields))
+
+
+def delete_product(client, product_id):
+    client.delete(f"/products/{product_id}")
+
+
+def import_products(client, csv_file, chunk_size=1000, delimiter=","):
+    """Импорт CSV-файла на сервере; чанки и проверки - как при прямом импорте."""
+    with open(csv_file, newline="", encoding="utf-8-sig") as f:
+        text = f.read()
+    response = client.post("/products/import", {"csv": text, "delimiter": delimiter})
+    result = ImportResult()
+    result.imported = response["imported"]
+    result.rejected = [tuple(item) for item in response["rejected"]]
+    result.elapsed = response["elapsed"]
+    return result
@@ -0,0 +1,9 @@
+from services.reorder import COVER_DAYS, NO_SUPPLIER, REORDER_COLUMNS, REORDER_QUERY, VELOCITY_DAYS
+
+
+def reorder_proposals(client, velocity_days=VELOCITY_DAYS, cover_days=COVER_DAYS):
+    return client.get("/reorder", {"velocity_days": velocity_days, "cover_days": cover_days})["items"]
+
+
+def create_reorder_drafts(client, velocity_days=VELOCITY_DAYS, cover_days=COVER_DAYS):
+    return client.post("/reorder/drafts", {"velocity_days": velocity_days, "cover_days": cover_days})["supplies"]
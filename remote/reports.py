@@ -0,0 +1,23 @@
+from services.reports import (
+    STOCK_REPORT_COLUMNS, STOCK_REPORT_QUERY, SUPPLY_REPORT_COLUMNS, supply_report_query,
+)
+
+
+def report_text(text, out):
+    """Текст отчета: запись в out или возврат строкой, как в services.reports."""
+    if out is None:
+        return text
+    out.write(text)
+
+
+def build_stock_report(client, out=None, limit=None):
+    return report_text(client.get("/reports/stock", {"limit": limit})["text"], out)
+
+
+def build_supply_report(client, date_from="", date_to="", supplier="", status="", out=None, limit=None):
+    params = {"date_from": date_from, "date_to": date_to, "supplier": supplier, "status": status, "limit": limit}
+    return report_text(client.get("/reports/supplies", params)["text"], out)
+
+
+def build_stock_movement_report(client, out=None, limit=None):
+    return report_text(client.get("/reports/movement", {"limit": limit})["text"], out)
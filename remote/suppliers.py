@@ -0,0 +1,39 @@
+import json
+
+from services.suppliers import SUPPLIER_COLUMNS, SUPPLIER_FROM, SUPPLIER_QUERY, SUPPLIER_SELECT, SUPPLIER_SORT_COLUMNS
+
+
+def list_suppliers(client):
+    return [row[:-2] for row in client.get_all("/suppliers")]
+
+
+def list_supplier_page(client, sort_column=None, descending=False, last_key=None, limit=200):
+    params = {
+        "sort": sort_column,
+        "desc": "1" if descending else None,
+        "after": json.dumps(list(last_key)) if last_key is not None else None,
+        "limit": limit,
+    }
+    return client.get("/suppliers", params)["items"]
+
+
+def supplier_names(client):
+    return [row[1] for row in list_suppliers(client)]
+
+
+def find_supplier_id(client, name):
+    return client.get("/suppliers/lookup", {"name": name})["id"]
+
+
+def add_supplier(client, name, contact_person="", phone="", email="", address=""):
+    return client.post("/suppliers", {"name": name, "contact_person": contact_person, "phone": phone,
+                                      "email": email, "address": address})["id"]
+
+
+def update_supplier(client, supplier_id, name, contact_person="", phone="", email="", address=""):
+    client.put(f"/suppliers/{supplier_id}", {"name": name, "contact_person": contact_person, "phone": phone,
+                                             "email": email, "address": address})
+
+
+def delete_supplier(client, supplier_id):
+    client.delete(f"/suppliers/{supplier_id}")
@@ -0,0 +1,72 @@
+import json
+
+from services.supplies import (
+    RECEIPT_COLUMNS, STATUS_CANCELLED, STATUS_DELIVERED, STATUS_DRAFT, STATUS_PARTIAL, STATUS_PENDING, SUPPLY_COLUMNS,
+    SUPPLY_FROM, SUPPLY_LIST_QUERY, SUPPLY_SELECT, SUPPLY_SORT_COLUMNS, SUPPLY_STATUSES, parse_quantity,
+    supply_filter, supply_list_query,
+)
+
+
+def list_supplies(client):
+    return [row[:-2] for row in client.get_all("/supplies")]
+
+
+def supply_history(client):
+    return client.get("/supplies/history")["items"]
+
+
+def filter_supplies(client, supplier="", date="", status=""):
+    return [row[:-2] for row in client.get_all("/supplies", {"supplier": supplier, "date": date, "status": status})]
+
+
+def list_supply_page(client, supplier="", date="", status="", sort_column=None, descending=False,
+                     last_key=None, limit=200):
+    params = {
+        "supplier": supplier,
+        "date": date,
+        "status": status,
+        "sort": sort_column,
+        "desc": "1" if descending else None,
+        "after": json.dumps(list(last_key)) if last_key is not None else None,
+        "limit": limit,
+    }
+    return client.get("/supplies", params)["items"]
+
+
+def supply_items(client, supply_id):
+    return client.get(f"/supplies/{supply_id}/items")["items"]
+
+
+def add_supply(client, supplier, date, status):
+    return client.post("/supplies", {"supplier": supplier, "date": date, "status": status})["id"]
+
+
+def add_supply_item(client, supply_id, product_id, quantity):
+    client.post(f"/supplies/{supply_id}/items", {"product_id": product_id, "quantity": quantity})
+
+
+def create_supply_order(client, supplier_id, items):
+    return client.post("/supplies/orders", {"supplier_id": supplier_id, "items": list(items)})["id"]
+
+
+def confirm_supply_order(client, supply_id):
+    return client.post(f"/supplies/{supply_id}/confirm")["confirmed"]
+
+
+def receive_supply(client, supply_id):
+    return client.post(f"/supplies/{supply_id}/receive")["received"]
+
+
+def supply_lines(client, supply_id):
+    return client.get(f"/supplies/{supply_id}/lines")["items"]
+
+
+def supply_receipts(client, supply_id):
+    return client.get(f"/supplies/{supply_id}/receipts")["items"]
+
+
+def receive_supply_counts(client, supply_id, counts):
+    result = client.post(f"/supplies/{supply_id}/scan", {"counts": list(counts.items())})
+    if result["receipt_id"] is None:
+        return None
+    return result["receipt_id"], result["received"], result["status"]
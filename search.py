@@ -0,0 +1,50 @@
+import re
+import sqlite3
+
+
+def has_product_index(db):
+    """Проверка наличия полнотекстового индекса товаров (products_fts)."""
+    try:
+        row = db.fetchone("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")
+    except sqlite3.Error:
+        return False
+    return row is not None
+
+
+def match_expression(text):
+    """Преобразование строки поиска в выражение FTS5 MATCH.
+
+    Каждое слово ищется по префиксу, все слова должны встретиться в товаре:
+    "мол прост" -> "мол"* "прост"*
+    """
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def product_filter(name_filter="", category_filter="", keywords_filter="", use_index=True):
+    """Условия отбора товаров для таблицы товаров.
+
+    Возвращает (where, params, joins, join_params, default_sort). Ключевые слова
+    ищутся по индексу FTS5, если он есть, иначе - через LIKE.
+    """
+    where = []
+    params = []
+    joins = ""
+    join_params = []
+    default_sort = None
+    if name_filter:
+        where.append("p.name LIKE ?")
+        params.append(f"%{name_filter}%")
+    if category_filter:
+        where.append("c.name LIKE ?")
+        params.append(f"%{category_filter}%")
+    match = match_expression(keywords_filter) if use_index else ""
+    if match:
+        # Поиск по индексу FTS5 по префиксам слов, лучшие совпадения первыми
+        joins = "JOIN (SELECT rowid, rank FROM products_fts WHERE products_fts MATCH ?) f ON f.rowid = p.id"
+        join_params.append(match)
+        default_sort = "f.rank"
+    elif keywords_filter:
+        where.append("(p.name LIKE ? OR p.sku LIKE ? OR c.name LIKE ? OR p.manufacturer LIKE ?)")
+        params.extend([f"%{keywords_filter}%"] * 4)
+    return where, params, joins, join_params, default_sort
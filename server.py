@@ -0,0 +1,564 @@
+import argparse
+import hashlib
+import io
+import json
+import re
+import sqlite3
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from database import DB_PATH, Database
+from initialize_db import upgrade_database
+from product_import import import_products
+from services import categories, forecast, inventory, ledger, notifications, products, reorder, reports, suppliers, supplies
+
+DEFAULT_PORT = 8765
+
+# Период переноса WAL-журнала в файл базы (с)
+CHECKPOINT_INTERVAL = 60
+
+# Размер страницы списков по умолчанию и наибольший допустимый
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class NotFound(Exception):
+    """Запрошенный ресурс не найден (ответ 404)."""
+
+
+class ApiServer(ThreadingHTTPServer):
+    """HTTP API системы управления запасами для нескольких терминалов.
+
+    Все изменения выполняются в одном потоке на одном соединении - писатель
+    у SQLite всегда один, и очередь на стороне сервера не дает терминалам
+    получать "database is locked". Чтения идут в пуле потоков, у каждого
+    свое соединение. Потоки обработки HTTP-запросов с базой не работают.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, db_path=DB_PATH, readers=4):
+        super().__init__(address, ApiHandler)
+        self.reader_db = Database(db_path)
+        self.writer_db = Database(db_path)
+        self.readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="api-reader")
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-writer")
+        self.stopped = threading.Event()
+        # События операций терминалов записываются в журнал уведомлений тем же писателем
+        self.recorder = notifications.NotificationRecorder(self.writer_db, write=self.write)
+        threading.Thread(target=self.checkpoint_loop, name="api-checkpoint", daemon=True).start()
+
+    def read(self, func, *args):
+        """Выполнение func(db, *args) в пуле читателей."""
+        return self.readers.submit(func, self.reader_db, *args).result()
+
+    def write(self, func, *args):
+        """Выполнение func(db, *args) в потоке писателя."""
+        return self.writer.submit(func, self.writer_db, *args).result()
+
+    def checkpoint_loop(self):
+        """Периодический перенос WAL-журнала в файл базы в потоке писателя."""
+        while not self.stopped.wait(CHECKPOINT_INTERVAL):
+            try:
+                self.write(Database.checkpoint)
+            except sqlite3.Error:
+                pass
+
+    def server_close(self):
+        self.stopped.set()
+        super().server_close()
+        # Накопленные уведомления записываются до остановки писателя
+        self.recorder.close()
+        self.readers.shutdown()
+        self.writer.shutdown()
+        self.reader_db.close()
+        self.writer_db.close()
+
+
+def page_limit(query, default=PAGE_SIZE):
+    """Размер страницы из параметра limit."""
+    try:
+        limit = int(query.get("limit", default))
+    except ValueError:
+        raise ValueError("Некорректный параметр limit.")
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def report_limit(query):
+    """Число строк отчета из параметра limit (без параметра - отчет целиком)."""
+    if "limit" not in query:
+        return None
+    try:
+        return max(1, int(query["limit"]))
+    except ValueError:
+        raise ValueError("Некорректный параметр limit.")
+
+
+def page_after(query):
+    """Ключ последней строки страницы из параметра after: JSON-пара [значение, id]."""
+    if "after" not in query:
+        return None
+    try:
+        after = json.loads(query["after"])
+    except ValueError:
+        after = None
+    if not isinstance(after, list) or len(after) != 2 or any(isinstance(value, (list, dict)) for value in after):
+        raise ValueError("Некорректный параметр after.")
+    return after
+
+
+def body_pairs(body, field):
+    """Список пар [id, количество] из поля тела запроса."""
+    pairs = body.get(field, [])
+    if not isinstance(pairs, list) or any(
+            not isinstance(pair, list) or len(pair) != 2 or any(isinstance(value, (list, dict)) for value in pair)
+            for pair in pairs):
+        raise ValueError(f"Поле {field} должно быть списком пар [id, количество].")
+    return pairs
+
+
+def sorted_page(server, query, func, *args):
+    """Страница списка с сортировкой sort/desc и keyset-пагинацией.
+
+    next - пара (значение сортировки, id) для параметра after.
+    """
+    limit = page_limit(query)
+    after = page_after(query)
+    rows = server.read(func, *args, query.get("sort"), query.get("desc") == "1", after, limit)
+    return {"items": rows, "next": rows[-1][-2:] if len(rows) == limit else None}
+
+
+def lookup(server, func, name):
+    """ID записи по названию; 404, если записи нет."""
+    try:
+        return {"id": server.read(func, name)}
+    except ValueError as e:
+        raise NotFound(str(e))
+
+
+# === Обработчики: (server, query, body, *параметры пути) -> данные ответа ===
+
+def get_categories(server, query, body):
+    return sorted_page(server, query, categories.list_category_page)
+
+
+def post_category(server, query, body):
+    return {"id": server.write(categories.add_category, body.get("name", ""), body.get("description", ""))}
+
+
+def put_category(server, query, body, category_id):
+    server.write(categories.update_category, int(category_id), body.get("name", ""), body.get("description", ""))
+    return {}
+
+
+def delete_category(server, query, body, category_id):
+    server.write(categories.delete_category, int(category_id))
+    return {}
+
+
+def get_category_product_count(server, query, body, category_id):
+    return {"count": server.read(categories.product_count, int(category_id))}
+
+
+def get_suppliers(server, query, body):
+    return sorted_page(server, query, suppliers.list_supplier_page)
+
+
+def get_supplier_lookup(server, query, body):
+    return lookup(server, suppliers.find_supplier_id, query.get("name", ""))
+
+
+def supplier_fields(body):
+    return [body.get(field, "") for field in ("name", "contact_person", "phone", "email", "address")]
+
+
+def post_supplier(server, query, body):
+    return {"id": server.write(suppliers.add_supplier, *supplier_fields(body))}
+
+
+def put_supplier(server, query, body, supplier_id):
+    server.write(suppliers.update_supplier, int(supplier_id), *supplier_fields(body))
+    return {}
+
+
+def delete_supplier(server, query, body, supplier_id):
+    server.write(suppliers.delete_supplier, int(supplier_id))
+    return {}
+
+
+def get_products(server, query, body):
+    return sorted_page(server, query, products.list_products, query.get("name", ""), query.get("category", ""),
+                       query.get("q", ""))
+
+
+def get_product_lookup(server, query, body):
+    """ID товара по названию name или ID и название товара по артикулу sku."""
+    if "sku" in query:
+        try:
+            product_id, name = server.read(products.find_product_by_sku, query["sku"])
+        except ValueError as e:
+            raise NotFound(str(e))
+        return {"id": product_id, "name": name}
+    return lookup(server, products.find_product_id, query.get("name", ""))
+
+
+def post_product_lookup(server, query, body):
+    """Товары по списку артикулов skus (пачка сканов): [id, название] или null на каждый код."""
+    codes = body.get("skus", [])
+    if not isinstance(codes, list) or not all(isinstance(code, str) for code in codes):
+        raise ValueError("Поле skus должно быть списком артикулов.")
+    if len(codes) > MAX_PAGE_SIZE:
+        raise ValueError(f"Не более {MAX_PAGE_SIZE} артикулов за запрос.")
+    return {"items": server.read(products.find_products_by_sku, codes)}
+
+
+def get_product_search(server, query, body):
+    """Товары по началу названия или артикула из параметра q."""
+    limit = page_limit(query, products.PICKER_LIMIT)
+    return {"items": server.read(products.search_products, query.get("q", ""), limit)}
+
+
+def product_fields(body):
+    return [body.get(field, "") for field in ("name", "description", "category", "sku", "manufacturer",
+                                               "purchase_price", "retail_price", "min_stock", "supplier")]
+
+
+def post_product(server, query, body):
+    return {"id": server.write(products.add_product, *product_fields(body))}
+
+
+def put_product(server, query, body, product_id):
+    server.write(products.update_product, int(product_id), *product_fields(body))
+    return {}
+
+
+def delete_product(server, query, body, product_id):
+    server.write(products.delete_product, int(product_id))
+    return {}
+
+
+def post_product_import(server, query, body):
+    result = server.write(import_products, io.StringIO(body.get("csv", "")), 1000, body.get("delimiter", ","))
+    return {"imported": result.imported, "rejected": result.rejected, "elapsed": result.elapsed}
+
+
+def get_inventory(server, query, body):
+    return sorted_page(server, query, inventory.list_inventory_page)
+
+
+def get_stock_history(server, query, body):
+    """Страница журнала движения; next - пара (дата, id) для параметра after."""
+    limit = page_limit(query)
+    after = page_after(query)
+    product_id = int(query["product_id"]) if "product_id" in query else None
+    rows = server.read(
+        inventory.list_stock_history, product_id, query.get("product", ""), query.get("from", ""),
+        query.get("to", ""), query.get("reason", ""), after, limit,
+    )
+    return {"items": rows, "next": rows[-1][-2:] if len(rows) == limit else None}
+
+
+def get_low_stock(server, query, body):
+    return {"items": server.read(inventory.list_low_stock)}
+
+
+def get_low_stock_count(server, query, body):
+    return {"count": server.read(inventory.low_stock_count)}
+
+
+def get_stock_at(server, query, body):
+    """Остатки на дату из параметра date: страница каталога или один товар (product_id)."""
+    if "product_id" in query:
+        return {"items": server.read(ledger.stock_at, query.get("date", ""), int(query["product_id"]))}
+    return sorted_page(server, query, ledger.stock_at_page, query.get("date", ""))
+
+
+def get_ledger_check(server, query, body):
+    return {"items": server.read(ledger.check_ledger)}
+
+
+def post_stock_movement(server, query, body, product_id):
+    quantity, version = server.write(inventory.move_stock, int(product_id), body.get("delta"),
+                                     body.get("reason", ""), body.get("version"))
+    return {"quantity": quantity, "version": version}
+
+
+def post_stock_adjustment(server, query, body, product_id):
+    quantity, version = server.write(inventory.adjust_stock, int(product_id), body.get("quantity"),
+                                     body.get("reason", ""), body.get("version"))
+    return {"quantity": quantity, "version": version}
+
+
+def post_stock_counts(server, query, body):
+    """Пачка отсканированных товаров: counts - пары [product_id, количество]."""
+    changes = server.write(inventory.apply_stock_counts, dict(body_pairs(body, "counts")), body.get("reason", ""),
+                           bool(body.get("recount")))
+    return {"items": changes}
+
+
+def get_notifications(server, query, body):
+    """Новые уведомления после id из параметра after или последние уведомления."""
+    limit = page_limit(query)
+    if "after" in query:
+        return {"items": server.read(notifications.new_notifications, int(query["after"]), limit)}
+    return {"items": server.read(notifications.latest_notifications, limit)}
+
+
+def get_last_notification_id(server, query, body):
+    return {"id": server.read(notifications.last_notification_id)}
+
+
+def get_forecast(server, query, body):
+    """Прогноз по каталогу; limit без параметра - весь каталог."""
+    return {"items": server.read(
+        forecast.forecast_catalog, query.get("history_days", forecast.HISTORY_DAYS),
+        query.get("average_days", forecast.AVERAGE_DAYS), query.get("smoothing", forecast.SMOOTHING),
+        report_limit(query),
+    )}
+
+
+def get_supplies(server, query, body):
+    return sorted_page(server, query, supplies.list_supply_page, query.get("supplier", ""), query.get("date", ""),
+                       query.get("status", ""))
+
+
+def get_supply_history(server, query, body):
+    return {"items": server.read(supplies.supply_history)}
+
+
+def post_supply(server, query, body):
+    return {"id": server.write(supplies.add_supply, body.get("supplier", ""), body.get("date", ""),
+                               body.get("status", ""))}
+
+
+def post_supply_order(server, query, body):
+    items = [(int(product_id), supplies.parse_quantity(quantity)) for product_id, quantity in body_pairs(body, "items")]
+    return {"id": server.write(supplies.create_supply_order, int(body.get("supplier_id", 0)), items)}
+
+
+def get_supply_items(server, query, body, supply_id):
+    return {"items": server.read(supplies.supply_items, int(supply_id))}
+
+
+def post_supply_item(server, query, body, supply_id):
+    """Позиция поставки: товар по product_id или, для старых клиентов, по названию product."""
+    product_id = body.get("product_id")
+    if product_id is None and body.get("product"):
+        product_id = server.read(products.find_product_id, body["product"])
+    server.write(supplies.add_supply_item, int(supply_id), product_id, body.get("quantity"))
+    return {}
+
+
+def get_supply_lines(server, query, body, supply_id):
+    return {"items": server.read(supplies.supply_lines, int(supply_id))}
+
+
+def get_supply_receipts(server, query, body, supply_id):
+    return {"items": server.read(supplies.supply_receipts, int(supply_id))}
+
+
+def post_supply_scan(server, query, body, supply_id):
+    """Документ частичной приемки: counts - пары [product_id, количество]."""
+    result = server.write(supplies.receive_supply_counts, int(supply_id), dict(body_pairs(body, "counts")))
+    if result is None:
+        return {"receipt_id": None}
+    receipt_id, received, status = result
+    return {"receipt_id": receipt_id, "received": received, "status": status}
+
+
+def post_supply_confirmation(server, query, body, supply_id):
+    return {"confirmed": server.write(supplies.confirm_supply_order, int(supply_id))}
+
+
+def post_supply_receipt(server, query, body, supply_id):
+    return {"received": server.write(supplies.receive_supply, int(supply_id))}
+
+
+def get_reorder(server, query, body):
+    return {"items": server.read(reorder.reorder_proposals, query.get("velocity_days", reorder.VELOCITY_DAYS),
+                                 query.get("cover_days", reorder.COVER_DAYS))}
+
+
+def post_reorder_drafts(server, query, body):
+    return {"supplies": server.write(reorder.create_reorder_drafts, body.get("velocity_days", reorder.VELOCITY_DAYS),
+                                     body.get("cover_days", reorder.COVER_DAYS))}
+
+
+def get_stock_report(server, query, body):
+    return {"text": server.read(reports.build_stock_report, None, report_limit(query))}
+
+
+def get_supply_report(server, query, body):
+    return {"text": server.read(
+        reports.build_supply_report, query.get("date_from", ""), query.get("date_to", ""),
+        query.get("supplier", ""), query.get("status", ""), None, report_limit(query),
+    )}
+
+
+def get_stock_movement_report(server, query, body):
+    return {"text": server.read(reports.build_stock_movement_report, None, report_limit(query))}
+
+
+ROUTES = [
+    ("GET", r"/categories", get_categories),
+    ("POST", r"/categories", post_category),
+    ("PUT", r"/categories/(\d+)", put_category),
+    ("DELETE", r"/categories/(\d+)", delete_category),
+    ("GET", r"/categories/(\d+)/product-count", get_category_product_count),
+    ("GET", r"/suppliers", get_suppliers),
+    ("GET", r"/suppliers/lookup", get_supplier_lookup),
+    ("POST", r"/suppliers", post_supplier),
+    ("PUT", r"/suppliers/(\d+)", put_supplier),
+    ("DELETE", r"/suppliers/(\d+)", delete_supplier),
+    ("GET", r"/products", get_products),
+    ("GET", r"/products/lookup", get_product_lookup),
+    ("POST", r"/products/lookup", post_product_lookup),
+    ("GET", r"/products/search", get_product_search),
+    ("POST", r"/products", post_product),
+    ("POST", r"/products/import", post_product_import),
+    ("PUT", r"/products/(\d+)", put_product),
+    ("DELETE", r"/products/(\d+)", delete_product),
+    ("GET", r"/inventory", get_inventory),
+    ("GET", r"/inventory/history", get_stock_history),
+    ("GET", r"/inventory/low", get_low_stock),
+    ("GET", r"/inventory/low/count", get_low_stock_count),
+    ("GET", r"/inventory/at", get_stock_at),
+    ("GET", r"/inventory/check", get_ledger_check),
+    ("POST", r"/inventory/(\d+)/move", post_stock_movement),
+    ("POST", r"/inventory/(\d+)/adjust", post_stock_adjustment),
+    ("POST", r"/inventory/counts", post_stock_counts),
+    ("GET", r"/forecast", get_forecast),
+    ("GET", r"/notifications", get_notifications),
+    ("GET", r"/notifications/last", get_last_notification_id),
+    ("GET", r"/supplies", get_supplies),
+    ("GET", r"/supplies/history", get_supply_history),
+    ("POST", r"/supplies", post_supply),
+    ("POST", r"/supplies/orders", post_supply_order),
+    ("GET", r"/supplies/(\d+)/items", get_supply_items),
+    ("POST", r"/supplies/(\d+)/items", post_supply_item),
+    ("POST", r"/supplies/(\d+)/confirm", post_supply_confirmation),
+    ("POST", r"/supplies/(\d+)/receive", post_supply_receipt),
+    ("GET", r"/supplies/(\d+)/lines", get_supply_lines),
+    ("POST", r"/supplies/(\d+)/scan", post_supply_scan),
+    ("GET", r"/supplies/(\d+)/receipts", get_supply_receipts),
+    ("GET", r"/reorder", get_reorder),
+    ("POST", r"/reorder/drafts", post_reorder_drafts),
+    ("GET", r"/reports/stock", get_stock_report),
+    ("GET", r"/reports/supplies", get_supply_report),
+    ("GET", r"/reports/movement", get_stock_movement_report),
+]
+ROUTES = [(method, re.compile(pattern + "$"), handler) for method, pattern, handler in ROUTES]
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Разбор запроса, вызов обработчика и ответ в JSON.
+
+    HTTP/1.1 с Content-Length в каждом ответе, поэтому соединение остается
+    открытым для следующих запросов (keep-alive). Ответы GET получают ETag,
+    и повторный запрос с тем же If-None-Match получает 304 без тела.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "InventoryAPI/1.0"
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_PUT(self):
+        self.dispatch("PUT")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def dispatch(self, method):
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        status = 200
+        try:
+            body = self.read_body()
+            handler, args = self.route(method, url.path)
+            payload = handler(self.server, query, body, *args)
+        except NotFound as e:
+            status, payload = 404, {"error": str(e)}
+        except ValueError as e:
+            status, payload = 400, {"error": str(e)}
+        except sqlite3.Error as e:
+            status, payload = 500, {"error": f"Ошибка базы данных: {e}"}
+        except Exception as e:
+            # Непредвиденная ошибка обработчика: в журнал сервера, клиенту - ответ 500
+            self.log_error("%s %s: %s", method, url.path, traceback.format_exc())
+            status, payload = 500, {"error": f"Внутренняя ошибка сервера: {e}"}
+        self.send_json(status, payload, etag=method == "GET" and status == 200)
+
+    def read_body(self):
+        """Тело запроса в JSON (объект) или пустой словарь."""
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        body = json.loads(self.rfile.read(length).decode("utf-8"))
+        if not isinstance(body, dict):
+            raise ValueError("Тело запроса должно быть объектом JSON.")
+        return body
+
+    def route(self, method, path):
+        """Обработчик и параметры пути для запроса."""
+        for route_method, pattern, handler in ROUTES:
+            match = pattern.match(path)
+            if match and route_method == method:
+                return handler, match.groups()
+        raise NotFound(f"Неизвестный запрос: {method} {path}")
+
+    def send_json(self, status, payload, etag=False):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        tag = None
+        if etag:
+            tag = '"' + hashlib.sha1(data).hexdigest() + '"'
+            requested = [value.strip() for value in self.headers.get("If-None-Match", "").split(",")]
+            if tag in requested:
+                self.send_response(304)
+                self.send_header("ETag", tag)
+                self.end_headers()
+                return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        if tag:
+            self.send_header("ETag", tag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def main():
+    """Запуск HTTP API для работы нескольких терминалов с общей базой."""
+    parser = argparse.ArgumentParser(description="HTTP API системы управления запасами.")
+    parser.add_argument("--db", default=DB_PATH, help="путь к базе данных")
+    parser.add_argument("--host", default="127.0.0.1", help="адрес для входящих соединений")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--readers", type=int, default=4, help="потоков (соединений) для чтения")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    try:
+        upgrade_database(db.connect())
+    finally:
+        db.close()
+
+    server = ApiServer((args.host, args.port), args.db, args.readers)
+    print(f"API доступно по адресу http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
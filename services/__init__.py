@@ -0,0 +1,7 @@
+"""Бизнес-логика системы управления запасами без графического интерфейса.
+
+Функции модулей принимают объект Database и не зависят от Tkinter, поэтому
+их можно вызывать из окна приложения, пакетных заданий, API и замеров.
+Ошибки проверки данных сообщаются через ValueError с текстом для пользователя.
+"""
+from services import categories, forecast, inventory, ledger, notifications, products, reorder, reports, suppliers, supplies
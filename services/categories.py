@@ -0,0 +1,82 @@
+from database import retry_on_busy
+from services.paging import page_query
+from services.reference import reference_cache
+
+CATEGORY_SELECT = "id, name, description"
+CATEGORY_FROM = "FROM categories"
+CATEGORY_QUERY = f"SELECT {CATEGORY_SELECT} {CATEGORY_FROM}"
+CATEGORY_COLUMNS = ("ID", "Название", "Описание")
+
+# Колонки таблицы категорий, по которым разрешена сортировка, и их SQL-выражения
+CATEGORY_SORT_COLUMNS = {
+    "ID": "id",
+    "Название": "name",
+    "Описание": "COALESCE(description, '')",
+}
+
+
+def list_categories(db):
+    """Все категории: (id, name, description)."""
+    return db.fetchall(CATEGORY_QUERY)
+
+
+def list_category_page(db, sort_column=None, descending=False, last_key=None, limit=200):
+    """Страница таблицы категорий с сортировкой в SQL.
+
+    Две последние колонки строк - значения сортировки и ключа (см. list_products).
+    """
+    sort_expr = CATEGORY_SORT_COLUMNS.get(sort_column) or "id"
+    query, params = page_query(CATEGORY_SELECT, CATEGORY_FROM, "id", sort_expr, descending,
+                               last_key=last_key, limit=limit)
+    return db.fetchall(query, params)
+
+
+def category_names(db):
+    """Названия категорий для выпадающих списков (из кэша справочников)."""
+    return reference_cache(db).name_list("categories")
+
+
+def find_category_id(db, name):
+    """ID категории по названию (из кэша справочников); ValueError, если категории нет."""
+    category_id = reference_cache(db).find_id("categories", name)
+    if category_id is None:
+        raise ValueError("Указанная категория не существует.")
+    return category_id
+
+
+@retry_on_busy
+def add_category(db, name, description=""):
+    """Добавление категории, возвращает ее id."""
+    if not name:
+        raise ValueError("Название категории обязательно для заполнения.")
+    with db.transaction() as cursor:
+        cursor.execute("INSERT INTO categories (name, description) VALUES (?, ?)", (name, description))
+        return cursor.lastrowid
+
+
+@retry_on_busy
+def update_category(db, category_id, name, description=""):
+    """Изменение названия и описания категории."""
+    if not name:
+        raise ValueError("Название категории обязательно для заполнения.")
+    with db.transaction() as cursor:
+        cursor.execute('''
+            UPDATE categories
+            SET name = ?, description = ?
+            WHERE id = ?
+        ''', (name, description, category_id))
+
+
+def product_count(db, category_id):
+    """Число товаров в категории."""
+    return db.fetchone("SELECT COUNT(*) FROM products WHERE category_id = ?", (category_id,))[0]
+
+
+@retry_on_busy
+def delete_category(db, category_id):
+    """Удаление категории; категорию с товарами удалить нельзя (ValueError)."""
+    with db.transaction() as cursor:
+        count = cursor.execute("SELECT COUNT(*) FROM products WHERE category_id = ?", (category_id,)).fetchone()[0]
+        if count > 0:
+            raise ValueError(f"Категория содержит {count} связанных товаров. Удаление невозможно.")
+        cursor.execute("DELETE FROM categories WHERE id = ?", (category_id,))
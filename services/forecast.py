@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta, timezone
+
+# NumPy необязателен: без него те же модели считаются циклом по дневным суммам
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+VECTORIZED = np is not None
+
+# Глубина истории, окно скользящего среднего (дней) и коэффициент сглаживания
+HISTORY_DAYS = 90
+AVERAGE_DAYS = 28
+SMOOTHING = 0.3
+
+# Меньший расход в день считается отсутствием расхода; дата минимума не
+# указывается, если до него дальше горизонта (дней)
+MIN_RATE = 0.01
+HORIZON_DAYS = 3650
+
+FORECAST_COLUMNS = ("ID", "Название", "Артикул", "Остаток", "Минимальный остаток", "Расход в день (среднее)",
+                    "Расход в день (сглаживание)", "Дней запаса", "Дней до минимума", "Дата минимума")
+
+# Дневной расход товаров: (product_id, возраст дня, расход); возраст 0 - день :today.
+# Расход - списания; корректировки остатка (установка, пересчет) не учитываются
+DAILY_DEMAND_QUERY = '''
+    SELECT product_id,
+           CAST(julianday(:today) - julianday(date, 'start of day') AS INTEGER) AS age,
+           -SUM(quantity_change)
+    FROM stock_history
+    WHERE quantity_change < 0 AND NOT correction
+      AND date >= date(:today, :since) AND date < date(:today, '+1 day')
+    GROUP BY product_id, age
+'''
+STOCK_QUERY = '''
+    SELECT p.id, p.name, p.sku, COALESCE(i.quantity, 0), p.min_stock
+    FROM products p
+    LEFT JOIN inventory i ON i.product_id = p.id
+    ORDER BY p.id
+'''
+
+
+def forecast_params(history_days, average_days, smoothing):
+    """Проверка параметров моделей; ValueError при некорректных значениях."""
+    try:
+        history_days = int(history_days)
+        average_days = int(average_days)
+        smoothing = float(str(smoothing).replace(",", "."))
+    except (TypeError, ValueError):
+        raise ValueError("Введите корректные параметры прогноза.")
+    if not 0 < average_days <= history_days or not 0 < smoothing <= 1:
+        raise ValueError("Окно среднего должно быть от 1 до глубины истории, сглаживание - от 0 до 1.")
+    return history_days, average_days, smoothing
+
+
+def smoothing_weights(history_days, smoothing):
+    """Веса дней (от старого к новому) для экспоненциального сглаживания.
+
+    Сглаживание линейно по дневному расходу, поэтому его итог равен
+    взвешенной сумме ряда; начальный уровень - расход первого дня.
+    """
+    weights = [smoothing * (1 - smoothing) ** (history_days - 1 - day) for day in range(history_days)]
+    weights[0] = (1 - smoothing) ** (history_days - 1)
+    return weights
+
+
+def demand_rates(product_ids, demand, history_days, average_days, smoothing):
+    """Скользящее среднее и сглаженный расход в день для всех товаров.
+
+    С NumPy дневные суммы раскладываются в матрицу товары x дни, и обе
+    модели считаются для всего каталога матричными операциями.
+    """
+    weights = smoothing_weights(history_days, smoothing)
+    if np is not None:
+        ids = np.asarray(product_ids, dtype=np.int64)
+        series = np.zeros((len(ids), history_days))
+        if demand and len(ids):
+            demand = np.asarray(demand, dtype=np.int64)
+            rows = np.searchsorted(ids, demand[:, 0]).clip(max=len(ids) - 1)
+            # История удаленных товаров пропускается
+            known = ids[rows] == demand[:, 0]
+            np.add.at(series, (rows[known], history_days - 1 - demand[known, 1]), demand[known, 2])
+        average = series[:, -average_days:].sum(axis=1) / average_days
+        smoothed = series @ np.asarray(weights)
+        return average.tolist(), smoothed.tolist()
+
+    position = {product_id: index for index, product_id in enumerate(product_ids)}
+    average = [0.0] * len(product_ids)
+    smoothed = [0.0] * len(product_ids)
+    for product_id, age, quantity in demand:
+        index = position.get(product_id)
+        if index is None:
+            continue
+        if age < average_days:
+            average[index] += quantity / average_days
+        smoothed[index] += quantity * weights[history_days - 1 - age]
+    return average, smoothed
+
+
+def forecast_catalog(db, history_days=HISTORY_DAYS, average_days=AVERAGE_DAYS, smoothing=SMOOTHING, limit=None):
+    """Прогноз расхода по всему каталогу (строки в порядке FORECAST_COLUMNS).
+
+    История сворачивается в дневные суммы одним запросом. Дни запаса и дата
+    достижения минимального остатка считаются по сглаженному расходу; у
+    товаров без расхода они пустые. Первыми идут товары, которые раньше
+    дойдут до минимума; limit ограничивает число строк.
+    """
+    history_days, average_days, smoothing = forecast_params(history_days, average_days, smoothing)
+    # Даты журнала пишутся в UTC (datetime('now')), поэтому и "сегодня" - по UTC
+    today = datetime.now(timezone.utc).date()
+    stock = db.fetchall(STOCK_QUERY)
+    demand = db.fetchall(DAILY_DEMAND_QUERY, {"today": today.isoformat(), "since": f"-{history_days - 1} days"})
+    average, smoothed = demand_rates([row[0] for row in stock], demand, history_days, average_days, smoothing)
+
+    rows = []
+    for (product_id, name, sku, quantity, min_stock), average_rate, rate in zip(stock, average, smoothed):
+        if rate >= MIN_RATE:
+            cover = round(quantity / rate, 1)
+            to_minimum = max(0.0, round((quantity - min_stock) / rate, 1))
+            minimum_date = (today + timedelta(days=int(to_minimum))).isoformat() if to_minimum <= HORIZON_DAYS else None
+        else:
+            cover = to_minimum = minimum_date = None
+        rows.append((product_id, name, sku, quantity, min_stock, round(average_rate, 2), round(rate, 2),
+                     cover, to_minimum, minimum_date))
+    rows.sort(key=lambda row: (row[8] is None, row[8] or 0, row[0]))
+    return rows[:limit] if limit else rows
@@ -0,0 +1,308 @@
+import json
+
+from database import retry_on_busy
+from events import LOW_STOCK, STOCK_CHANGED, bus
+from services.paging import page_query
+
+INVENTORY_SELECT = "p.id, p.name, p.sku, i.quantity, p.min_stock, i.version"
+INVENTORY_FROM = '''
+    FROM products p
+    LEFT JOIN inventory i ON p.id = i.product_id
+'''
+INVENTORY_QUERY = f"SELECT {INVENTORY_SELECT} {INVENTORY_FROM}"
+INVENTORY_COLUMNS = ("ID", "Название", "Артикул", "Остаток", "Минимальный остаток", "Версия")
+
+# Колонки таблицы остатков, по которым разрешена сортировка, и их SQL-выражения
+INVENTORY_SORT_COLUMNS = {
+    "ID": "p.id",
+    "Название": "p.name",
+    "Артикул": "p.sku",
+    "Остаток": "COALESCE(i.quantity, 0)",
+    "Минимальный остаток": "p.min_stock",
+}
+STOCK_MOVEMENT_QUERY = '''
+    SELECT sh.date, p.name, sh.quantity_change, sh.change_reason, sh.quantity_before, sh.quantity_after
+    FROM stock_history sh
+    JOIN products p ON sh.product_id = p.id
+    ORDER BY sh.date DESC
+'''
+STOCK_MOVEMENT_COLUMNS = ("Дата", "Название", "Изменение", "Причина", "Было", "Стало")
+
+# Журнал движения для постраничного просмотра: новые записи первыми,
+# keyset-пагинация по (sh.date, sh.id) по индексу idx_stock_history_date
+HISTORY_SELECT = "sh.date, p.name, sh.quantity_change, sh.change_reason, sh.quantity_before, sh.quantity_after"
+HISTORY_FROM = '''
+    FROM stock_history sh
+    JOIN products p ON sh.product_id = p.id
+'''
+# Список товаров с низким остатком (таблица low_stock обновляется триггерами)
+LOW_STOCK_QUERY = '''
+    SELECT p.id, p.name, p.sku, ls.quantity, ls.min_stock, ls.shortfall, ls.since
+    FROM low_stock ls
+    JOIN products p ON p.id = ls.product_id
+    ORDER BY ls.shortfall DESC, ls.product_id
+'''
+LOW_STOCK_COLUMNS = ("ID", "Название", "Артикул", "Остаток", "Минимальный остаток", "Не хватает", "В списке с")
+VERSION_CONFLICT = "Остаток товара изменен в другом сеансе. Обновите таблицу и повторите."
+
+
+def list_inventory(db):
+    """Остатки всех товаров: (id, name, sku, quantity, min_stock, version)."""
+    return db.fetchall(INVENTORY_QUERY)
+
+
+def list_inventory_page(db, sort_column=None, descending=False, last_key=None, limit=200):
+    """Страница таблицы остатков с сортировкой в SQL.
+
+    Две последние колонки строк - значения сортировки и ключа (см. list_products).
+    """
+    sort_expr = INVENTORY_SORT_COLUMNS.get(sort_column) or "p.id"
+    query, params = page_query(INVENTORY_SELECT, INVENTORY_FROM, "p.id", sort_expr, descending,
+                               last_key=last_key, limit=limit)
+    return db.fetchall(query, params)
+
+
+def history_filter(product_id=None, product="", date_from="", date_to="", reason=""):
+    """Условия WHERE и параметры для журнала движения.
+
+    product_id - точный товар (просмотр истории из экрана остатков), product -
+    часть названия; даты в формате YYYY-MM-DD, обе границы включаются.
+    """
+    where = []
+    params = []
+    if product_id is not None:
+        where.append("sh.product_id = ?")
+        params.append(product_id)
+    if product:
+        where.append("p.name LIKE ?")
+        params.append(f"%{product}%")
+    if date_from:
+        where.append("sh.date >= ?")
+        params.append(date_from)
+    if date_to:
+        where.append("sh.date < date(?, '+1 day')")
+        params.append(date_to)
+    if reason:
+        where.append("sh.change_reason LIKE ?")
+        params.append(f"%{reason}%")
+    return where, params
+
+
+def list_stock_history(db, product_id=None, product="", date_from="", date_to="", reason="",
+                       last_key=None, limit=200):
+    """Страница журнала движения с фильтрами, новые записи первыми.
+
+    Две последние колонки строк - дата и id записи; пара из последней строки
+    передается в last_key для получения следующей страницы.
+    """
+    where, params = history_filter(product_id, product, date_from, date_to, reason)
+    query, query_params = page_query(HISTORY_SELECT, HISTORY_FROM, "sh.id", "sh.date", True,
+                                     where, params, last_key=last_key, limit=limit)
+    return db.fetchall(query, query_params)
+
+
+def list_low_stock(db):
+    """Товары с остатком ниже минимального, с наибольшей нехваткой первыми."""
+    return db.fetchall(LOW_STOCK_QUERY)
+
+
+def low_stock_count(db):
+    """Число товаров с остатком ниже минимального."""
+    return db.fetchone("SELECT COUNT(*) FROM low_stock")[0]
+
+
+def parse_delta(value, message):
+    """Преобразование количества в целое число; ValueError с message при ошибке."""
+    if value in (None, ""):
+        raise ValueError("Все поля обязательны для заполнения.")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(message)
+
+
+def apply_stock_delta(cursor, product_id, delta, reason, expected_version=None, correction=False):
+    """Атомарное изменение остатка на delta внутри открытой транзакции.
+
+    Остаток меняется в SQL (quantity = quantity + ?), а не записывается
+    значением с экрана; RETURNING отдает итоговый остаток и версию строки.
+    Если задана expected_version, а строку уже изменил другой сеанс -
+    ValueError. В историю пишутся остаток до и после изменения; correction
+    отмечает корректировку, которая не является расходом или приходом.
+    Возвращает (quantity, version).
+    """
+    # Строка остатков создается для товара, у которого ее еще нет
+    cursor.execute('''
+        INSERT INTO inventory (product_id, quantity, last_updated)
+        SELECT id, 0, datetime('now') FROM products WHERE id = ?
+        ON CONFLICT (product_id) DO NOTHING
+    ''', (product_id,))
+
+    cursor.execute('''
+        UPDATE inventory
+        SET quantity = quantity + ?, version = version + 1, last_updated = datetime('now')
+        WHERE product_id = ? AND (? IS NULL OR version = ?)
+        RETURNING quantity, version
+    ''', (delta, product_id, expected_version, expected_version))
+    row = cursor.fetchone()
+    if row is None:
+        if cursor.execute("SELECT 1 FROM products WHERE id = ?", (product_id,)).fetchone() is None:
+            raise ValueError("Указанный товар не существует.")
+        raise ValueError(VERSION_CONFLICT)
+    quantity, version = row
+
+    # Запись в историю изменений
+    cursor.execute('''
+        INSERT INTO stock_history (product_id, change_reason, quantity_change, quantity_before, quantity_after,
+                                   correction, date)
+        VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
+    ''', (product_id, reason, delta, quantity - delta, quantity, int(correction)))
+    return quantity, version
+
+
+def publish_stock_change(db, product_id, quantity_before, quantity_after, reason, product=None):
+    """Событие изменения остатка и, если остаток опустился ниже минимального, - низкого остатка.
+
+    product - уже прочитанные (название, минимальный остаток) товара; без него
+    они читаются из базы.
+    """
+    bus.publish(STOCK_CHANGED, product_id=product_id, quantity_before=quantity_before,
+                quantity_after=quantity_after, reason=reason)
+    row = product if product is not None else \
+        db.fetchone("SELECT name, min_stock FROM products WHERE id = ?", (product_id,))
+    if row is not None and quantity_after < row[1] <= quantity_before:
+        bus.publish(LOW_STOCK, product_id=product_id, name=row[0], quantity=quantity_after, min_stock=row[1])
+
+
+@retry_on_busy
+def move_stock(db, product_id, delta, reason, expected_version=None):
+    """Приход (delta > 0) или расход (delta < 0) товара. Возвращает (quantity, version)."""
+    if not reason:
+        raise ValueError("Все поля обязательны для заполнения.")
+    delta = parse_delta(delta, "Введите корректное количество.")
+    with db.transaction() as cursor:
+        quantity, version = apply_stock_delta(cursor, product_id, delta, reason, expected_version)
+    publish_stock_change(db, product_id, quantity - delta, quantity, reason)
+    return quantity, version
+
+
+@retry_on_busy
+def adjust_stock(db, product_id, new_quantity, reason, expected_version=None):
+    """Установка нового остатка товара с записью изменения в историю.
+
+    Изменение считается от остатка в базе внутри той же транзакции, а не от
+    значения на экране. expected_version - версия строки, которую видел
+    пользователь: если остаток с тех пор изменился, корректировка отклоняется.
+    Возвращает (quantity, version).
+    """
+    if not reason:
+        raise ValueError("Все поля обязательны для заполнения.")
+    new_quantity = parse_delta(new_quantity, "Введите корректное количество.")
+
+    with db.transaction() as cursor:
+        cursor.execute("SELECT quantity, version FROM inventory WHERE product_id = ?", (product_id,))
+        row = cursor.fetchone()
+        if row is None:
+            current_quantity = 0
+        elif expected_version is not None and row[1] != expected_version:
+            raise ValueError(VERSION_CONFLICT)
+        else:
+            current_quantity = row[0]
+        quantity, version = apply_stock_delta(cursor, product_id, new_quantity - current_quantity, reason,
+                                              correction=True)
+    publish_stock_change(db, product_id, current_quantity, quantity, reason)
+    return quantity, version
+
+
+def parse_count(quantity):
+    """Отсканированное количество: целое не меньше нуля, иначе ValueError.
+
+    Ноль допустим: пересчет так фиксирует, что товара нет в наличии.
+    """
+    try:
+        quantity = int(quantity)
+    except (TypeError, ValueError):
+        raise ValueError("Введите корректное количество.")
+    if quantity < 0:
+        raise ValueError("Количество не может быть отрицательным.")
+    return quantity
+
+
+def parse_counts(counts):
+    """Отсканированные количества {product_id: количество} в JSON для json_each.
+
+    Количества - целые не меньше нуля (см. parse_count), иначе ValueError.
+    """
+    if not counts:
+        raise ValueError("Нет отсканированных товаров.")
+    try:
+        product_ids = [int(product_id) for product_id in counts]
+    except (TypeError, ValueError):
+        raise ValueError("Некорректный товар в списке.")
+    return json.dumps(dict(zip(product_ids, map(parse_count, counts.values()))))
+
+
+@retry_on_busy
+def apply_stock_counts(db, counts, reason, recount=False):
+    """Проведение пачки отсканированных товаров одной транзакцией.
+
+    counts - {product_id: количество}. Без recount остатки увеличиваются на
+    количества (приход), с recount - становятся равными им (пересчет).
+    Пачка применяется set-based запросами по json_each: история - одним
+    INSERT, остатки - одним UPDATE; товары без изменений пропускаются.
+    Возвращает [(product_id, было, стало)] по измененным товарам.
+    """
+    if not reason:
+        raise ValueError("Все поля обязательны для заполнения.")
+    params = {"counts": parse_counts(counts), "reason": reason, "recount": int(bool(recount))}
+    with db.transaction() as cursor:
+        cursor.execute('''
+            SELECT c.key FROM json_each(:counts) c
+            WHERE NOT EXISTS (SELECT 1 FROM products WHERE id = CAST(c.key AS INTEGER))
+        ''', params)
+        if cursor.fetchone() is not None:
+            raise ValueError("Указанный товар не существует.")
+
+        # Строки остатков для товаров, у которых их еще нет
+        cursor.execute('''
+            INSERT INTO inventory (product_id, quantity, last_updated)
+            SELECT CAST(key AS INTEGER), 0, datetime('now') FROM json_each(:counts) WHERE true
+            ON CONFLICT (product_id) DO NOTHING
+        ''', params)
+
+        # История пишется до обновления: остаток "было" - текущий
+        cursor.execute('''
+            INSERT INTO stock_history (product_id, change_reason, quantity_change, quantity_before, quantity_after,
+                                       correction, date)
+            SELECT product_id, :reason, quantity_after - quantity_before, quantity_before, quantity_after, :recount,
+                   datetime('now')
+            FROM (
+                SELECT i.product_id, i.quantity AS quantity_before,
+                       CASE WHEN :recount THEN c.value ELSE i.quantity + c.value END AS quantity_after
+                FROM json_each(:counts) c
+                JOIN inventory i ON i.product_id = CAST(c.key AS INTEGER)
+            )
+            WHERE quantity_after != quantity_before
+            ORDER BY product_id
+            RETURNING product_id, quantity_before, quantity_after
+        ''', params)
+        changes = cursor.fetchall()
+
+        # Названия и минимумы для событий - одним запросом на всю пачку
+        cursor.execute('''
+            SELECT id, name, min_stock FROM products
+            WHERE id IN (SELECT CAST(key AS INTEGER) FROM json_each(:counts))
+        ''', params)
+        products = {product_id: (name, min_stock) for product_id, name, min_stock in cursor.fetchall()}
+
+        cursor.execute('''
+            UPDATE inventory
+            SET quantity = CASE WHEN :recount THEN c.value ELSE inventory.quantity + c.value END,
+                version = version + 1, last_updated = datetime('now')
+            FROM json_each(:counts) c
+            WHERE inventory.product_id = CAST(c.key AS INTEGER)
+              AND inventory.quantity != CASE WHEN :recount THEN c.value ELSE inventory.quantity + c.value END
+        ''', params)
+    for product_id, quantity_before, quantity_after in changes:
+        publish_stock_change(db, product_id, quantity_before, quantity_after, reason, products[product_id])
+    return changes
@@ -0,0 +1,149 @@
+from datetime import datetime
+
+from database import retry_on_busy
+from initialize_db import SNAPSHOT_EVERY
+from services.paging import page_query
+
+# Остаток на момент m.moment: ближайший снимок не позже момента и записи
+# журнала после него (по порядку date, id), не более SNAPSHOT_EVERY штук.
+# Если момент раньше первого снимка товара (история до миграции), остаток
+# считается назад от первого снимка: из него вычитаются записи после момента.
+# Момент - единственный параметр, он задается в FROM, поэтому запрос
+# собирается через page_query и листается страницами по товарам.
+STOCK_AT_SELECT = '''
+    p.id, p.name, p.sku,
+    CASE WHEN s.id IS NOT NULL THEN s.quantity + COALESCE((
+        SELECT SUM(h.quantity_change) FROM stock_history h
+        WHERE h.product_id = p.id AND h.date <= m.moment AND (h.date, h.id) > (s.date, s.history_id)
+    ), 0)
+    ELSE COALESCE(f.quantity, 0) - COALESCE((
+        SELECT SUM(h.quantity_change) FROM stock_history h
+        WHERE h.product_id = p.id AND h.date > m.moment AND (h.date, h.id) <= (f.date, f.history_id)
+    ), 0) END AS quantity
+'''
+STOCK_AT_FROM = '''
+    FROM (SELECT ? AS moment) m
+    CROSS JOIN products p
+    LEFT JOIN stock_snapshots s ON s.id = (
+        SELECT id FROM stock_snapshots
+        WHERE product_id = p.id AND date <= m.moment
+        ORDER BY date DESC, history_id DESC LIMIT 1
+    )
+    LEFT JOIN stock_snapshots f ON s.id IS NULL AND f.id = (
+        SELECT id FROM stock_snapshots WHERE product_id = p.id
+        ORDER BY date, history_id LIMIT 1
+    )
+'''
+STOCK_AT_COLUMNS = ("ID", "Название", "Артикул", "Остаток на дату")
+
+# Колонки остатков на дату, по которым разрешена сортировка (остаток на дату
+# вычисляется по журналу, поэтому сортировка по нему не предлагается)
+STOCK_AT_SORT_COLUMNS = {
+    "ID": "p.id",
+    "Название": "p.name",
+    "Артикул": "p.sku",
+}
+
+# Сверка остатков с журналом: остаток по последнему снимку и записям после
+# него против inventory, и число разрывов цепочки "было/стало" по товару
+LEDGER_CHECK_QUERY = '''
+    WITH breaks AS (
+        SELECT product_id, COUNT(*) AS breaks FROM (
+            SELECT product_id, quantity_change, quantity_before, quantity_after,
+                   LAG(quantity_after) OVER (PARTITION BY product_id ORDER BY date, id) AS previous_after
+            FROM stock_history
+            WHERE quantity_after IS NOT NULL
+        )
+        WHERE quantity_after - quantity_before != quantity_change OR quantity_before != previous_after
+        GROUP BY product_id
+    ),
+    ledger AS (
+        SELECT p.id AS product_id, p.name, p.sku, COALESCE(i.quantity, 0) AS quantity,
+               COALESCE(s.quantity, 0) + COALESCE((
+                   SELECT SUM(h.quantity_change) FROM stock_history h
+                   WHERE h.product_id = p.id
+                     AND (h.date, h.id) > (COALESCE(s.date, ''), COALESCE(s.history_id, 0))
+               ), 0) AS ledger_quantity
+        FROM products p
+        LEFT JOIN inventory i ON i.product_id = p.id
+        LEFT JOIN stock_snapshots s ON s.id = (
+            SELECT id FROM stock_snapshots WHERE product_id = p.id
+            ORDER BY date DESC, history_id DESC LIMIT 1
+        )
+    )
+    SELECT l.product_id, l.name, l.sku, l.quantity, l.ledger_quantity,
+           l.quantity - l.ledger_quantity, COALESCE(b.breaks, 0)
+    FROM ledger l
+    LEFT JOIN breaks b ON b.product_id = l.product_id
+    WHERE l.quantity != l.ledger_quantity OR b.breaks IS NOT NULL
+    ORDER BY l.product_id
+'''
+LEDGER_CHECK_COLUMNS = ("ID", "Название", "Артикул", "Остаток", "По журналу", "Расхождение", "Разрывов в журнале")
+
+
+def parse_moment(value):
+    """Момент для остатка на дату: дата (конец дня) или дата и время.
+
+    Возвращает строку в формате дат журнала; ValueError при неверном формате.
+    """
+    value = (value or "").strip()
+    try:
+        if len(value) == 10:
+            return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d 23:59:59")
+        return datetime.fromisoformat(value).strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        raise ValueError("Введите дату в формате YYYY-MM-DD или YYYY-MM-DD HH:MM:SS.")
+
+
+def stock_at(db, moment, product_id=None):
+    """Остатки на момент moment (строки в порядке STOCK_AT_COLUMNS).
+
+    product_id ограничивает результат одним товаром.
+    """
+    where, params = ([], []) if product_id is None else (["p.id = ?"], [product_id])
+    query, query_params = page_query(STOCK_AT_SELECT, STOCK_AT_FROM, "p.id", "p.id", where=where, params=params,
+                                     join_params=[parse_moment(moment)], with_keys=False)
+    return db.fetchall(query, query_params)
+
+
+def stock_at_page(db, moment, sort_column=None, descending=False, last_key=None, limit=200):
+    """Страница остатков на момент moment с сортировкой в SQL.
+
+    Две последние колонки строк - значения сортировки и ключа (см. list_products).
+    """
+    sort_expr = STOCK_AT_SORT_COLUMNS.get(sort_column) or "p.id"
+    query, params = page_query(STOCK_AT_SELECT, STOCK_AT_FROM, "p.id", sort_expr, descending,
+                               join_params=[parse_moment(moment)], last_key=last_key, limit=limit)
+    return db.fetchall(query, params)
+
+
+def check_ledger(db):
+    """Товары, у которых остаток расходится с журналом или в журнале есть разрывы.
+
+    Строки в порядке LEDGER_CHECK_COLUMNS; пустой список - остатки сходятся.
+    """
+    return db.fetchall(LEDGER_CHECK_QUERY)
+
+
+@retry_on_busy
+def rebuild_stock_snapshots(db, every=SNAPSHOT_EVERY):
+    """Пересоздание снимков по журналу, например после массовой загрузки истории.
+
+    Снимок пишется после каждой every-й и последней записи журнала товара;
+    журнал должен содержать остатки "было/стало". Возвращает число снимков.
+    """
+    with db.transaction() as cursor:
+        cursor.execute("DELETE FROM stock_snapshots")
+        cursor.execute('''
+            INSERT INTO stock_snapshots (product_id, history_id, date, quantity)
+            SELECT product_id, id, date, quantity_after FROM (
+                SELECT product_id, id, date, quantity_after,
+                       ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY date, id) AS position,
+                       COUNT(*) OVER (PARTITION BY product_id) AS entries
+                FROM stock_history
+                WHERE quantity_after IS NOT NULL
+            )
+            WHERE position % ? = 0 OR position = entries
+            ORDER BY product_id, date, id
+        ''', (every,))
+        return cursor.rowcount
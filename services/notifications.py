@@ -0,0 +1,158 @@
+import json
+import queue
+import threading
+import time
+import traceback
+
+from database import retry_on_busy
+from events import LOW_STOCK, SUPPLY_ORDERED, SUPPLY_RECEIVED, bus
+
+NOTIFICATION_QUERY = "SELECT id, created, message FROM notifications"
+NOTIFICATION_COLUMNS = ("ID", "Дата", "Сообщение")
+
+# События, о которых сообщается пользователю
+NOTIFICATION_KINDS = (LOW_STOCK, SUPPLY_RECEIVED, SUPPLY_ORDERED)
+
+# За сколько секунд события собираются в одно уведомление
+NOTIFY_DELAY = 0.5
+
+# Сколько названий перечислять в сводном уведомлении
+SUMMARY_NAMES = 3
+
+
+def event_message(kind, data):
+    """Текст уведомления об одном событии."""
+    if kind == LOW_STOCK:
+        return f"Низкий остаток: {data['name']} - {data['quantity']} при минимуме {data['min_stock']}. Нужен заказ."
+    if kind == SUPPLY_RECEIVED and data.get("partial"):
+        return f"Частично принята поставка #{data['supply_id']}, товаров: {data['items']}."
+    if kind == SUPPLY_RECEIVED:
+        return f"Поступила поставка #{data['supply_id']}, товаров: {data['items']}."
+    return f"Оформлен заказ поставщику #{data['supply_id']}, товаров: {data['items']}."
+
+
+def summary_message(kind, items):
+    """Текст сводного уведомления о нескольких событиях одного вида."""
+    if kind == LOW_STOCK:
+        names = ", ".join(data["name"] for data in items[:SUMMARY_NAMES])
+        more = f" и еще {len(items) - SUMMARY_NAMES}" if len(items) > SUMMARY_NAMES else ""
+        return f"Низкий остаток у {len(items)} товаров: {names}{more}. Нужен заказ."
+    total = sum(data["items"] for data in items)
+    if kind == SUPPLY_RECEIVED:
+        return f"Поступило поставок: {len(items)}, товаров: {total}."
+    return f"Оформлено заказов поставщикам: {len(items)}, товаров: {total}."
+
+
+def summarize(events):
+    """Свертка событий [(kind, data)] в уведомления [(kind, message, items)].
+
+    На каждый вид событий - одно уведомление; повторные события о низком
+    остатке одного товара учитываются один раз. События других видов
+    пропускаются.
+    """
+    groups = {}
+    for kind, data in events:
+        if kind not in NOTIFICATION_KINDS:
+            continue
+        items = groups.setdefault(kind, {})
+        key = data["product_id"] if kind == LOW_STOCK else len(items)
+        items[key] = data
+
+    notifications = []
+    for kind, items in groups.items():
+        items = list(items.values())
+        message = event_message(kind, items[0]) if len(items) == 1 else summary_message(kind, items)
+        notifications.append((kind, message, items))
+    return notifications
+
+
+@retry_on_busy
+def add_notifications(db, notifications):
+    """Запись уведомлений [(kind, message, items)] одной транзакцией."""
+    with db.transaction() as cursor:
+        cursor.executemany('''
+            INSERT INTO notifications (kind, message, data, created)
+            VALUES (?, ?, ?, datetime('now'))
+        ''', [(kind, message, json.dumps(items, ensure_ascii=False)) for kind, message, items in notifications])
+
+
+def latest_notifications(db, limit=200):
+    """Последние уведомления, новые первыми: (id, created, message)."""
+    return db.fetchall(NOTIFICATION_QUERY + " ORDER BY id DESC LIMIT ?", (limit,))
+
+
+def new_notifications(db, after, limit=100):
+    """Уведомления, появившиеся после уведомления с id after, по порядку."""
+    return db.fetchall(NOTIFICATION_QUERY + " WHERE id > ? ORDER BY id LIMIT ?", (after, limit))
+
+
+def last_notification_id(db):
+    """Id последнего уведомления (0, если уведомлений нет)."""
+    return db.fetchone("SELECT COALESCE(MAX(id), 0) FROM notifications")[0]
+
+
+class NotificationRecorder:
+    """Запись событий шины в таблицу notifications.
+
+    События собираются в отдельном потоке в течение delay секунд после первого
+    и записываются сводкой одной транзакцией, поэтому серия событий дает одно
+    уведомление, а операции, публикующие события, не ждут записи.
+
+    write(func, *args) - как выполнять запись func(db, *args); по умолчанию
+    прямо в потоке сборщика на соединении db. Сервер передает свою очередь
+    писателя (ApiServer.write), чтобы писатель у базы оставался один.
+    """
+
+    def __init__(self, db, delay=NOTIFY_DELAY, event_bus=bus, write=None):
+        self.db = db
+        self.delay = delay
+        self.write = write
+        self.bus = event_bus
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="notifications", daemon=True)
+        self.thread.start()
+        self.bus.subscribe(self.collect, *NOTIFICATION_KINDS)
+
+    def collect(self, kind, data):
+        """Подписчик шины: событие ставится в очередь на запись."""
+        self.queue.put((kind, data))
+
+    def run(self):
+        """Сбор событий пачками и запись сводок."""
+        stopping = False
+        while not stopping:
+            event = self.queue.get()
+            if event is None:
+                break
+            events = [event]
+            deadline = time.monotonic() + self.delay
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    event = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if event is None:
+                    stopping = True
+                    break
+                events.append(event)
+            # Ошибка записи уведомления не должна останавливать поток
+            try:
+                self.record(summarize(events))
+            except Exception:
+                traceback.print_exc()
+
+    def record(self, notifications):
+        """Запись сводок через write или напрямую."""
+        if self.write is None:
+            add_notifications(self.db, notifications)
+        else:
+            self.write(add_notifications, notifications)
+
+    def close(self):
+        """Отписка от шины и запись накопленных событий."""
+        self.bus.unsubscribe(self.collect)
+        self.queue.put(None)
+        self.thread.join()
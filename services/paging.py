@@ -0,0 +1,28 @@
+def page_query(select, from_clause, key, sort_expr, descending=False, where=(), params=(),
+               joins="", join_params=(), last_key=None, limit=None, with_keys=True):
+    """Построение запроса страницы с keyset-пагинацией.
+
+    Строки упорядочены по (sort_expr, key); last_key - пара этих значений
+    у последней загруженной строки. При with_keys две последние колонки
+    результата - это значения сортировки и ключа. Без limit возвращается
+    вся выборка.
+    """
+    direction = "DESC" if descending else "ASC"
+    comparison = "<" if descending else ">"
+
+    where = list(where)
+    params = list(join_params) + list(params)
+    if last_key is not None:
+        where.append(f"({sort_expr}, {key}) {comparison} (?, ?)")
+        params.extend(last_key)
+
+    columns = f"{select}, {sort_expr}, {key}" if with_keys else select
+    query = f"SELECT {columns} {from_clause} {joins}"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += f" ORDER BY {sort_expr} {direction}, {key} {direction}"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    return query, params
+
@@ -0,0 +1,158 @@
+from database import retry_on_busy
+from search import has_product_index, product_filter
+from services.categories import find_category_id
+from services.paging import page_query
+from services.reference import reference_cache
+from services.suppliers import find_supplier_id
+
+# Запрос таблицы товаров (фильтры, сортировка и страницы добавляются через page_query)
+PRODUCT_SELECT = "p.id, p.name, c.name AS category, p.sku, p.manufacturer, i.quantity, p.purchase_price, p.retail_price"
+PRODUCT_FROM = '''
+    FROM products p
+    LEFT JOIN categories c ON p.category_id = c.id
+    LEFT JOIN inventory i ON p.id = i.product_id
+'''
+PRODUCT_COLUMNS = ("ID", "Название", "Категория", "Артикул", "Производитель", "Остаток", "Закупочная цена", "Розничная цена")
+
+# Колонки таблицы товаров, по которым разрешена сортировка, и их SQL-выражения
+PRODUCT_SORT_COLUMNS = {
+    "ID": "p.id",
+    "Название": "p.name",
+    "Категория": "COALESCE(c.name, '')",
+    "Артикул": "p.sku",
+    "Производитель": "COALESCE(p.manufacturer, '')",
+    "Остаток": "COALESCE(i.quantity, 0)",
+    "Закупочная цена": "p.purchase_price",
+    "Розничная цена": "p.retail_price",
+}
+
+# Число вариантов в выпадающем списке выбора товара
+PICKER_LIMIT = 20
+
+
+def list_products(db, name_filter="", category_filter="", keywords_filter="", sort_column=None,
+                  descending=False, last_key=None, limit=200, use_index=None):
+    """Страница таблицы товаров с фильтрами и сортировкой.
+
+    Две последние колонки строк - значения сортировки и ключа; пара из
+    последней строки передается в last_key для получения следующей страницы.
+    """
+    if use_index is None:
+        use_index = has_product_index(db)
+    where, params, joins, join_params, default_sort = product_filter(
+        name_filter, category_filter, keywords_filter, use_index)
+    sort_expr = PRODUCT_SORT_COLUMNS.get(sort_column) or default_sort or "p.id"
+    query, query_params = page_query(PRODUCT_SELECT, PRODUCT_FROM, "p.id", sort_expr, descending,
+                                     where, params, joins, join_params, last_key, limit)
+    return db.fetchall(query, query_params)
+
+
+def product_names(db):
+    """Названия товаров для выпадающих списков (из кэша справочников)."""
+    return reference_cache(db).name_list("products")
+
+
+def find_product_id(db, name):
+    """ID товара по названию (из кэша справочников); ValueError, если товара нет."""
+    product_id = reference_cache(db).find_id("products", name)
+    if product_id is None:
+        raise ValueError("Указанный товар не существует.")
+    return product_id
+
+
+def find_product_by_sku(db, sku):
+    """Товар по артикулу (отсканированному штрихкоду): (id, название).
+
+    Поиск по словарю в кэше справочников; ValueError, если товара нет.
+    """
+    sku = (sku or "").strip()
+    row = reference_cache(db).find_code("products", sku) if sku else None
+    if row is None:
+        raise ValueError(f"Товар с артикулом '{sku}' не найден.")
+    return tuple(row)
+
+
+def find_products_by_sku(db, codes):
+    """Товары по списку артикулов: (id, название) или None для каждого кода по порядку."""
+    cache = reference_cache(db)
+    return [cache.find_code("products", code.strip()) if code.strip() else None for code in codes]
+
+
+def preload_products(db):
+    """Загрузка товаров в кэш справочников заранее, например при открытии окна сканирования."""
+    reference_cache(db).fresh()
+
+
+def search_products(db, prefix, limit=PICKER_LIMIT):
+    """Товары, название или артикул которых начинается с prefix (без учета регистра).
+
+    Строки (id, название, артикул) по алфавиту, не более limit; поиск идет
+    по индексу в кэше справочников, без запроса к базе.
+    """
+    if not prefix.strip():
+        return []
+    return reference_cache(db).search("products", prefix, max(1, int(limit)))
+
+
+def product_exists(db, product_id):
+    """Проверка, что товар с product_id существует; ValueError, если его нет."""
+    if db.fetchone("SELECT 1 FROM products WHERE id = ?", (product_id,)) is None:
+        raise ValueError("Указанный товар не существует.")
+
+
+def product_values(name, description, sku, manufacturer, purchase_price, retail_price, min_stock):
+    """Проверка полей товара и преобразование цен и минимального остатка в числа."""
+    if not all([name, sku, manufacturer, purchase_price, retail_price, min_stock]):
+        raise ValueError("Все поля обязательны для заполнения.")
+    try:
+        purchase_price = float(str(purchase_price).replace(",", "."))
+        retail_price = float(str(retail_price).replace(",", "."))
+        min_stock = int(min_stock)
+    except ValueError:
+        raise ValueError("Введите корректные цены и минимальный остаток.")
+    return name, description, sku, manufacturer, purchase_price, retail_price, min_stock
+
+
+@retry_on_busy
+def add_product(db, name, description, category, sku, manufacturer, purchase_price, retail_price,
+                min_stock, supplier):
+    """Добавление товара; категория и поставщик задаются названиями. Возвращает id."""
+    if not (category and supplier):
+        raise ValueError("Все поля обязательны для заполнения.")
+    name, description, sku, manufacturer, purchase_price, retail_price, min_stock = product_values(
+        name, description, sku, manufacturer, purchase_price, retail_price, min_stock)
+    with db.transaction() as cursor:
+        category_id = find_category_id(db, category)
+        supplier_id = find_supplier_id(db, supplier)
+        cursor.execute('''
+            INSERT INTO products (name, description, category_id, sku, manufacturer, purchase_price, retail_price, min_stock, supplier_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (name, description, category_id, sku, manufacturer, purchase_price, retail_price, min_stock, supplier_id))
+        return cursor.lastrowid
+
+
+@retry_on_busy
+def update_product(db, product_id, name, description, category, sku, manufacturer, purchase_price,
+                   retail_price, min_stock, supplier):
+    """Изменение товара; категория и поставщик задаются названиями."""
+    if not (category and supplier):
+        raise ValueError("Все поля обязательны для заполнения.")
+    name, description, sku, manufacturer, purchase_price, retail_price, min_stock = product_values(
+        name, description, sku, manufacturer, purchase_price, retail_price, min_stock)
+    with db.transaction() as cursor:
+        category_id = find_category_id(db, category)
+        supplier_id = find_supplier_id(db, supplier)
+        cursor.execute('''
+            UPDATE products
+            SET name = ?, description = ?, category_id = ?, sku = ?, manufacturer = ?,
+                purchase_price = ?, retail_price = ?, min_stock = ?, supplier_id = ?
+            WHERE id = ?
+        ''', (name, description, category_id, sku, manufacturer, purchase_price,
+              retail_price, min_stock, supplier_id, product_id))
+
+
+@retry_on_busy
+def delete_product(db, product_id):
+    """Удаление товара."""
+    with db.transaction() as cursor:
+        cursor.execute("DELETE FROM products WHERE id = ?", (product_id,))
@@ -0,0 +1,139 @@
+import threading
+from bisect import bisect_left
+
+from initialize_db import REFERENCE_TABLES
+
+# Справочники с поиском по началу названия или кода (артикула)
+SEARCH_CODES = {"products": "sku"}
+
+
+class ReferenceCache:
+    """Кэш названий и id справочников (категории, поставщики, товары).
+
+    Свежесть проверяется без чтения с диска: PRAGMA data_version соединения
+    меняется после фиксации транзакции другим соединением, total_changes -
+    после записи через само соединение. Только если что-то изменилось,
+    читаются счетчики reference_versions (см. initialize_db) и перечитываются
+    справочники, версия которых выросла. Внутри открытой транзакции кэш только
+    читается: устаревший кэш там не обновляется, а обходится прямым запросом.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.Lock()
+        self._checked = threading.local()
+        self.versions = {}
+        self.ids = {}
+        self.names = {}
+        self.rows = {}
+        self.prefixes = {}
+        self.codes = {}
+
+    def token(self, conn):
+        """Признак изменений, видимых соединению conn (новое соединение - новый признак)."""
+        return conn, conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes
+
+    def fresh(self):
+        """Актуален ли кэш для соединения текущего потока (с обновлением вне транзакции)."""
+        conn = self.db.connect()
+        token = self.token(conn)
+        if getattr(self._checked, "token", None) == token:
+            return True
+        versions = dict(conn.execute("SELECT name, version FROM reference_versions").fetchall())
+        if conn.in_transaction:
+            return versions == self.versions
+        for table in REFERENCE_TABLES:
+            if versions.get(table) != self.versions.get(table):
+                self.load(conn, table, versions.get(table))
+        self._checked.token = token
+        return True
+
+    def load(self, conn, table, version):
+        """Перечитывание справочника table.
+
+        Для справочников из SEARCH_CODES строится отсортированный массив
+        названий и кодов в нижнем регистре (поиск по началу строки - bisect)
+        и словарь кодов для точного поиска, например при сканировании.
+        """
+        code = SEARCH_CODES.get(table)
+        ids = {}
+        rows = {}
+        entries = []
+        for row_id, name, code_value in conn.execute(f"SELECT id, name, {code or 'NULL'} FROM {table} ORDER BY id"):
+            # При одинаковых названиях (товары) используется первая запись
+            ids.setdefault(name, row_id)
+            if code:
+                rows[row_id] = (name, code_value)
+                entries.append((name.casefold(), row_id))
+                entries.append((code_value.casefold(), row_id))
+        names = [row[0] for row in conn.execute(f"SELECT name FROM {table} ORDER BY name")]
+        entries.sort()
+        with self._lock:
+            self.ids[table] = ids
+            self.names[table] = names
+            if code:
+                self.rows[table] = rows
+                self.prefixes[table] = ([key for key, _ in entries], [row_id for _, row_id in entries])
+                self.codes[table] = {code_value: row_id for row_id, (_, code_value) in rows.items()}
+            self.versions[table] = version
+
+    def name_list(self, table):
+        """Названия справочника для выпадающих списков (по алфавиту)."""
+        if self.fresh():
+            return list(self.names[table])
+        return [row[0] for row in self.db.fetchall(f"SELECT name FROM {table} ORDER BY name")]
+
+    def find_id(self, table, name):
+        """ID записи справочника по названию или None."""
+        if self.fresh():
+            return self.ids[table].get(name)
+        row = self.db.fetchone(f"SELECT id FROM {table} WHERE name = ? ORDER BY id LIMIT 1", (name,))
+        return row[0] if row else None
+
+    def find_code(self, table, code_value):
+        """Запись справочника из SEARCH_CODES по точному коду: (id, название) или None."""
+        if self.fresh():
+            row_id = self.codes[table].get(code_value)
+            return None if row_id is None else (row_id, self.rows[table][row_id][0])
+        return self.db.fetchone(f"SELECT id, name FROM {table} WHERE {SEARCH_CODES[table]} = ?", (code_value,))
+
+    def search(self, table, prefix, limit):
+        """Записи справочника из SEARCH_CODES, название или код которых начинается с prefix.
+
+        Без учета регистра; возвращает до limit строк (id, название, код) по алфавиту.
+        """
+        prefix = prefix.strip().casefold()
+        code = SEARCH_CODES[table]
+        if not self.fresh():
+            pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            return self.db.fetchall(f'''
+                SELECT id, name, {code} FROM {table}
+                WHERE name LIKE ? ESCAPE '\\' OR {code} LIKE ? ESCAPE '\\'
+                ORDER BY name LIMIT ?
+            ''', (pattern, pattern, limit))
+
+        keys, ids = self.prefixes[table]
+        rows = self.rows[table]
+        found = []
+        seen = set()
+        index = bisect_left(keys, prefix)
+        while index < len(keys) and len(found) < limit and keys[index].startswith(prefix):
+            row_id = ids[index]
+            if row_id not in seen:
+                seen.add(row_id)
+                found.append((row_id,) + rows[row_id])
+            index += 1
+        return found
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def reference_cache(db):
+    """Общий для процесса кэш справочников базы db."""
+    with _caches_lock:
+        cache = _caches.get(db)
+        if cache is None:
+            cache = _caches[db] = ReferenceCache(db)
+        return cache
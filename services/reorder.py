@@ -0,0 +1,110 @@
+from database import retry_on_busy
+from services.supplies import STATUS_CANCELLED, STATUS_DELIVERED, STATUS_DRAFT
+
+# Окно расчета расхода и запас, на который заказывается товар (дней)
+VELOCITY_DAYS = 30
+COVER_DAYS = 14
+
+# Поставщик в предложении для товаров без поставщика (ID поставщика - NULL)
+NO_SUPPLIER = "Нет поставщика"
+
+# Предложение автозаказа: товары из списка низкого остатка (low_stock),
+# средний дневной расход по истории за окно (без корректировок остатка) и уже
+# заказанное количество.
+# Заказ = нехватка до минимума + расход за COVER_DAYS - уже заказано
+# (по частично принятым поставкам - еще не принятый остаток).
+# Обход начинается с low_stock (CROSS JOIN фиксирует порядок), подзапросы по
+# товару идут по индексам истории и позиций поставок и считаются один раз
+# (MATERIALIZED), поэтому время зависит от числа товаров с нехваткой, а не от
+# размера каталога. Товары без поставщика (или с удаленным поставщиком) остаются
+# в предложении с поставщиком NO_SUPPLIER, но черновики для них не создаются.
+REORDER_QUERY = '''
+    WITH shortage AS MATERIALIZED (
+        SELECT sp.id AS supplier_id, COALESCE(sp.name, :no_supplier) AS supplier, p.id AS product_id, p.name AS product, p.sku,
+               ls.quantity, ls.min_stock, ls.shortfall,
+               COALESCE((
+                   SELECT -SUM(sh.quantity_change) FROM stock_history sh
+                   WHERE sh.product_id = p.id AND sh.quantity_change < 0 AND NOT sh.correction
+                     AND sh.date >= datetime('now', '-' || :velocity_days || ' days')
+               ), 0) AS used,
+               COALESCE((
+                   SELECT SUM(MAX(si.quantity - si.received, 0)) FROM supply_items si
+                   JOIN supplies s ON s.id = si.supply_id
+                   WHERE si.product_id = p.id AND s.status NOT IN (:delivered, :cancelled)
+               ), 0) AS ordered
+        FROM low_stock ls
+        CROSS JOIN products p ON p.id = ls.product_id
+        LEFT JOIN suppliers sp ON sp.id = p.supplier_id
+    )
+    SELECT supplier_id, supplier, product_id, product, sku, quantity, min_stock,
+           ROUND(used * 1.0 / :velocity_days, 2) AS velocity, ordered,
+           shortfall + (used * :cover_days + :velocity_days - 1) / :velocity_days - ordered AS proposed
+    FROM shortage
+    WHERE shortfall + (used * :cover_days + :velocity_days - 1) / :velocity_days - ordered > 0
+'''
+REORDER_COLUMNS = ("ID поставщика", "Поставщик", "ID товара", "Товар", "Артикул", "Остаток",
+                   "Минимальный остаток", "Расход в день", "Уже заказано", "К заказу")
+
+
+def reorder_params(velocity_days, cover_days):
+    """Параметры запроса автозаказа; ValueError при некорректных днях."""
+    try:
+        velocity_days = int(velocity_days)
+        cover_days = int(cover_days)
+    except (TypeError, ValueError):
+        raise ValueError("Введите число дней.")
+    if velocity_days <= 0 or cover_days < 0:
+        raise ValueError("Окно расчета должно быть больше нуля, запас - не меньше нуля.")
+    return {"velocity_days": velocity_days, "cover_days": cover_days,
+            "delivered": STATUS_DELIVERED, "cancelled": STATUS_CANCELLED, "no_supplier": NO_SUPPLIER}
+
+
+def reorder_proposals(db, velocity_days=VELOCITY_DAYS, cover_days=COVER_DAYS):
+    """Предложение автозаказа по поставщикам (строки в порядке REORDER_COLUMNS).
+
+    Товары без поставщика идут последними, с ID поставщика None.
+    """
+    params = reorder_params(velocity_days, cover_days)
+    return db.fetchall(REORDER_QUERY + " ORDER BY supplier_id IS NULL, supplier, product_id", params)
+
+
+@retry_on_busy
+def create_reorder_drafts(db, velocity_days=VELOCITY_DAYS, cover_days=COVER_DAYS):
+    """Черновики заказов по предложению автозаказа: по одной поставке на поставщика.
+
+    Предложение считается один раз во временную таблицу, затем поставки и
+    позиции создаются двумя INSERT ... SELECT в одной транзакции. Уже
+    заказанное (включая черновики) вычитается, поэтому повторный запуск не
+    дублирует заказы. Товары без поставщика пропускаются (их показывает
+    reorder_proposals). Возвращает [(supply_id, поставщик, позиций)].
+    """
+    params = reorder_params(velocity_days, cover_days)
+    with db.transaction() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS temp.reorder_proposal")
+        cursor.execute("CREATE TEMP TABLE reorder_proposal AS " + REORDER_QUERY, params)
+        try:
+            last_supply_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM supplies").fetchone()[0]
+            cursor.execute('''
+                INSERT INTO supplies (supplier_id, date, status)
+                SELECT supplier_id, date('now'), ? FROM reorder_proposal
+                WHERE supplier_id IS NOT NULL
+                GROUP BY supplier_id ORDER BY supplier_id
+            ''', (STATUS_DRAFT,))
+            cursor.execute('''
+                INSERT INTO supply_items (supply_id, product_id, quantity)
+                SELECT s.id, r.product_id, r.proposed
+                FROM reorder_proposal r
+                JOIN supplies s ON s.supplier_id = r.supplier_id AND s.id > ?
+                ORDER BY s.id, r.product_id
+            ''', (last_supply_id,))
+            return cursor.execute('''
+                SELECT s.id, sp.name, COUNT(*)
+                FROM supplies s
+                JOIN suppliers sp ON sp.id = s.supplier_id
+                JOIN supply_items si ON si.supply_id = s.id
+                WHERE s.id > ?
+                GROUP BY s.id
+                ORDER BY s.id
+            ''', (last_supply_id,)).fetchall()
+        finally:
+            cursor.execute("DROP TABLE temp.reorder_proposal")
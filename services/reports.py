@@ -0,0 +1,158 @@
+import io
+from itertools import groupby
+from operator import itemgetter
+
+from services.inventory import STOCK_MOVEMENT_QUERY
+
+STOCK_REPORT_QUERY = '''
+    SELECT p.name, p.sku, i.quantity, p.min_stock
+    FROM products p
+    LEFT JOIN inventory i ON p.id = i.product_id
+'''
+STOCK_REPORT_COLUMNS = ("Название", "Артикул", "Остаток", "Мин. остаток")
+SUPPLY_REPORT_COLUMNS = ("ID", "Поставщик", "Дата", "Статус", "Товар", "Количество", "Принято")
+
+
+def write_preview_note(out, limit):
+    """Пометка о том, что на экране показана только часть отчета."""
+    out.write(f"... на экране показано строк: {limit}. Полный отчет доступен через экспорт в файл.\n")
+
+
+def build_stock_report(db, out=None, limit=None):
+    """Формирование текста отчета по остаткам.
+
+    Текст пишется в out (файловый объект); если out не задан, отчет
+    возвращается строкой. limit ограничивает число строк товаров.
+    """
+    buffer = out if out is not None else io.StringIO()
+
+    # Получение данных об остатках
+    query = STOCK_REPORT_QUERY
+    params = []
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit + 1)
+
+    # Формирование отчета
+    buffer.write("Отчет по остаткам товаров\n")
+    buffer.write("-" * 50 + "\n")
+    buffer.write(f"{'Название':<20} {'Артикул':<10} {'Остаток':<10} {'Мин. остаток':<10}\n")
+    buffer.write("-" * 50 + "\n")
+    for index, row in enumerate(db.execute(query, params)):
+        if limit and index >= limit:
+            write_preview_note(buffer, limit)
+            break
+        name, sku, quantity, min_stock = row
+        quantity = quantity if quantity is not None else 0
+        warning = " ⚠️" if quantity < min_stock else ""
+        buffer.write(f"{name:<20} {sku:<10} {quantity:<10} {min_stock:<10}{warning}\n")
+    buffer.write("-" * 50 + "\n")
+
+    if out is None:
+        return buffer.getvalue()
+
+
+def supply_report_query(date_from="", date_to="", supplier="", status="", limit=None):
+    """Запрос поставок с позициями для отчета; limit ограничивает число поставок."""
+    where = ["1=1"]
+    params = []
+    if date_from:
+        where.append("s.date >= ?")
+        params.append(date_from)
+    if date_to:
+        where.append("s.date <= ?")
+        params.append(date_to)
+    if supplier:
+        where.append("sp.name LIKE ?")
+        params.append(f"%{supplier}%")
+    if status:
+        where.append("s.status LIKE ?")
+        params.append(f"%{status}%")
+    limit_clause = ""
+    if limit:
+        limit_clause = "LIMIT ?"
+        params.append(limit)
+
+    query = f'''
+        SELECT s.id, sp.name AS supplier, s.date, s.status, p.name, i.quantity, i.received
+        FROM (
+            SELECT s.id, s.supplier_id, s.date, s.status
+            FROM supplies s
+            LEFT JOIN suppliers sp ON s.supplier_id = sp.id
+            WHERE {" AND ".join(where)}
+            ORDER BY s.date DESC, s.id
+            {limit_clause}
+        ) s
+        LEFT JOIN suppliers sp ON s.supplier_id = sp.id
+        LEFT JOIN (supply_items i JOIN products p ON i.product_id = p.id) ON i.supply_id = s.id
+        ORDER BY s.date DESC, s.id, i.id
+    '''
+    return query, params
+
+
+def build_supply_report(db, date_from="", date_to="", supplier="", status="", out=None, limit=None):
+    """Формирование текста отчета по поставкам.
+
+    Поставки и их позиции читаются одним упорядоченным запросом и
+    группируются по поставке на лету. Текст пишется в out (файловый
+    объект); если out не задан, отчет возвращается строкой.
+    limit ограничивает число поставок.
+    """
+    buffer = out if out is not None else io.StringIO()
+    query, params = supply_report_query(date_from, date_to, supplier, status,
+                                        limit + 1 if limit else None)
+
+    # Формирование отчета
+    buffer.write("Отчет по поставкам\n")
+    buffer.write("-" * 50 + "\n")
+    buffer.write(f"{'ID':<5} {'Поставщик':<20} {'Дата':<15} {'Статус':<10}\n")
+    buffer.write("-" * 50 + "\n")
+    rows = db.execute(query, params)
+    groups = groupby(rows, key=itemgetter(0, 1, 2, 3))
+    for index, ((supply_id, supplier_name, date, supply_status), items) in enumerate(groups):
+        if limit and index >= limit:
+            write_preview_note(buffer, limit)
+            break
+        buffer.write(f"{supply_id:<5} {supplier_name or '':<20} {date:<15} {supply_status:<10}\n")
+        for item in items:
+            product_name, quantity, received = item[4], item[5], item[6]
+            if product_name is not None:
+                buffer.write(f"    - {product_name} (Количество: {quantity}, принято: {received})\n")
+    buffer.write("-" * 50 + "\n")
+
+    if out is None:
+        return buffer.getvalue()
+
+
+def build_stock_movement_report(db, out=None, limit=None):
+    """Формирование текста отчета по движению товаров.
+
+    Текст пишется в out (файловый объект); если out не задан, отчет
+    возвращается строкой. limit ограничивает число строк движения.
+    """
+    buffer = out if out is not None else io.StringIO()
+
+    # Получение данных о движении товаров
+    query = STOCK_MOVEMENT_QUERY
+    params = []
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit + 1)
+
+    # Формирование отчета
+    buffer.write("Отчет по движению товаров\n")
+    buffer.write("-" * 50 + "\n")
+    buffer.write(f"{'Дата':<20} {'Название':<20} {'Изменение':<10} {'Причина':<15} {'Было':<8} {'Стало':<8}\n")
+    buffer.write("-" * 50 + "\n")
+    for index, movement in enumerate(db.execute(query, params)):
+        if limit and index >= limit:
+            write_preview_note(buffer, limit)
+            break
+        date, product_name, quantity_change, reason, quantity_before, quantity_after = movement
+        before = quantity_before if quantity_before is not None else ""
+        after = quantity_after if quantity_after is not None else ""
+        buffer.write(f"{date:<20} {product_name:<20} {quantity_change:<10} {reason or '':<15} {before:<8} {after:<8}\n")
+    buffer.write("-" * 50 + "\n")
+
+    if out is None:
+        return buffer.getvalue()
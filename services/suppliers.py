@@ -0,0 +1,83 @@
+from database import retry_on_busy
+from services.paging import page_query
+from services.reference import reference_cache
+
+SUPPLIER_SELECT = "id, name, contact_person, phone, email, address"
+SUPPLIER_FROM = "FROM suppliers"
+SUPPLIER_QUERY = f"SELECT {SUPPLIER_SELECT} {SUPPLIER_FROM}"
+SUPPLIER_COLUMNS = ("ID", "Название", "Контактное лицо", "Телефон", "Email", "Адрес")
+
+# Колонки таблицы поставщиков, по которым разрешена сортировка, и их SQL-выражения
+SUPPLIER_SORT_COLUMNS = {
+    "ID": "id",
+    "Название": "name",
+    "Контактное лицо": "COALESCE(contact_person, '')",
+    "Телефон": "COALESCE(phone, '')",
+    "Email": "COALESCE(email, '')",
+    "Адрес": "COALESCE(address, '')",
+}
+
+
+def list_suppliers(db):
+    """Все поставщики: (id, name, contact_person, phone, email, address)."""
+    return db.fetchall(SUPPLIER_QUERY)
+
+
+def list_supplier_page(db, sort_column=None, descending=False, last_key=None, limit=200):
+    """Страница таблицы поставщиков с сортировкой в SQL.
+
+    Две последние колонки строк - значения сортировки и ключа (см. list_products).
+    """
+    sort_expr = SUPPLIER_SORT_COLUMNS.get(sort_column) or "id"
+    query, params = page_query(SUPPLIER_SELECT, SUPPLIER_FROM, "id", sort_expr, descending,
+                               last_key=last_key, limit=limit)
+    return db.fetchall(query, params)
+
+
+def supplier_names(db):
+    """Названия поставщиков для выпадающих списков (из кэша справочников)."""
+    return reference_cache(db).name_list("suppliers")
+
+
+def find_supplier_id(db, name):
+    """ID поставщика по названию (из кэша справочников); ValueError, если поставщика нет."""
+    supplier_id = reference_cache(db).find_id("suppliers", name)
+    if supplier_id is None:
+        raise ValueError("Указанный поставщик не существует.")
+    return supplier_id
+
+
+@retry_on_busy
+def add_supplier(db, name, contact_person="", phone="", email="", address=""):
+    """Добавление поставщика, возвращает его id."""
+    if not name:
+        raise ValueError("Название поставщика обязательно для заполнения.")
+    with db.transaction() as cursor:
+        cursor.execute('''
+            INSERT INTO suppliers (name, contact_person, phone, email, address)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (name, contact_person, phone, email, address))
+        return cursor.lastrowid
+
+
+@retry_on_busy
+def update_supplier(db, supplier_id, name, contact_person="", phone="", email="", address=""):
+    """Изменение данных поставщика."""
+    if not name:
+        raise ValueError("Название поставщика обязательно для заполнения.")
+    with db.transaction() as cursor:
+        cursor.execute('''
+            UPDATE suppliers
+            SET name = ?, contact_person = ?, phone = ?, email = ?, address = ?
+            WHERE id = ?
+        ''', (name, contact_person, phone, email, address, supplier_id))
+
+
+@retry_on_busy
+def delete_supplier(db, supplier_id):
+    """Удаление поставщика; поставщика с поставками удалить нельзя (ValueError)."""
+    with db.transaction() as cursor:
+        count = cursor.execute("SELECT COUNT(*) FROM supplies WHERE supplier_id = ?", (supplier_id,)).fetchone()[0]
+        if count > 0:
+            raise ValueError(f"Поставщик связан с {count} поставками. Удаление невозможно.")
+        cursor.execute("DELETE FROM suppliers WHERE id = ?", (supplier_id,))
@@ -0,0 +1,364 @@
+from database import retry_on_busy
+from events import SUPPLY_ORDERED, SUPPLY_RECEIVED, bus
+from services.paging import page_query
+from services.inventory import parse_counts
+from services.products import product_exists
+from services.suppliers import find_supplier_id
+
+STATUS_DRAFT = "Черновик"
+STATUS_PENDING = "Ожидается"
+STATUS_PARTIAL = "Частично доставлено"
+STATUS_DELIVERED = "Доставлено"
+STATUS_CANCELLED = "Отменено"
+SUPPLY_STATUSES = [STATUS_DRAFT, STATUS_PENDING, "В пути", STATUS_PARTIAL, STATUS_DELIVERED, STATUS_CANCELLED]
+
+SUPPLY_SELECT = "s.id, sp.name, s.date, s.status"
+SUPPLY_FROM = '''
+    FROM supplies s
+    LEFT JOIN suppliers sp ON s.supplier_id = sp.id
+'''
+SUPPLY_LIST_QUERY = f"SELECT {SUPPLY_SELECT} {SUPPLY_FROM}"
+SUPPLY_COLUMNS = ("ID", "Поставщик", "Дата", "Статус")
+RECEIPT_COLUMNS = ("Документ", "Дата", "Товаров", "Количество")
+
+# Колонки таблицы поставок, по которым разрешена сортировка, и их SQL-выражения
+SUPPLY_SORT_COLUMNS = {
+    "ID": "s.id",
+    "Поставщик": "COALESCE(sp.name, '')",
+    "Дата": "s.date",
+    "Статус": "s.status",
+}
+
+
+def list_supplies(db):
+    """Все поставки: (id, поставщик, дата, статус)."""
+    return db.fetchall(SUPPLY_LIST_QUERY)
+
+
+def supply_history(db):
+    """Поставки, новые первыми."""
+    return db.fetchall(SUPPLY_LIST_QUERY + " ORDER BY s.date DESC")
+
+
+def supply_filter(supplier="", date="", status=""):
+    """Условия WHERE и параметры отбора поставок по поставщику, дате и статусу."""
+    where = []
+    params = []
+    if supplier:
+        where.append("sp.name LIKE ?")
+        params.append(f"%{supplier}%")
+    if date:
+        where.append("s.date = ?")
+        params.append(date)
+    if status:
+        where.append("s.status LIKE ?")
+        params.append(f"%{status}%")
+    return where, params
+
+
+def supply_list_query(supplier="", date="", status=""):
+    """Запрос списка поставок с отбором по поставщику, дате и статусу."""
+    where, params = supply_filter(supplier, date, status)
+    query = SUPPLY_LIST_QUERY
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    return query, params
+
+
+def filter_supplies(db, supplier="", date="", status=""):
+    """Поставки с отбором по поставщику, дате и статусу."""
+    query, params = supply_list_query(supplier, date, status)
+    return db.fetchall(query, params)
+
+
+def list_supply_page(db, supplier="", date="", status="", sort_column=None, descending=False,
+                     last_key=None, limit=200):
+    """Страница таблицы поставок с отбором и сортировкой в SQL.
+
+    Две последние колонки строк - значения сортировки и ключа (см. list_products).
+    """
+    where, params = supply_filter(supplier, date, status)
+    sort_expr = SUPPLY_SORT_COLUMNS.get(sort_column) or "s.id"
+    query, query_params = page_query(SUPPLY_SELECT, SUPPLY_FROM, "s.id", sort_expr, descending,
+                                     where, params, last_key=last_key, limit=limit)
+    return db.fetchall(query, query_params)
+
+
+def supply_items(db, supply_id):
+    """Позиции поставки: (название товара, количество, принято)."""
+    return db.fetchall('''
+        SELECT p.name, i.quantity, i.received
+        FROM supply_items i
+        JOIN products p ON i.product_id = p.id
+        WHERE i.supply_id = ?
+    ''', (supply_id,))
+
+
+@retry_on_busy
+def add_supply(db, supplier, date, status):
+    """Добавление поставки; поставщик задается названием. Возвращает id."""
+    if not all([supplier, date, status]):
+        raise ValueError("Все поля обязательны для заполнения.")
+    with db.transaction() as cursor:
+        supplier_id = find_supplier_id(db, supplier)
+        cursor.execute('''
+            INSERT INTO supplies (supplier_id, date, status)
+            VALUES (?, ?, ?)
+        ''', (supplier_id, date, status))
+        return cursor.lastrowid
+
+
+def parse_quantity(quantity):
+    """Количество товара в позиции: целое больше нуля, иначе ValueError."""
+    try:
+        quantity = int(quantity)
+    except (TypeError, ValueError):
+        raise ValueError("Введите корректное количество.")
+    if quantity <= 0:
+        raise ValueError("Количество должно быть больше нуля.")
+    return quantity
+
+
+@retry_on_busy
+def add_supply_item(db, supply_id, product_id, quantity):
+    """Добавление товара (по id, например из выбора товара) в поставку."""
+    if not all([product_id, quantity]):
+        raise ValueError("Все поля обязательны для заполнения.")
+    quantity = parse_quantity(quantity)
+    with db.transaction() as cursor:
+        product_exists(db, product_id)
+        cursor.execute('''
+            INSERT INTO supply_items (supply_id, product_id, quantity)
+            VALUES (?, ?, ?)
+        ''', (supply_id, product_id, quantity))
+
+
+@retry_on_busy
+def create_supply_order(db, supplier_id, items):
+    """Оформление заказа поставщику: поставка и ее позиции одной транзакцией.
+
+    items - список пар (product_id, quantity). Возвращает id новой поставки.
+    """
+    if not items:
+        raise ValueError("Добавьте в заказ хотя бы один товар.")
+    with db.transaction() as cursor:
+        cursor.execute('''
+            INSERT INTO supplies (supplier_id, date, status)
+            VALUES (?, date('now'), ?)
+        ''', (supplier_id, STATUS_PENDING))
+        supply_id = cursor.lastrowid
+
+        # Добавление товаров в заказ
+        cursor.executemany('''
+            INSERT INTO supply_items (supply_id, product_id, quantity)
+            VALUES (?, ?, ?)
+        ''', [(supply_id, product_id, quantity) for product_id, quantity in items])
+    bus.publish(SUPPLY_ORDERED, supply_id=supply_id, supplier_id=supplier_id, items=len(items))
+    return supply_id
+
+
+@retry_on_busy
+def confirm_supply_order(db, supply_id):
+    """Подтверждение черновика заказа (статус "Ожидается").
+
+    Возвращает False, если поставка не является черновиком.
+    """
+    with db.transaction() as cursor:
+        cursor.execute('''
+            UPDATE supplies SET status = ?
+            WHERE id = ? AND status = ?
+            RETURNING supplier_id
+        ''', (STATUS_PENDING, supply_id, STATUS_DRAFT))
+        row = cursor.fetchone()
+        if row is None:
+            return False
+        items = cursor.execute("SELECT COUNT(*) FROM supply_items WHERE supply_id = ?", (supply_id,)).fetchone()[0]
+    bus.publish(SUPPLY_ORDERED, supply_id=supply_id, supplier_id=row[0], items=items)
+    return True
+
+
+def open_receipt(cursor, supply_id):
+    """Новый документ приемки поставки внутри открытой транзакции.
+
+    Статус проверяется в той же IMMEDIATE-транзакции, поэтому повторное
+    нажатие или второй терминал не удвоят остатки. Черновик и отмененную
+    поставку принять нельзя. Возвращает id документа или None, если
+    поставка уже доставлена.
+    """
+    cursor.execute("SELECT status FROM supplies WHERE id = ?", (supply_id,))
+    row = cursor.fetchone()
+    if row is None:
+        raise ValueError(f"Поставка #{supply_id} не найдена.")
+    if row[0] == STATUS_DRAFT:
+        raise ValueError(f"Поставка #{supply_id} - черновик: подтвердите заказ перед приемкой.")
+    if row[0] == STATUS_CANCELLED:
+        raise ValueError(f"Поставка #{supply_id} отменена.")
+    if row[0] == STATUS_DELIVERED:
+        return None
+    cursor.execute("INSERT INTO supply_receipts (supply_id, date) VALUES (?, datetime('now'))", (supply_id,))
+    return cursor.lastrowid
+
+
+def apply_receipt(cursor, supply_id, receipt_id):
+    """Проведение документа приемки внутри открытой транзакции.
+
+    Строки документа (по одной на товар) применяются set-based запросами:
+    остатки увеличиваются одним UPSERT (товары без строки в inventory
+    получают ее), история пишется одним INSERT, принятое количество позиций -
+    одним UPDATE. Статус поставки выводится из принятого: все товары приняты
+    полностью - "Доставлено", иначе - "Частично доставлено".
+    Возвращает (число товаров, статус).
+    """
+    cursor.execute('''
+        INSERT INTO inventory (product_id, quantity, last_updated)
+        SELECT product_id, quantity, datetime('now') FROM supply_receipt_items WHERE receipt_id = ?
+        ON CONFLICT (product_id) DO UPDATE
+        SET quantity = quantity + excluded.quantity, version = version + 1,
+            last_updated = excluded.last_updated
+    ''', (receipt_id,))
+    received = cursor.rowcount
+
+    # Запись в историю изменений; остаток "после" уже обновлен в этой транзакции
+    cursor.execute('''
+        INSERT INTO stock_history (product_id, change_reason, quantity_change, quantity_before, quantity_after, date)
+        SELECT ri.product_id, ?, ri.quantity, inv.quantity - ri.quantity, inv.quantity, datetime('now')
+        FROM supply_receipt_items ri
+        JOIN inventory inv ON inv.product_id = ri.product_id
+        WHERE ri.receipt_id = ?
+    ''', (f"Поступление по поставке #{supply_id}", receipt_id))
+
+    # Принятое распределяется по позициям товара в порядке id: каждая позиция
+    # добирается до своего количества, излишек ложится на последнюю позицию
+    cursor.execute('''
+        WITH lines AS (
+            SELECT id, product_id, MAX(quantity - received, 0) AS open,
+                   SUM(MAX(quantity - received, 0)) OVER (PARTITION BY product_id ORDER BY id) AS open_through,
+                   SUM(MAX(quantity - received, 0)) OVER (PARTITION BY product_id) AS open_total,
+                   ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY id DESC) AS from_end
+            FROM supply_items
+            WHERE supply_id = :supply_id
+        ),
+        shares AS (
+            SELECT l.id,
+                   MIN(l.open, MAX(ri.quantity - (l.open_through - l.open), 0))
+                   + CASE WHEN l.from_end = 1 THEN MAX(ri.quantity - l.open_total, 0) ELSE 0 END AS take
+            FROM lines l
+            JOIN supply_receipt_items ri ON ri.product_id = l.product_id
+            WHERE ri.receipt_id = :receipt_id
+        )
+        UPDATE supply_items SET received = received + shares.take
+        FROM shares
+        WHERE supply_items.id = shares.id AND shares.take > 0
+    ''', {"receipt_id": receipt_id, "supply_id": supply_id})
+
+    cursor.execute('''
+        UPDATE supplies SET status = CASE WHEN EXISTS (
+            SELECT 1 FROM supply_items WHERE supply_id = :supply_id
+            GROUP BY product_id HAVING SUM(received) < SUM(quantity)
+        ) THEN :partial ELSE :delivered END
+        WHERE id = :supply_id
+        RETURNING status
+    ''', {"supply_id": supply_id, "partial": STATUS_PARTIAL, "delivered": STATUS_DELIVERED})
+    return received, cursor.fetchone()[0]
+
+
+def publish_receipt(supply_id, receipt_id, received, status):
+    """Событие SUPPLY_RECEIVED после фиксации документа приемки."""
+    bus.publish(SUPPLY_RECEIVED, supply_id=supply_id, receipt_id=receipt_id, items=received,
+                partial=status != STATUS_DELIVERED)
+
+
+@retry_on_busy
+def receive_supply(db, supply_id):
+    """Оприходование остатка поставки одним документом приемки.
+
+    В документ попадает то, что еще не принято по каждому товару; остатки,
+    история и статус обновляются в той же транзакции (см. apply_receipt).
+    После фиксации публикуется одно событие SUPPLY_RECEIVED на всю поставку.
+    Возвращает число оприходованных товаров или None, если поставка уже доставлена.
+    """
+    with db.transaction() as cursor:
+        receipt_id = open_receipt(cursor, supply_id)
+        if receipt_id is None:
+            return None
+        cursor.execute('''
+            INSERT INTO supply_receipt_items (receipt_id, product_id, quantity)
+            SELECT ?, product_id, SUM(quantity) - SUM(received)
+            FROM supply_items
+            WHERE supply_id = ?
+            GROUP BY product_id
+            HAVING SUM(quantity) > SUM(received)
+            ORDER BY MIN(id)
+        ''', (receipt_id, supply_id))
+        if cursor.rowcount == 0:
+            # Все уже принято: документ не нужен, поставка просто закрывается
+            cursor.execute("DELETE FROM supply_receipts WHERE id = ?", (receipt_id,))
+            cursor.execute("UPDATE supplies SET status = ? WHERE id = ?", (STATUS_DELIVERED, supply_id))
+            return 0
+        received, status = apply_receipt(cursor, supply_id, receipt_id)
+    publish_receipt(supply_id, receipt_id, received, status)
+    return received
+
+
+def supply_lines(db, supply_id):
+    """Позиции поставки для приемки по товарам: (id, название, артикул, заказано, принято)."""
+    return db.fetchall('''
+        SELECT p.id, p.name, p.sku, SUM(i.quantity), SUM(i.received)
+        FROM supply_items i
+        JOIN products p ON i.product_id = p.id
+        WHERE i.supply_id = ?
+        GROUP BY p.id
+        ORDER BY MIN(i.id)
+    ''', (supply_id,))
+
+
+def supply_receipts(db, supply_id):
+    """Документы приемки поставки: (id, дата, товаров, количество)."""
+    return db.fetchall('''
+        SELECT r.id, r.date, COUNT(ri.id), COALESCE(SUM(ri.quantity), 0)
+        FROM supply_receipts r
+        LEFT JOIN supply_receipt_items ri ON ri.receipt_id = r.id
+        WHERE r.supply_id = ?
+        GROUP BY r.id
+        ORDER BY r.id
+    ''', (supply_id,))
+
+
+@retry_on_busy
+def receive_supply_counts(db, supply_id, counts):
+    """Частичная приемка поставки: документ приемки с количествами counts.
+
+    counts - {product_id: количество} (отсканированное или введенное
+    вручную); все товары должны входить в поставку, нулевые количества
+    пропускаются. Строки документа
+    пишутся одним INSERT из json_each, затем документ проводится
+    (см. apply_receipt). Возвращает (id документа, число товаров, статус
+    поставки) или None, если поставка уже доставлена.
+    """
+    counts = parse_counts(counts)
+    with db.transaction() as cursor:
+        receipt_id = open_receipt(cursor, supply_id)
+        if receipt_id is None:
+            return None
+
+        cursor.execute('''
+            SELECT COALESCE(p.name, c.key) FROM json_each(?) c
+            LEFT JOIN products p ON p.id = CAST(c.key AS INTEGER)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM supply_items
+                WHERE supply_id = ? AND product_id = CAST(c.key AS INTEGER)
+            )
+        ''', (counts, supply_id))
+        extra = [row[0] for row in cursor.fetchall()]
+        if extra:
+            raise ValueError(f"Товары не входят в поставку #{supply_id}: {', '.join(map(str, extra))}.")
+
+        cursor.execute('''
+            INSERT INTO supply_receipt_items (receipt_id, product_id, quantity)
+            SELECT ?, CAST(key AS INTEGER), value FROM json_each(?) WHERE value > 0
+        ''', (receipt_id, counts))
+        if cursor.rowcount == 0:
+            raise ValueError("Нет товаров к приемке.")
+        received, status = apply_receipt(cursor, supply_id, receipt_id)
+    publish_receipt(supply_id, receipt_id, received, status)
+    return receipt_id, received, status
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from initialize_db import upgrade_database
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Пустая база актуальной схемы во временном каталоге."""
+    database = Database(str(tmp_path / "inventory.db"))
+    upgrade_database(database.connect())
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def catalog(db):
+    """Поставщик, категория и три товара с нулевыми остатками; возвращает id товаров."""
+    with db.transaction() as cursor:
+        cursor.execute("INSERT INTO categories (name) VALUES ('Хлеб')")
+        cursor.execute("INSERT INTO suppliers (name) VALUES ('Пекарня')")
+        cursor.executemany('''
+            INSERT INTO products (name, category_id, sku, purchase_price, retail_price, min_stock, supplier_id)
+            VALUES (?, 1, ?, 10, 20, 5, 1)
+        ''', [(f"Товар {i}", f"SKU{i}") for i in range(1, 4)])
+        cursor.execute("INSERT INTO inventory (product_id, quantity, last_updated) "
+                       "SELECT id, 0, datetime('now') FROM products")
+    return [row[0] for row in db.fetchall("SELECT id FROM products ORDER BY id")]
+
+
+@pytest.fixture
+def db_at():
+    """Database для файла уже открытого соединения sqlite3 (закрывается после теста)."""
+    opened = []
+
+    def open_db(conn):
+        database = Database(conn.execute("PRAGMA database_list").fetchone()[2])
+        opened.append(database)
+        return database
+
+    yield open_db
+    for database in opened:
+        database.close()
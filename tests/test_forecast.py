@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta, timezone
+
+from services import forecast, inventory
+
+
+def rates(db):
+    return {row[0]: row[5] * forecast.AVERAGE_DAYS for row in forecast.forecast_catalog(db)}
+
+
+def test_corrections_are_not_demand(db, catalog):
+    inventory.move_stock(db, catalog[0], 100, "Приход")
+    inventory.move_stock(db, catalog[0], -14, "Продажа")
+    inventory.adjust_stock(db, catalog[0], 50, "Инвентаризация")
+    inventory.apply_stock_counts(db, {catalog[0]: 40}, "Пересчет", recount=True)
+
+    assert round(rates(db)[catalog[0]]) == 14
+
+
+def test_demand_days_use_utc(db, catalog):
+    # Запись в последние секунды вчерашнего дня по UTC - вне сегодняшнего дня
+    today = datetime.now(timezone.utc).date()
+    db.execute("INSERT INTO stock_history (product_id, change_reason, quantity_change, date) VALUES (?, ?, ?, ?)",
+               (catalog[1], "Продажа", -28, f"{today - timedelta(days=1)} 23:59:59"))
+    db.execute("INSERT INTO stock_history (product_id, change_reason, quantity_change, date) VALUES (?, ?, ?, ?)",
+               (catalog[1], "Продажа", -28, f"{today + timedelta(days=1)} 00:00:01"))
+
+    demand = db.fetchall(forecast.DAILY_DEMAND_QUERY, {"today": today.isoformat(), "since": "-89 days"})
+
+    assert demand == [(catalog[1], 1, 28)]
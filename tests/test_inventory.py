@@ -0,0 +1,52 @@
+import pytest
+
+from services import inventory, supplies
+
+
+def stock(db, product_id):
+    return db.fetchone("SELECT quantity FROM inventory WHERE product_id = ?", (product_id,))[0]
+
+
+def test_recount_records_zero(db, catalog):
+    inventory.move_stock(db, catalog[0], 7, "Приход")
+
+    changes = inventory.apply_stock_counts(db, {catalog[0]: 0, catalog[1]: 3}, "Пересчет", recount=True)
+
+    assert changes == [(catalog[0], 7, 0), (catalog[1], 0, 3)]
+    assert stock(db, catalog[0]) == 0
+
+
+def test_negative_count_is_rejected(db, catalog):
+    with pytest.raises(ValueError):
+        inventory.apply_stock_counts(db, {catalog[0]: -1}, "Пересчет", recount=True)
+
+
+def test_receipt_skips_zero_counts(db, catalog):
+    supply_id = supplies.create_supply_order(db, 1, [(catalog[0], 5), (catalog[1], 5)])
+
+    with pytest.raises(ValueError):
+        supplies.receive_supply_counts(db, supply_id, {catalog[0]: 0})
+    _, count, _ = supplies.receive_supply_counts(db, supply_id, {catalog[0]: 2, catalog[1]: 0})
+
+    assert count == 1
+    assert db.fetchone("SELECT COUNT(*) FROM supply_receipts")[0] == 1
+
+
+def test_counts_publish_low_stock_without_extra_queries(db, catalog):
+    from events import LOW_STOCK, STOCK_CHANGED, bus
+
+    inventory.apply_stock_counts(db, {product_id: 10 for product_id in catalog}, "Приход")
+    events = []
+    handler = lambda kind, data: events.append((kind, data))
+    bus.subscribe(handler, STOCK_CHANGED, LOW_STOCK)
+    statements = []
+    db.connect().set_trace_callback(statements.append)
+    try:
+        inventory.apply_stock_counts(db, {catalog[0]: 1, catalog[1]: 2, catalog[2]: 8}, "Пересчет", recount=True)
+    finally:
+        db.connect().set_trace_callback(None)
+        bus.unsubscribe(handler)
+
+    assert [data["name"] for kind, data in events if kind == LOW_STOCK] == ["Товар 1", "Товар 2"]
+    assert len([kind for kind, _ in events if kind == STOCK_CHANGED]) == 3
+    assert not any("SELECT name, min_stock FROM products WHERE id =" in statement for statement in statements)
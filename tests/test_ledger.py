@@ -0,0 +1,56 @@
+from services import inventory, ledger
+
+
+def history_dates(db, product_id, dates):
+    """Перенос записей журнала товара на заданные даты (по порядку id) вместе со снимками."""
+    ids = [row[0] for row in db.fetchall("SELECT id FROM stock_history WHERE product_id = ? ORDER BY id",
+                                         (product_id,))]
+    with db.transaction() as cursor:
+        for history_id, moment in zip(ids, dates):
+            cursor.execute("UPDATE stock_history SET date = ? WHERE id = ?", (moment, history_id))
+            cursor.execute("UPDATE stock_snapshots SET date = ? WHERE history_id = ?", (moment, history_id))
+
+
+def test_stock_at_moments(db, catalog):
+    product = catalog[0]
+    inventory.move_stock(db, product, 10, "Приход")
+    inventory.move_stock(db, product, -3, "Продажа")
+    inventory.adjust_stock(db, product, 20, "Инвентаризация")
+    history_dates(db, product, ["2026-01-01 10:00:00", "2026-01-02 10:00:00", "2026-01-03 10:00:00"])
+
+    def at(moment):
+        return ledger.stock_at(db, moment, product)[0][3]
+
+    assert at("2025-12-31") == 0
+    assert at("2026-01-01") == 10
+    assert at("2026-01-02 09:59:59") == 10
+    assert at("2026-01-02") == 7
+    assert at("2026-01-03") == 20
+
+
+def test_stock_at_pages_match_full_list(db, catalog):
+    for product_id in catalog:
+        inventory.move_stock(db, product_id, product_id * 5, "Приход")
+    full = ledger.stock_at(db, "2100-01-01")
+
+    rows, last_key = [], None
+    while True:
+        page = ledger.stock_at_page(db, "2100-01-01", "Название", True, last_key, 2)
+        rows.extend(row[:-2] for row in page)
+        if len(page) < 2:
+            break
+        last_key = page[-1][-2:]
+
+    assert rows == sorted(full, key=lambda row: row[1], reverse=True)
+    assert [row[3] for row in full] == [product_id * 5 for product_id in catalog]
+
+
+def test_check_ledger(db, catalog):
+    inventory.move_stock(db, catalog[0], 10, "Приход")
+    inventory.apply_stock_counts(db, {catalog[1]: 4}, "Пересчет", recount=True)
+    assert ledger.check_ledger(db) == []
+
+    # Изменение остатка в обход журнала
+    db.execute("UPDATE inventory SET quantity = 12 WHERE product_id = ?", (catalog[0],))
+
+    assert ledger.check_ledger(db) == [(catalog[0], "Товар 1", "SKU1", 12, 10, 2, 0)]
@@ -0,0 +1,63 @@
+import logging
+import sqlite3
+
+import pytest
+
+from initialize_db import MIGRATIONS, create_tables, migrate_database
+from services import ledger, supplies
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    """База исходной схемы (только таблицы, user_version 0) с данными прежней версии программы."""
+    conn = sqlite3.connect(tmp_path / "baseline.db")
+    create_tables(conn)
+    conn.executescript('''
+        INSERT INTO categories (name) VALUES ('Хлеб');
+        INSERT INTO suppliers (name) VALUES ('Пекарня');
+        INSERT INTO products (name, category_id, sku, manufacturer, purchase_price, retail_price, min_stock, supplier_id)
+        VALUES ('Батон', 1, 'B1', 'Завод', 10, 20, 5, 1), ('Багет', 1, 'B2', 'Завод', 15, 30, 2, 1);
+        INSERT INTO inventory (product_id, quantity, last_updated) VALUES
+            (1, 12, '2026-01-01 10:00:00'), (2, 3, '2026-01-01 10:00:00'), (1, 12, '2026-01-05 10:00:00');
+        INSERT INTO supplies (supplier_id, date, status) VALUES (1, '2026-01-02', 'Доставлено'), (1, '2026-01-03', 'Ожидается');
+        INSERT INTO supply_items (supply_id, product_id, quantity) VALUES (1, 1, 10), (1, 2, 3), (2, 1, 4);
+        INSERT INTO stock_history (product_id, change_reason, quantity_change, date) VALUES
+            (1, 'Поступление', 10, '2026-01-02 09:00:00'), (2, 'Поступление', 3, '2026-01-02 09:00:00');
+    ''')
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_migrate_from_baseline(baseline, caplog, db_at):
+    with caplog.at_level(logging.INFO, logger="initialize_db"):
+        assert migrate_database(baseline) == len(MIGRATIONS)
+    assert baseline.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+    assert "удалено строк: 1" in caplog.text
+
+    # Дубликат остатков объединен в последнюю строку
+    assert baseline.execute("SELECT id, product_id, quantity, last_updated FROM inventory ORDER BY product_id").fetchall() \
+        == [(3, 1, 12, "2026-01-05 10:00:00"), (2, 2, 3, "2026-01-01 10:00:00")]
+    # Доставленная поставка принята полностью одним документом, ожидаемая - нет
+    assert baseline.execute("SELECT supply_id, product_id, received FROM supply_items ORDER BY id").fetchall() \
+        == [(1, 1, 10), (1, 2, 3), (2, 1, 0)]
+    assert baseline.execute("SELECT COUNT(*) FROM supply_receipts WHERE supply_id = 1").fetchone()[0] == 1
+    # Повторный запуск ничего не меняет
+    assert migrate_database(baseline) == len(MIGRATIONS)
+
+    # После миграции база работает с сервисами: приемка и журнал сходятся
+    db = db_at(baseline)
+    assert supplies.receive_supply(db, 2) == 1
+    assert db.fetchone("SELECT quantity FROM inventory WHERE product_id = 1")[0] == 16
+    assert ledger.check_ledger(db) == []
+
+
+def test_conflicting_duplicates_abort_migration(baseline):
+    baseline.execute("UPDATE inventory SET quantity = 7 WHERE id = 3")
+    baseline.commit()
+
+    with pytest.raises(sqlite3.IntegrityError, match="товаров"):
+        migrate_database(baseline)
+
+    assert baseline.execute("PRAGMA user_version").fetchone()[0] == 0
+    assert baseline.execute("SELECT COUNT(*) FROM inventory").fetchone()[0] == 3
@@ -0,0 +1,21 @@
+import threading
+
+from events import SUPPLY_ORDERED, EventBus
+from services.notifications import NotificationRecorder, latest_notifications
+
+
+def test_recorder_writes_through_given_writer(db):
+    event_bus = EventBus()
+    threads = []
+
+    def write(func, *args):
+        threads.append(threading.current_thread().name)
+        return func(db, *args)
+
+    recorder = NotificationRecorder(db, delay=5, event_bus=event_bus, write=write)
+    event_bus.publish(SUPPLY_ORDERED, supply_id=1, supplier_id=1, items=2)
+    event_bus.publish(SUPPLY_ORDERED, supply_id=2, supplier_id=1, items=3)
+    recorder.close()
+
+    assert threads == ["notifications"]
+    assert latest_notifications(db)[0][2] == "Оформлено заказов поставщикам: 2, товаров: 5."
@@ -0,0 +1,17 @@
+from services import products
+
+
+def test_find_products_by_sku(db, catalog):
+    products.preload_products(db)
+
+    found = products.find_products_by_sku(db, ["SKU2", " SKU1 ", "нет", ""])
+
+    assert found == [(catalog[1], "Товар 2"), (catalog[0], "Товар 1"), None, None]
+
+
+def test_find_products_by_sku_sees_new_product(db, catalog):
+    products.preload_products(db)
+    db.execute("INSERT INTO products (name, sku, purchase_price, retail_price, min_stock) "
+               "VALUES ('Новый', 'SKU9', 1, 2, 0)")
+
+    assert products.find_products_by_sku(db, ["SKU9"])[0][1] == "Новый"
@@ -0,0 +1,39 @@
+from services import inventory, reorder
+
+
+def proposed(db):
+    return {row[2]: row[9] for row in reorder.reorder_proposals(db, 30, 14)}
+
+
+def test_corrections_are_not_used_stock(db, catalog):
+    inventory.move_stock(db, catalog[0], 100, "Приход")
+    inventory.move_stock(db, catalog[0], -30, "Продажа")
+    inventory.adjust_stock(db, catalog[0], 2, "Инвентаризация")
+
+    # Нехватка до минимума 3 + расход 1 в день за 14 дней; корректировка на -68 не расход
+    assert proposed(db)[catalog[0]] == 3 + 14
+
+
+def test_drafts_are_idempotent(db, catalog):
+    first = reorder.create_reorder_drafts(db)
+
+    assert first == [(first[0][0], "Пекарня", len(catalog))]
+    assert reorder.create_reorder_drafts(db) == []
+    assert reorder.reorder_proposals(db) == []
+    assert db.fetchone("SELECT COUNT(*) FROM supplies")[0] == 1
+
+
+def test_products_without_supplier_are_listed_but_not_drafted(db, catalog):
+    db.execute("UPDATE products SET supplier_id = NULL WHERE id = ?", (catalog[1],))
+    db.execute("UPDATE products SET supplier_id = 99 WHERE id = ?", (catalog[2],))
+
+    rows = reorder.reorder_proposals(db)
+    assert [(row[0], row[1], row[2]) for row in rows] == [
+        (1, "Пекарня", catalog[0]),
+        (None, reorder.NO_SUPPLIER, catalog[1]),
+        (None, reorder.NO_SUPPLIER, catalog[2]),
+    ]
+
+    drafts = reorder.create_reorder_drafts(db)
+    assert [(name, items) for _, name, items in drafts] == [("Пекарня", 1)]
+    assert db.fetchone("SELECT COUNT(*) FROM supplies WHERE supplier_id IS NULL")[0] == 0
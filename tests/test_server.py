@@ -0,0 +1,92 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from server import ApiServer
+
+
+@pytest.fixture
+def api(db, catalog):
+    """Запущенный API на свободном порту; возвращает функцию запроса (метод, путь, тело) -> (статус, ответ)."""
+    server = ApiServer(("127.0.0.1", 0), db.path, readers=2)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def request(method, path, body=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+        req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req, timeout=5) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    yield request
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("after", ["5", "[1]", "[[1],2]", "{}", "nope"])
+def test_bad_after_is_rejected(api, after):
+    for path in ("/products", "/inventory/history"):
+        status, payload = api("GET", f"{path}?after={after}")
+        assert status == 400
+        assert "after" in payload["error"]
+
+
+def test_page_after_key(api, catalog):
+    status, payload = api("GET", "/products?limit=2")
+    assert status == 200
+    after = json.dumps(payload["next"])
+    status, payload = api("GET", f"/products?limit=2&after={urllib.request.quote(after)}")
+    assert status == 200
+    assert [row[0] for row in payload["items"]] == [catalog[2]]
+
+
+@pytest.mark.parametrize("counts", [5, [5], [[1, 2, 3]], [[[1], 2]], {"1": 2}])
+def test_bad_counts_are_rejected(api, counts):
+    status, payload = api("POST", "/inventory/counts", {"counts": counts, "reason": "Тест"})
+    assert status == 400
+    assert "counts" in payload["error"]
+
+
+def test_bad_order_items_are_rejected(api):
+    status, _ = api("POST", "/supplies/orders", {"supplier_id": 1, "items": 5})
+    assert status == 400
+
+
+def test_unexpected_error_returns_500(api):
+    status, payload = api("POST", "/supplies/orders", {"supplier_id": [1], "items": [[1, 2]]})
+    assert status == 500
+    assert "error" in payload
+    # Соединение и сервер продолжают работать
+    assert api("GET", "/products")[0] == 200
+
+
+def test_notifications_written_by_server_writer(api, catalog):
+    status, payload = api("POST", "/supplies/orders", {"supplier_id": 1, "items": [[catalog[0], 5]]})
+    assert status == 200
+    for _ in range(50):
+        status, payload = api("GET", "/notifications")
+        if payload["items"]:
+            break
+        threading.Event().wait(0.1)
+    assert "заказ" in payload["items"][0][2]
+
+
+def test_stock_at_pages(api, catalog):
+    status, payload = api("GET", "/inventory/at?date=2100-01-01&limit=2&sort=%D0%90%D1%80%D1%82%D0%B8%D0%BA%D1%83%D0%BB")
+    assert status == 200
+    assert [row[2] for row in payload["items"]] == ["SKU1", "SKU2"]
+    assert payload["next"] == ["SKU2", catalog[1]]
+    assert api("GET", "/inventory/at?date=bad")[0] == 400
+
+
+def test_product_lookup_batch(api, catalog):
+    status, payload = api("POST", "/products/lookup", {"skus": ["SKU3", "нет", "SKU1"]})
+    assert status == 200
+    assert payload["items"] == [[catalog[2], "Товар 3"], None, [catalog[0], "Товар 1"]]
+    assert api("POST", "/products/lookup", {"skus": "SKU1"})[0] == 400
@@ -0,0 +1,41 @@
+import pytest
+
+from services import categories, inventory, products, reports, suppliers, supplies
+
+
+def test_catalog_crud(db):
+    category_id = categories.add_category(db, "Хлеб", "Выпечка")
+    suppliers.add_supplier(db, "Пекарня", "Иван", "123", "bake@example.com", "Улица 1")
+    product_id = products.add_product(db, "Батон", "Нарезной", "Хлеб", "B1", "Завод", "10,5", "20", "5", "Пекарня")
+
+    assert products.find_product_id(db, "Батон") == product_id
+    assert categories.product_count(db, category_id) == 1
+    with pytest.raises(ValueError):
+        categories.delete_category(db, category_id)
+    with pytest.raises(ValueError):
+        products.add_product(db, "Без категории", "", "Нет такой", "B2", "Завод", "1", "2", "1", "Пекарня")
+
+    categories.update_category(db, category_id, "Хлебобулочные")
+    assert categories.find_category_id(db, "Хлебобулочные") == category_id
+
+
+def test_stock_version_conflict(db, catalog):
+    quantity, version = inventory.move_stock(db, catalog[0], 10, "Приход")
+    assert inventory.adjust_stock(db, catalog[0], 8, "Инвентаризация", version)[0] == 8
+
+    # Тот же экран со старой версией строки не перезапишет чужое изменение
+    with pytest.raises(ValueError, match="другом сеансе"):
+        inventory.adjust_stock(db, catalog[0], 3, "Инвентаризация", version)
+    assert db.fetchall("SELECT quantity_before, quantity_after FROM stock_history WHERE product_id = ? ORDER BY id",
+                       (catalog[0],)) == [(0, 10), (10, 8)]
+
+
+def test_supply_order_and_report(db, catalog):
+    supply_id = supplies.create_supply_order(db, 1, [(catalog[0], 4), (catalog[1], 2)])
+    assert supplies.supply_items(db, supply_id) == [("Товар 1", 4, 0), ("Товар 2", 2, 0)]
+    with pytest.raises(ValueError):
+        supplies.create_supply_order(db, 1, [])
+
+    supplies.receive_supply(db, supply_id)
+    report = reports.build_stock_report(db)
+    assert "Товар 1" in report and "⚠️" in report
@@ -0,0 +1,92 @@
+import pytest
+
+from services import supplies
+
+
+def order(db, items, status=supplies.STATUS_PENDING):
+    """Поставка с позициями items (пары товар, количество) в порядке id."""
+    with db.transaction() as cursor:
+        cursor.execute("INSERT INTO supplies (supplier_id, date, status) VALUES (1, date('now'), ?)", (status,))
+        supply_id = cursor.lastrowid
+        cursor.executemany("INSERT INTO supply_items (supply_id, product_id, quantity) VALUES (?, ?, ?)",
+                           [(supply_id, product_id, quantity) for product_id, quantity in items])
+    return supply_id
+
+
+def received(db, supply_id):
+    return [row[0] for row in db.fetchall("SELECT received FROM supply_items WHERE supply_id = ? ORDER BY id",
+                                          (supply_id,))]
+
+
+def stock(db, product_id):
+    return db.fetchone("SELECT quantity FROM inventory WHERE product_id = ?", (product_id,))[0]
+
+
+def test_receipt_split_across_duplicate_lines(db, catalog):
+    product = catalog[0]
+    supply_id = order(db, [(product, 10), (catalog[1], 3), (product, 5)])
+
+    _, count, status = supplies.receive_supply_counts(db, supply_id, {product: 15})
+
+    assert count == 1
+    assert received(db, supply_id) == [10, 0, 5]
+    assert stock(db, product) == 15
+    assert status == supplies.STATUS_PARTIAL
+
+
+def test_partial_receipts_fill_lines_in_order(db, catalog):
+    product = catalog[0]
+    supply_id = order(db, [(product, 10), (product, 5)])
+
+    supplies.receive_supply_counts(db, supply_id, {product: 4})
+    assert received(db, supply_id) == [4, 0]
+    supplies.receive_supply_counts(db, supply_id, {product: 8})
+    assert received(db, supply_id) == [10, 2]
+
+    assert supplies.receive_supply(db, supply_id) == 1
+    assert received(db, supply_id) == [10, 5]
+    assert stock(db, product) == 15
+    assert db.fetchone("SELECT status FROM supplies WHERE id = ?", (supply_id,))[0] == supplies.STATUS_DELIVERED
+
+
+def test_over_receipt_goes_to_last_line(db, catalog):
+    product = catalog[0]
+    supply_id = order(db, [(product, 10), (product, 5)])
+
+    _, _, status = supplies.receive_supply_counts(db, supply_id, {product: 18})
+
+    assert received(db, supply_id) == [10, 8]
+    assert stock(db, product) == 18
+    assert status == supplies.STATUS_DELIVERED
+
+
+def test_receive_supply_twice(db, catalog):
+    supply_id = order(db, [(catalog[0], 10), (catalog[1], 5)])
+
+    assert supplies.receive_supply(db, supply_id) == 2
+    assert supplies.receive_supply(db, supply_id) is None
+    assert stock(db, catalog[0]) == 10
+    assert db.fetchone("SELECT COUNT(*) FROM supply_receipts WHERE supply_id = ?", (supply_id,))[0] == 1
+
+
+@pytest.mark.parametrize("status", [supplies.STATUS_DRAFT, supplies.STATUS_CANCELLED])
+def test_receipt_rejected_for_draft_and_cancelled(db, catalog, status):
+    supply_id = order(db, [(catalog[0], 10)], status)
+
+    with pytest.raises(ValueError):
+        supplies.receive_supply(db, supply_id)
+    with pytest.raises(ValueError):
+        supplies.receive_supply_counts(db, supply_id, {catalog[0]: 1})
+
+    assert db.fetchone("SELECT COUNT(*) FROM supply_receipts")[0] == 0
+    assert received(db, supply_id) == [0]
+    assert stock(db, catalog[0]) == 0
+
+
+def test_receipt_rejects_products_outside_supply(db, catalog):
+    supply_id = order(db, [(catalog[0], 10)])
+
+    with pytest.raises(ValueError):
+        supplies.receive_supply_counts(db, supply_id, {catalog[2]: 1})
+
+    assert db.fetchone("SELECT COUNT(*) FROM supply_receipts")[0] == 0